@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-18 23:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('billing', '0002_initial'),
+        ('orders', '0003_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['status', 'completed_at'], name='payment_status_completed_idx'),
+        ),
+    ]
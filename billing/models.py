@@ -37,6 +37,10 @@ class Payment(models.Model):
     class Meta:
         db_table = 'payments'
         ordering = ['-created_at']
+        indexes = [
+            # Revenue is always completed payments over a completed_at range
+            models.Index(fields=['status', 'completed_at'], name='payment_status_completed_idx'),
+        ]
     
     def __str__(self):
         return f"{self.payment_number} - {self.get_payment_method_display()}"
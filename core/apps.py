@@ -4,3 +4,24 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.signals import user_logged_out
+        from django.db.models.signals import post_delete, post_save
+        from billing.models import Payment
+        from inventory.models import StockMovement
+        from orders.models import Order, OrderItem
+        from . import metrics
+        from . import checks  # noqa: F401 - registers the system checks
+        from .backends import invalidate_cached_user, invalidate_logged_out_user
+
+        User = get_user_model()
+        post_save.connect(invalidate_cached_user, sender=User, dispatch_uid='core_invalidate_cached_user')
+        post_delete.connect(invalidate_cached_user, sender=User, dispatch_uid='core_delete_cached_user')
+        user_logged_out.connect(invalidate_logged_out_user, dispatch_uid='core_logout_cached_user')
+
+        post_save.connect(metrics.order_saved, sender=Order, dispatch_uid='core_metrics_order')
+        post_save.connect(metrics.order_item_saved, sender=OrderItem, dispatch_uid='core_metrics_order_item')
+        post_save.connect(metrics.payment_saved, sender=Payment, dispatch_uid='core_metrics_payment')
+        post_save.connect(metrics.stock_movement_saved, sender=StockMovement, dispatch_uid='core_metrics_stock_movement')
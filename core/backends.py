@@ -0,0 +1,37 @@
+"""
+Authentication backend that keeps the logged-in user in the cache, so
+AuthenticationMiddleware does not load the user row on every request. Only
+safe with a cache shared by all workers (see core.checks).
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from . import metrics
+
+
+def user_cache_key(user_id):
+    return f'auth_user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user is served from cache until the user is saved or deleted"""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        metrics.cache_lookup('user', user is not None)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, getattr(settings, 'SESSION_USER_CACHE_TIMEOUT', 300))
+        return user
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    cache.delete(user_cache_key(instance.pk))
+
+
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        cache.delete(user_cache_key(user.pk))
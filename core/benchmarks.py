@@ -0,0 +1,434 @@
+"""
+Endpoint benchmarks for the POS and report hot paths, run with the Django
+test client against the synthetic dataset (see core.synthetic). Every
+scenario runs inside a transaction that is rolled back, so the writes made
+by order entry and payments leave no trace.
+"""
+import json
+import logging
+import math
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+# Average of WEEKDAY_FACTOR in core.synthetic; turns a target order count into orders per day
+WEEKLY_VOLUME = 1.079
+DATASET_DAYS = 365
+
+REPORT_RANGES = ['today', 'yesterday', 'this_week', 'last_week', 'this_month', 'last_month']
+EXPORT_RANGES = ['today', 'this_week', 'this_month']
+
+# Views that log on every call, timed by benchmark_logging
+LOGGING_SCENARIOS = ['create_order', 'change_table', 'add_order_item', 'process_payment']
+
+
+class _Rollback(Exception):
+    pass
+
+
+def ensure_dataset(scale, seed=42, regenerate=False, progress=None):
+    """Make sure a synthetic dataset of roughly the given size exists; returns its order count"""
+    from orders.models import Order
+    from . import synthetic
+
+    target = SCALES[scale]
+    existing = Order.objects.filter(order_number__startswith='SYN').count()
+    if not regenerate and 0.8 * target <= existing <= 1.2 * target:
+        return existing
+
+    if synthetic.exists():
+        synthetic.flush()
+    generator = synthetic.Generator(
+        seed=seed,
+        days=DATASET_DAYS,
+        orders_per_day=max(math.ceil(target / DATASET_DAYS / WEEKLY_VOLUME), 1),
+        end_date=timezone.localdate(),
+        progress=progress,
+    )
+    generator.setup()
+    generator.orders()
+    return generator.created.get('orders', 0)
+
+
+def _context():
+    """Ids the scenarios need, looked up once"""
+    from menu.models import MenuItem
+    from tables.models import Table
+
+    tables = list(Table.objects.filter(table_number__startswith='SY').order_by('table_number').values_list('id', flat=True))
+    if len(tables) < 4:
+        raise ValueError('The synthetic dataset needs at least four tables')
+    return {
+        'order_table': tables[0],
+        'payment_table': tables[1],
+        'move_from_table': tables[2],
+        'move_to_table': tables[3],
+        'menu_items': list(MenuItem.objects.filter(
+            reference_number__startswith='SY', is_available=True,
+        ).values_list('id', flat=True)[:20]),
+        'counter': 0,
+    }
+
+
+def _open_order(table_id, user, menu_item_ids):
+    """A pending order with three items on the table, as order entry would leave it"""
+    from menu.models import MenuItem
+    from orders.models import Order, OrderItem
+    from tables.models import Table
+
+    Order.objects.filter(table_id=table_id, status__in=['pending', 'confirmed', 'preparing', 'ready']).update(status='cancelled')
+    order = Order.objects.create(
+        order_number=f'BENCH{timezone.now():%H%M%S%f}', order_type='dine_in', status='pending',
+        table_id=table_id, created_by=user,
+    )
+    for item in MenuItem.objects.filter(id__in=menu_item_ids[:3]):
+        OrderItem.objects.create(order=order, menu_item=item, quantity=1, unit_price=item.price, total_price=item.price)
+    order.calculate_totals()
+    Table.objects.filter(id=table_id).update(status='occupied', occupied_since=timezone.now())
+    return order
+
+
+def _free_table(table_id):
+    from orders.models import Order
+    from tables.models import Table
+
+    Order.objects.filter(table_id=table_id, status__in=['pending', 'confirmed', 'preparing', 'ready']).update(status='cancelled')
+    Table.objects.filter(id=table_id).update(status='available', occupied_since=None)
+
+
+def _next_menu_item(ctx):
+    ctx['counter'] += 1
+    return ctx['menu_items'][ctx['counter'] % len(ctx['menu_items'])]
+
+
+def scenarios():
+    """(name, prepare, request) triples; prepare runs untimed before every request"""
+    order_ready = lambda client, ctx: _open_order(ctx['order_table'], ctx['user'], ctx['menu_items'])
+    payment_ready = lambda client, ctx: _open_order(ctx['payment_table'], ctx['user'], ctx['menu_items'])
+    table_free = lambda client, ctx: _free_table(ctx['order_table'])
+
+    def move_ready(client, ctx):
+        _free_table(ctx['move_to_table'])
+        _open_order(ctx['move_from_table'], ctx['user'], ctx['menu_items'])
+    dashboard = lambda section: lambda client, ctx: client.get(
+        '/dashboard/', {'section': section}, HTTP_HX_REQUEST='true', secure=True,
+    )
+
+    result = [
+        ('order_entry', order_ready, lambda client, ctx: client.get(f"/sales/order/{ctx['order_table']}/", secure=True)),
+        ('create_order', table_free, lambda client, ctx: client.post(
+            f"/sales/order/create/{ctx['order_table']}/", secure=True,
+        )),
+        ('change_table', move_ready, lambda client, ctx: client.post(
+            f"/sales/order/{ctx['move_from_table']}/change-table/",
+            json.dumps({'new_table_id': ctx['move_to_table']}), content_type='application/json', secure=True,
+        )),
+        ('get_order_items', order_ready, lambda client, ctx: client.get(f"/sales/order/{ctx['order_table']}/items/", secure=True)),
+        ('add_order_item', None, lambda client, ctx: client.post(
+            f"/sales/order/{ctx['order_table']}/add-item/",
+            json.dumps({'menu_item_id': _next_menu_item(ctx), 'quantity': 1}),
+            content_type='application/json', secure=True,
+        )),
+        ('process_payment', payment_ready, lambda client, ctx: client.post(
+            f"/sales/order/{ctx['payment_table']}/process-payment/", {'payment_method': 'cash'}, secure=True,
+        )),
+        ('dashboard', None, lambda client, ctx: client.get('/dashboard/', secure=True)),
+        ('dashboard_stats', None, dashboard('stats')),
+        ('dashboard_recent_orders', None, dashboard('recent_orders')),
+        ('dashboard_low_stock', None, dashboard('low_stock')),
+        ('inventory_list', None, lambda client, ctx: client.get('/inventory/', secure=True)),
+    ]
+    for name in REPORT_RANGES:
+        result.append((f'sales_report_{name}', None, lambda client, ctx, name=name: client.get(
+            '/reports/sales/', {'range': name}, secure=True,
+        )))
+    for name in EXPORT_RANGES:
+        result.append((f'export_orders_pdf_{name}', None, lambda client, ctx, name=name: client.get(
+            '/reports/export/orders-pdf/', {'range': name}, secure=True,
+        )))
+    return result
+
+
+def _percentile(values, p):
+    import numpy as np
+    return round(float(np.percentile(values, p)), 2)
+
+
+def run(repeat=10, warmup=1, max_seconds=60, only=None, progress=None):
+    """
+    Time every scenario and return {name: stats}. Each scenario gets warmup
+    untimed runs, then up to repeat timed runs (fewer when max_seconds is
+    reached), then one run under tracemalloc and query capture for memory
+    and query count, which would otherwise distort the timings.
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+
+    progress = progress or (lambda message: None)
+    results = {}
+    limits = dict(settings.RATE_LIMITS, order_write=(10 ** 9, 60))
+
+    cache.clear()
+    with override_settings(RATE_LIMITS=limits):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username=f'benchmark_{int(time.time())}', password=None, role='admin', is_staff=True, is_superuser=True,
+                )
+                # A view that raises is recorded as a 500 instead of ending the run
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                ctx = dict(_context(), user=user)
+
+                for name, prepare, request in scenarios():
+                    if only and not any(part in name for part in only):
+                        continue
+                    results[name] = _measure(client, ctx, prepare, request, repeat, warmup, max_seconds)
+                    stats = results[name]
+                    progress(f"{name:<30}{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['queries']:>8}"
+                             f"{stats['peak_memory_kb']:>12,}")
+                raise _Rollback
+        except _Rollback:
+            pass
+    cache.clear()
+    return results
+
+
+def _measure(client, ctx, prepare, request, repeat, warmup, max_seconds):
+    for _ in range(warmup):
+        if prepare:
+            prepare(client, ctx)
+        request(client, ctx)
+
+    timings = []
+    status = None
+    budget_end = time.perf_counter() + max_seconds
+    for _ in range(repeat):
+        if prepare:
+            prepare(client, ctx)
+        start = time.perf_counter()
+        response = request(client, ctx)
+        timings.append((time.perf_counter() - start) * 1000)
+        status = response.status_code
+        if time.perf_counter() > budget_end:
+            break
+
+    if prepare:
+        prepare(client, ctx)
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        request(client, ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'samples': len(timings),
+        'status': status,
+        'p50_ms': _percentile(timings, 50),
+        'p95_ms': _percentile(timings, 95),
+        'mean_ms': round(sum(timings) / len(timings), 2),
+        'min_ms': round(min(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'queries': len(queries),
+        'peak_memory_kb': peak // 1024,
+    }
+
+
+def metadata(scale, orders, seed):
+    import django
+    return {
+        'scale': scale,
+        'orders': orders,
+        'seed': seed,
+        'database': connection.vendor,
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'host': platform.node(),
+        'started_at': timezone.now().isoformat(),
+    }
+
+
+def compare(current, previous):
+    """Per-scenario p50/p95 change against a previous results file, in percent"""
+    changes = {}
+    for name, stats in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        changes[name] = {
+            key: round((stats[key] - before[key]) / before[key] * 100, 1) if before[key] else None
+            for key in ('p50_ms', 'p95_ms')
+        }
+        changes[name]['queries'] = stats['queries'] - before['queries']
+    return changes
+
+
+@contextmanager
+def throttled_log_disk(delay_ms, synchronous=False):
+    """
+    Make every log file write take delay_ms longer, like a saturated disk.
+    With synchronous=True records are written from the request thread, as
+    plain RotatingFileHandlers did, instead of going through the queue.
+    """
+    from .logs import QueuedRotatingFileHandler
+
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    handlers = {
+        handler for logger in loggers for handler in logger.handlers if isinstance(handler, QueuedRotatingFileHandler)
+    }
+    for handler in handlers:
+        def slow_emit(record, emit=handler.target.emit):
+            time.sleep(delay_ms / 1000)
+            emit(record)
+        handler.target.emit = slow_emit
+        if synchronous:
+            handler.emit = lambda record, handler=handler: handler.target.handle(handler.prepare(record))
+    try:
+        yield handlers
+    finally:
+        for handler in handlers:
+            del handler.target.emit
+            handler.__dict__.pop('emit', None)
+
+
+def seed_index_data(rows=20_000, seed=42):
+    """
+    Reservations, waitlist entries and attendance, which the synthetic
+    dataset has none of, for benchmark_indexes; call inside a transaction.
+    Returns the users the attendance belongs to.
+    """
+    import random
+    from datetime import time as clock, timedelta
+    from django.contrib.auth import get_user_model
+    from staff.models import Attendance
+    from tables.models import Reservation, Waitlist
+
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    now = timezone.now()
+    users = [
+        get_user_model().objects.create_user(username=f'benchmark_staff_{seed}_{i}', password=None)
+        for i in range(30)
+    ]
+
+    Reservation.objects.bulk_create([
+        Reservation(
+            reservation_number=f'BENCHR{i:07d}', customer_name=f'Guest {i}', customer_phone='0770000000',
+            party_size=rng.randint(1, 10), reservation_date=today + timedelta(days=rng.randint(-700, 30)),
+            reservation_time=clock(rng.randint(11, 22), rng.choice([0, 15, 30, 45])),
+            status=rng.choice(['pending', 'confirmed', 'completed', 'cancelled']),
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+
+    entries = Waitlist.objects.bulk_create([
+        Waitlist(
+            customer_name=f'Walk-in {i}', customer_phone='0770000000', party_size=rng.randint(1, 8),
+            status='waiting' if rng.random() < 0.01 else rng.choice(['seated', 'cancelled']),
+            estimated_wait_time=rng.randint(5, 60),
+        )
+        for i in range(rows)
+    ], batch_size=1000)
+    # created_at is auto_now_add; spread it out afterwards
+    for entry in entries:
+        entry.created_at = now - timedelta(minutes=rng.randint(0, 700 * 24 * 60))
+    Waitlist.objects.bulk_update(entries, ['created_at'], batch_size=1000)
+
+    shifts = []
+    for i in range(rows):
+        start = now - timedelta(hours=rng.randint(12, 700 * 24))
+        shifts.append(Attendance(user=users[i % len(users)], check_out=start + timedelta(hours=8)))
+    shifts += [Attendance(user=user) for user in users]  # One open shift each
+    Attendance.objects.bulk_create(shifts, batch_size=1000)
+    return users
+
+
+def index_checks(ctx, users):
+    """(query, index name, queryset) for each index added for the views' query patterns"""
+    from billing.models import Payment
+    from django.db.models import F, Sum
+    from inventory.models import StockItem
+    from inventory.valuation import end_of_day, start_of_day
+    from orders.models import Order
+    from staff.models import Attendance
+    from tables.models import Reservation, Waitlist
+
+    today = timezone.localdate()
+    month = (start_of_day(today.replace(day=1)), end_of_day(today))
+    active = ['pending', 'confirmed', 'preparing']
+    return [
+        ('open order on a table', 'order_table_status_idx',
+         Order.objects.filter(table_id=ctx['order_table'], status__in=active).order_by('-created_at')[:1]),
+        ('orders by status', 'order_status_created_idx',
+         Order.objects.filter(status='pending').values('id')),
+        ('sales report orders', 'order_status_created_idx',
+         Order.objects.filter(created_at__gte=month[0], created_at__lt=month[1],
+                              status__in=['confirmed', 'preparing', 'ready', 'completed']).values('total')),
+        ('revenue by payment method', 'payment_status_completed_idx',
+         Payment.objects.filter(status='completed', completed_at__gte=month[0], completed_at__lt=month[1])
+         .values('payment_method').annotate(total=Sum('amount')).order_by()),
+        ('low stock items', 'stock_item_low_idx',
+         StockItem.objects.filter(current_quantity__lte=F('min_quantity'))[:10]),
+        ('reservation list', 'reservation_date_time_idx',
+         Reservation.objects.order_by('reservation_date', 'reservation_time')),
+        ('waitlist', 'waitlist_status_created_idx',
+         Waitlist.objects.filter(status='waiting').order_by('created_at')),
+        ('open shift at logout', 'attendance_open_idx',
+         Attendance.objects.filter(user=users[0], check_out__isnull=True)[:1]),
+    ]
+
+
+def _plan(queryset, phase):
+    from .slowqueries import explain
+
+    sql, params = queryset.query.sql_with_params()
+    # The comment keeps sqlite3's statement cache from returning a plan prepared before the DROP INDEX
+    return '\n'.join(explain(f'SELECT /* {phase} */ {sql[len("SELECT "):]}', params))
+
+
+def run_index_checks(repeat=20, rows=20_000):
+    """
+    Time and EXPLAIN every index check with the indexes in place, then with
+    them dropped, all inside a transaction that is rolled back. Returns
+    {query: {'index', 'with_ms', 'without_ms', 'with_plan', 'without_plan'}}.
+    """
+    import statistics
+
+    def timed(queryset):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(timings), 3)
+
+    results = {}
+    try:
+        with transaction.atomic():
+            users = seed_index_data(rows)
+            checks = index_checks(_context(), users)
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            for name, index, queryset in checks:
+                results[name] = {'index': index, 'with_ms': timed(queryset), 'with_plan': _plan(queryset, 'with')}
+            with connection.cursor() as cursor:
+                for index in sorted({index for _, index, _ in checks}):
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(index)}')
+            for name, index, queryset in checks:
+                results[name].update(without_ms=timed(queryset), without_plan=_plan(queryset, 'without'))
+            raise _Rollback
+    except _Rollback:
+        pass
+    return results
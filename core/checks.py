@@ -0,0 +1,42 @@
+"""
+System checks for settings that are only correct with a cache shared by every
+worker process
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+SHARED_CACHE_BACKENDS = (
+    'django.core.cache.backends.redis.RedisCache',
+    'django.core.cache.backends.memcached.PyMemcacheCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+)
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def cache_is_shared(alias='default'):
+    return settings.CACHES[alias]['BACKEND'] in SHARED_CACHE_BACKENDS
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if cache_is_shared():
+        return []
+    backend = settings.CACHES['default']['BACKEND'].rsplit('.', 1)[-1]
+    errors = []
+    if 'core.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS:
+        errors.append(Error(
+            f'CachedModelBackend needs a shared cache, but the default cache is {backend}',
+            hint='Set REDIS_URL or MEMCACHED_LOCATION, or use django.contrib.auth.backends.ModelBackend',
+            id='core.E001',
+        ))
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(Error(
+            f'SESSION_ENGINE {settings.SESSION_ENGINE} needs a shared cache, but the default cache is {backend}',
+            hint='Set REDIS_URL or MEMCACHED_LOCATION, or use django.contrib.sessions.backends.db',
+            id='core.E002',
+        ))
+    return errors
@@ -0,0 +1,192 @@
+"""
+Logging plumbing for the files under logs/.
+
+Every file handler in settings.LOGGING is a QueuedRotatingFileHandler: the
+request thread only puts the record on a queue and a QueueListener thread
+per process does the formatting and the disk write, so a slow disk never
+holds up a request. Records carry the id of the request that logged them
+(set by RequestIdMiddleware) and are written as JSON lines by JSONFormatter.
+
+The JSON-lines logs (slow queries, traces) are read back here as well;
+readers find the file from the logger's handler.
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+
+_request_id = ContextVar('request_id', default=None)
+
+# Longest close() waits for the listener to make room for its stop signal
+STOP_TIMEOUT = 5
+
+# Attributes every LogRecord has; anything else came from extra=
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+def set_request_id(request_id):
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any extra= fields alongside the standard ones"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', None),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class _Listener(logging.handlers.QueueListener):
+    """Waits for room for the stop sentinel, so records in a full queue are still written on close"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=STOP_TIMEOUT)
+
+
+class QueuedRotatingFileHandler(logging.handlers.QueueHandler):
+    """
+    RotatingFileHandler written from a background thread. Takes the same
+    arguments; the formatter set on it is used by the file handler behind
+    the queue. The listener is started on first use in each process, so
+    every gunicorn worker gets its own. When the queue is full (the disk has
+    fallen that far behind) records are dropped and counted rather than
+    blocking the request.
+    """
+
+    def __init__(self, filename, maxBytes=0, backupCount=0, encoding='utf-8', queue_size=10000):
+        # Created first so logging.shutdown() closes this handler, draining the queue, before the file
+        self.target = logging.handlers.RotatingFileHandler(
+            filename, maxBytes=maxBytes, backupCount=backupCount, encoding=encoding, delay=True,
+        )
+        super().__init__(None)
+        self.queue_size = queue_size
+        self.dropped = 0
+        self.listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def baseFilename(self):
+        return self.target.baseFilename
+
+    def setFormatter(self, fmt):
+        self.target.setFormatter(fmt)
+
+    def _start(self):
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            # After a fork the parent's listener thread is gone; start over with a fresh queue
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.listener = _Listener(self.queue, self.target)
+            self.listener.start()
+            if self._pid is None:
+                atexit.register(self._stop)
+            self._pid = os.getpid()
+
+    def _stop(self):
+        listener, self.listener = self.listener, None
+        if listener is not None and self._pid == os.getpid():
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+
+    def prepare(self, record):
+        """
+        Copy of the record with the message merged and any traceback
+        rendered, which must happen in the logging thread; formatting into
+        the final line is left to the listener.
+        """
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        if getattr(record, 'request_id', None) is None:
+            # django.request logs the response after the middleware has finished, but passes the request
+            record.request_id = _request_id.get() or getattr(getattr(record, 'request', None), 'id', None)
+        return record
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            if self.dropped:
+                self.enqueue(self.prepare(logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': '%d log records dropped, log queue full', 'args': (self.dropped,),
+                })))
+                self.dropped = 0
+            self.enqueue(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self._stop()
+        self.target.close()
+        super().close()
+
+
+def log_path(logger):
+    """File of the logger's file handler, or None when it has none"""
+    for handler in logger.handlers:
+        if isinstance(handler, (logging.FileHandler, QueuedRotatingFileHandler)):
+            return Path(handler.baseFilename)
+    return None
+
+
+def read_jsonl(logger):
+    """Records from the logger's file and its rotated backups, oldest first"""
+    path = log_path(logger)
+    if path is None or not path.parent.exists():
+        return []
+    backups = [p for p in path.parent.glob(path.name + '.*') if p.suffix[1:].isdigit()]
+    records = []
+    for file in sorted(backups, key=lambda p: -int(p.suffix[1:])) + [path]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
@@ -0,0 +1,86 @@
+"""
+Management command to benchmark POS and report endpoints against the synthetic dataset
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Time order entry, payment, dashboard, report and export endpoints and write JSON results'
+
+    def add_arguments(self, parser):
+        from core.benchmarks import SCALES
+
+        parser.add_argument('--scale', choices=list(SCALES), default='10k', help='Dataset size in orders (default: 10k)')
+        parser.add_argument('--seed', type=int, default=42, help='Seed for a generated dataset (default: 42)')
+        parser.add_argument('--regenerate', action='store_true', help='Rebuild the synthetic dataset even if one of the right size exists')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed runs per endpoint (default: 10)')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed runs per endpoint (default: 1)')
+        parser.add_argument('--max-seconds', type=float, default=60, help='Stop repeating an endpoint after this long (default: 60)')
+        parser.add_argument('--only', nargs='+', help='Only run endpoints whose name contains one of these')
+        parser.add_argument('--output', help='Results file (default: logs/benchmark-<scale>-<timestamp>.json)')
+        parser.add_argument('--compare', help='Earlier results file to compare against')
+
+    def handle(self, *args, **options):
+        from core import benchmarks
+
+        previous = None
+        if options['compare']:
+            try:
+                previous = json.loads(Path(options['compare']).read_text())
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        self.stdout.write(f'Preparing {options["scale"]} dataset...')
+        orders = benchmarks.ensure_dataset(
+            options['scale'], seed=options['seed'], regenerate=options['regenerate'], progress=self.stdout.write,
+        )
+        self.stdout.write(f'{orders:,} synthetic orders\n')
+
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(self.style.SUCCESS(f'ENDPOINT BENCHMARK - {options["scale"]} ({orders:,} orders)'))
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(f'{"Endpoint":<30}{"p50 ms":>10}{"p95 ms":>10}{"Queries":>8}{"Peak KB":>12}')
+
+        results = benchmarks.run(
+            repeat=options['repeat'],
+            warmup=options['warmup'],
+            max_seconds=options['max_seconds'],
+            only=options['only'],
+            progress=self.stdout.write,
+        )
+
+        report = {
+            'meta': dict(benchmarks.metadata(options['scale'], orders, options['seed']),
+                         repeat=options['repeat'], warmup=options['warmup']),
+            'results': results,
+        }
+        if previous:
+            report['compared_to'] = options['compare']
+            report['changes'] = benchmarks.compare(results, previous.get('results', {}))
+
+        output = Path(options['output'] or Path(settings.BASE_DIR) / 'logs' /
+                      f'benchmark-{options["scale"]}-{timezone.localtime():%Y%m%d-%H%M%S}.json')
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+
+        if previous:
+            self.stdout.write('\nChange against ' + options['compare'])
+            for name, change in report['changes'].items():
+                p50 = change['p50_ms']
+                line = f'{name:<30}{"" if p50 is None else f"{p50:+.1f}%":>10}{change["queries"]:>+8}'
+                if p50 is not None and p50 > 10:
+                    self.stdout.write(self.style.WARNING(line))
+                else:
+                    self.stdout.write(line)
+
+        failed = [name for name, stats in results.items() if stats['status'] >= 400]
+        if failed:
+            self.stdout.write(self.style.WARNING(f'\nEndpoints returning errors: {", ".join(failed)}'))
+        self.stdout.write(self.style.SUCCESS(f'\nResults written to {output}'))
@@ -0,0 +1,42 @@
+"""
+Management command to benchmark the view query patterns with and without their indexes
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Time and EXPLAIN the indexed query patterns against the synthetic dataset, then again with the indexes dropped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per query (default: 20)')
+        parser.add_argument('--rows', type=int, default=20_000,
+                            help='Reservations, waitlist entries and shifts to add (default: 20000)')
+        parser.add_argument('--plans', action='store_true', help='Print the query plans')
+
+    def handle(self, *args, **options):
+        from orders.models import Order
+        from core import benchmarks
+
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        orders = Order.objects.filter(order_number__startswith='SYN').count()
+        if not orders:
+            raise CommandError('No synthetic dataset; run benchmark_endpoints or seed_synthetic first')
+
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(self.style.SUCCESS(f'INDEX BENCHMARK - {orders:,} orders, {options["rows"]:,} extra rows (rolled back)'))
+        self.stdout.write(self.style.SUCCESS('='*70))
+
+        results = benchmarks.run_index_checks(repeat=options['repeat'], rows=options['rows'])
+
+        self.stdout.write(f'{"Query":<28}{"Index":<30}{"Without ms":>11}{"With ms":>10}{"Speedup":>9}')
+        for name, result in results.items():
+            speedup = result['without_ms'] / result['with_ms'] if result['with_ms'] else 0
+            line = f'{name:<28}{result["index"]:<30}{result["without_ms"]:>11.3f}{result["with_ms"]:>10.3f}{speedup:>8.1f}x'
+            self.stdout.write(self.style.WARNING(line) if speedup < 1.1 else line)
+
+        if options['plans']:
+            for name, result in results.items():
+                self.stdout.write(self.style.SUCCESS(f'\n{name}'))
+                self.stdout.write('  without: ' + result['without_plan'].replace('\n', '\n           '))
+                self.stdout.write('  with:    ' + result['with_plan'].replace('\n', '\n           '))
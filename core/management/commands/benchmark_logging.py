@@ -0,0 +1,36 @@
+"""
+Management command to measure request latency with a slow log disk, queued against synchronous log writes
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Time the views that log on every request with log file writes artificially slowed down'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delay-ms', type=float, default=50, help='Added to every log file write (default: 50)')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per endpoint (default: 20)')
+
+    def handle(self, *args, **options):
+        from core import benchmarks
+
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        delay = options['delay_ms']
+
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(self.style.SUCCESS(f'LOGGING BENCHMARK - log writes slowed by {delay:g} ms'))
+        self.stdout.write(self.style.SUCCESS('='*70))
+
+        runs = {}
+        for mode, synchronous, delay_ms in [('normal disk', False, 0), ('synchronous', True, delay), ('queued', False, delay)]:
+            self.stdout.write(f'Running {mode}...')
+            with benchmarks.throttled_log_disk(delay_ms, synchronous=synchronous) as handlers:
+                if not handlers:
+                    raise CommandError('No queued log handlers configured in LOGGING')
+                runs[mode] = benchmarks.run(repeat=options['repeat'], only=benchmarks.LOGGING_SCENARIOS, max_seconds=120)
+
+        self.stdout.write(f'\n{"p50 / p95 ms":<20}' + ''.join(f'{mode:>22}' for mode in runs))
+        for name in runs['normal disk']:
+            cells = [f'{run[name]["p50_ms"]:.1f} / {run[name]["p95_ms"]:.1f}' for run in runs.values()]
+            self.stdout.write(f'{name:<20}' + ''.join(f'{cell:>22}' for cell in cells))
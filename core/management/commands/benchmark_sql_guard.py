@@ -0,0 +1,108 @@
+"""
+Management command to benchmark the SQL injection middleware against the
+original per-pattern implementation
+"""
+import re
+import time
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from core.middleware import SQLInjectionProtectionMiddleware
+
+
+def legacy_contains_sql_injection(value):
+    """The original check: lower-case and run each pattern separately"""
+    value_lower = value.lower()
+    for pattern in SQLInjectionProtectionMiddleware.SQL_PATTERNS:
+        if re.search(pattern, value_lower, re.IGNORECASE):
+            return True
+    return False
+
+
+class LegacySQLInjectionProtectionMiddleware(SQLInjectionProtectionMiddleware):
+    def process_request(self, request):
+        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
+            return None
+        for key, value in request.GET.items():
+            if legacy_contains_sql_injection(str(value)):
+                return True
+        if request.method == 'POST':
+            for key, value in request.POST.items():
+                if legacy_contains_sql_injection(str(value)):
+                    return True
+        return None
+
+
+# Values the two implementations must agree on
+SAMPLES = [
+    'chicken fried rice',
+    'Table 4 - no onions, extra chilli',
+    'Order for Mr. Perera',
+    "1' OR '1'='1",
+    '1; DROP TABLE orders',
+    'x UNION SELECT password FROM staff_users',
+    'nice -- comment',
+    'exec xp_cmdshell(',
+    'update me when the set menu is ready',
+    'Café crème brûlée',
+    'a=b',
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark per-request overhead of the SQL injection middleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000, help='Requests per scenario')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+
+        legacy = LegacySQLInjectionProtectionMiddleware(lambda request: None)
+        current = SQLInjectionProtectionMiddleware(lambda request: None)
+
+        for value in SAMPLES:
+            if legacy_contains_sql_injection(value) != current._contains_sql_injection(value):
+                self.stdout.write(self.style.ERROR(f'Mismatch with original patterns: {value!r}'))
+                return
+
+        # Realistic traffic: order-entry filters, a report range and a form post with free-text notes
+        scenarios = [
+            ('GET menu search', lambda: factory.get('/sales/order/', {
+                'table': '12', 'category': '3', 'search': 'devilled chicken',
+            })),
+            ('GET report range', lambda: factory.get('/reports/sales/', {
+                'start_date': '2025-01-01', 'end_date': '2025-01-31', 'period': 'custom', 'category': 'all',
+            })),
+            ('POST form', lambda: factory.post('/reservations/add/', {
+                'customer_name': 'Nimal Perera', 'phone': '+94 77 123 4567', 'party_size': '6',
+                'date': '2025-02-14', 'time': '19:30', 'table': '8',
+                'notes': 'Birthday dinner for grandmother, please prepare a cake and seat us near the window '
+                         'overlooking the beach. One guest is allergic to shellfish, two are vegetarian. ' * 3,
+            })),
+            ('GET static (exempt)', lambda: factory.get('/static/css/app.css')),
+        ]
+
+        self.stdout.write(self.style.SUCCESS('\n' + '='*70))
+        self.stdout.write(self.style.SUCCESS('SQL INJECTION MIDDLEWARE BENCHMARK'))
+        self.stdout.write(self.style.SUCCESS('='*70 + '\n'))
+        self.stdout.write(f'{"Scenario":<22}{"Before (us)":>14}{"After (us)":>14}{"Speedup":>10}')
+
+        for name, build in scenarios:
+            request = build()
+            # Parse the query string and body up front so only the middleware is timed
+            request.GET, request.POST
+            before = self._time(legacy, request, iterations)
+            after = self._time(current, request, iterations)
+            self.stdout.write(f'{name:<22}{before:>14.2f}{after:>14.2f}{before / after:>9.1f}x')
+
+        self.stdout.write('')
+
+    @staticmethod
+    def _time(middleware, request, iterations):
+        """Average microseconds per process_request call"""
+        start = time.perf_counter()
+        for _ in range(iterations):
+            middleware.process_request(request)
+        return (time.perf_counter() - start) / iterations * 1e6
@@ -0,0 +1,58 @@
+"""
+Management command to check per-view query budgets and catch N+1 regressions
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Request each budgeted view against small and large fixtures and fail on extra queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', help='Only check URL names containing one of these')
+        parser.add_argument('--show-sql', action='store_true', help='Print every query of a failing view, not just the repeated ones')
+
+    def handle(self, *args, **options):
+        from core import querybudget
+
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(self.style.SUCCESS('QUERY BUDGETS'))
+        self.stdout.write(self.style.SUCCESS('='*70))
+
+        small = querybudget.measure('small', only=options['only'], progress=self.stdout.write)
+        large = querybudget.measure('large', only=options['only'], progress=self.stdout.write)
+        rows = querybudget.evaluate(small, large, budgets)
+
+        self.stdout.write(f'\n{"View":<40}{"Budget":>8}{"Small":>8}{"Large":>8}')
+        failed = []
+        for name, budget, before, after, problems in rows:
+            line = f'{name:<40}{"-" if budget is None else budget:>8}{before:>8}{after:>8}'
+            if problems:
+                failed.append((name, problems))
+                self.stdout.write(self.style.ERROR(f'{line}  {"; ".join(problems)}'))
+            else:
+                self.stdout.write(line)
+
+        checked = {name for name, _, _, _, _ in rows}
+        unchecked = [name for name in budgets if name not in checked and not options['only']]
+        if unchecked:
+            self.stdout.write(self.style.WARNING(f'\nNo request defined for: {", ".join(unchecked)}'))
+
+        for name, problems in failed:
+            queries = large[name]['queries']
+            self.stdout.write(self.style.ERROR(f'\n{name}: {"; ".join(problems)}'))
+            if options['show_sql']:
+                for sql in queries:
+                    self.stdout.write(f'  {sql}')
+                continue
+            repeated = querybudget.repeated(queries)
+            if not repeated:
+                self.stdout.write('  No repeated queries; run with --show-sql to see all of them')
+            for sql, count in repeated:
+                self.stdout.write(f'  {count}x {sql}')
+
+        if failed:
+            raise CommandError(f'{len(failed)} view{"s" if len(failed) != 1 else ""} over budget')
+        self.stdout.write(self.style.SUCCESS(f'\nAll {len(rows)} views within budget'))
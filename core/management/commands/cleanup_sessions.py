@@ -0,0 +1,36 @@
+"""
+Management command to delete expired sessions and rate-limit counters
+"""
+import time
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import RateLimitCounter
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions and rate-limit counters (run daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per statement, keeps each write lock short')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+
+        sessions = 0
+        while True:
+            # Cached copies expire on their own, so only the database rows need deleting
+            keys = list(Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            sessions += Session.objects.filter(session_key__in=keys).delete()[0]
+
+        counters = RateLimitCounter.objects.filter(expires_at__lt=int(time.time())).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {sessions} expired session{"s" if sessions != 1 else ""} '
+            f'and {counters} rate-limit counter{"s" if counters != 1 else ""}'
+        ))
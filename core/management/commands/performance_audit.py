@@ -0,0 +1,90 @@
+"""
+Management command to perform performance audit
+"""
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Audit database, cache and session settings, indexes and the hot views against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='+', help='Only request views whose URL name contains one of these')
+        parser.add_argument('--days', type=int, default=30, help='Period requested from the reports (default: 30)')
+        parser.add_argument('--skip-views', action='store_true', help='Settings, schema and source checks only')
+
+    def handle(self, *args, **options):
+        from core import perfaudit
+
+        self.stdout.write(self.style.SUCCESS('\n' + '='*70))
+        self.stdout.write(self.style.SUCCESS('MAI KAI POS - PERFORMANCE AUDIT'))
+        self.stdout.write(self.style.SUCCESS('='*70 + '\n'))
+
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        views = {}
+        if not options['skip_views']:
+            self.stdout.write('Requesting hot views (rolled back)...')
+            views = perfaudit.measure_views(days=options['days'], only=options['only'])
+            self.stdout.write(f'\n{"View":<40}{"Status":>8}{"Queries":>9}{"Budget":>8}{"ms":>10}')
+            for name, result in views.items():
+                if result is None:
+                    self.stdout.write(f'{name:<40}{"skipped":>8}')
+                    continue
+                queries = len(result['statements'])
+                budget = budgets.get(name)
+                line = f'{name:<40}{result["status"]:>8}{queries:>9}{"-" if budget is None else budget:>8}{result["ms"]:>10.1f}'
+                if result['status'] >= 400 or (budget is not None and queries > budget):
+                    self.stdout.write(self.style.ERROR(line))
+                else:
+                    self.stdout.write(line)
+
+        findings = (
+            perfaudit.check_database()
+            + perfaudit.check_cache()
+            + perfaudit.check_sessions()
+            + perfaudit.check_indexes(views)
+            + perfaudit.check_date_lookups(views)
+            + (perfaudit.check_views(views, budgets) if views else [])
+        )
+        high = [f for f in findings if f.priority == perfaudit.HIGH]
+        medium = [f for f in findings if f.priority == perfaudit.MEDIUM]
+        passed = [f for f in findings if f.priority == perfaudit.PASSED]
+
+        # Print results, most urgent first
+        if high:
+            self.stdout.write(self.style.ERROR('\n❌ HIGH PRIORITY:'))
+            self.write_findings(high)
+
+        if medium:
+            self.stdout.write(self.style.WARNING('\n⚠️  MEDIUM PRIORITY:'))
+            self.write_findings(medium)
+
+        if passed:
+            self.stdout.write(self.style.SUCCESS('\n✅ PASSED CHECKS:'))
+            self.write_findings(passed)
+
+        # Summary
+        self.stdout.write('\n' + '='*70)
+        total = len(findings)
+        self.stdout.write(f'\nSummary: {len(passed)}/{total} checks passed')
+
+        if high:
+            self.stdout.write(self.style.ERROR(f'{len(high)} high priority issue(s) found'))
+        elif medium:
+            self.stdout.write(self.style.WARNING(f'{len(medium)} medium priority issue(s) - Review recommended'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All performance checks passed! ✅'))
+
+        self.stdout.write('='*70 + '\n')
+
+        # Return exit code
+        if high:
+            sys.exit(1)
+
+    def write_findings(self, findings):
+        for finding in findings:
+            self.stdout.write(f'  {finding.message}')
+            for detail in finding.details:
+                self.stdout.write(f'      {detail}')
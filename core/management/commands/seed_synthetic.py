@@ -0,0 +1,72 @@
+"""
+Management command to generate a synthetic dataset for load and scale testing
+"""
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Generate deterministic synthetic tables, menu, stock, customers and order history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data (default: 42)')
+        parser.add_argument('--days', type=int, default=90, help='Days of order history (default: 90)')
+        parser.add_argument('--orders-per-day', type=int, default=300, help='Average orders per day (default: 300)')
+        parser.add_argument('--end-date', help='Last day of history, YYYY-MM-DD (default: yesterday)')
+        parser.add_argument('--tables', type=int, default=30, help='Tables (default: 30)')
+        parser.add_argument('--menu-items', type=int, default=120, help='Menu items (default: 120)')
+        parser.add_argument('--stock-items', type=int, default=60, help='Stock items (default: 60)')
+        parser.add_argument('--customers', type=int, default=5000, help='Customers (default: 5000)')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert (default: 5000)')
+        parser.add_argument('--flush', action='store_true', help='Delete previously generated synthetic data first')
+        parser.add_argument('--flush-only', action='store_true', help='Delete synthetic data and stop')
+
+    def handle(self, *args, **options):
+        from core import synthetic
+
+        if options['flush'] or options['flush_only']:
+            deleted = synthetic.flush()
+            self.stdout.write(f'Deleted {deleted} synthetic row(s)')
+            if options['flush_only']:
+                return
+        elif synthetic.exists():
+            raise CommandError('Synthetic data already exists; run with --flush to replace it')
+
+        if options['days'] < 1 or options['orders_per_day'] < 1:
+            raise CommandError('--days and --orders-per-day must be at least 1')
+        if options['menu_items'] < 1 or options['stock_items'] < 2:
+            raise CommandError('At least 1 menu item and 2 stock items are needed')
+
+        end_date = None
+        if options['end_date']:
+            try:
+                end_date = datetime.strptime(options['end_date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--end-date must be YYYY-MM-DD')
+
+        generator = synthetic.Generator(
+            seed=options['seed'],
+            tables=options['tables'],
+            menu_items=options['menu_items'],
+            customers=options['customers'],
+            stock_items=options['stock_items'],
+            days=options['days'],
+            orders_per_day=options['orders_per_day'],
+            end_date=end_date,
+            batch_size=options['batch_size'],
+            progress=self.stdout.write,
+        )
+
+        started = time.monotonic()
+        generator.setup()
+        generator.orders()
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(f'Generated synthetic data in {elapsed:.1f}s (seed {options["seed"]})'))
+        for name, count in generator.created.items():
+            self.stdout.write(f'  {name:<16}{count:>12,}')
+        orders = generator.created.get('orders', 0)
+        if orders:
+            self.stdout.write(f'  {orders / elapsed:,.0f} orders/s')
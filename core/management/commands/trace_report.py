@@ -0,0 +1,80 @@
+"""
+Management command to summarise sampled request traces as flame-style trees
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Aggregate logs/traces.jsonl per endpoint and print where request time goes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', nargs='+', help='Only endpoints containing one of these')
+        parser.add_argument('--limit', type=int, default=10, help='Endpoints to show, most total time first (default 10)')
+        parser.add_argument('--min-percent', type=float, default=1.0,
+                            help='Hide spans taking less than this share of the endpoint (default 1)')
+        parser.add_argument('--width', type=int, default=30, help='Width of the bars (default 30)')
+
+    def handle(self, *args, **options):
+        from core import tracing
+
+        traces = tracing.read_traces()
+        if not traces:
+            raise CommandError('No traces logged; set TRACING_ENABLED=True (and TRACE_SAMPLE_RATE) and send some requests')
+
+        endpoints = tracing.aggregate(traces)
+        if options['view']:
+            endpoints = {
+                key: endpoint for key, endpoint in endpoints.items()
+                if any(term in key for term in options['view'])
+            }
+            if not endpoints:
+                raise CommandError(f'No traces for {", ".join(options["view"])}')
+
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(self.style.SUCCESS('REQUEST TRACES'))
+        self.stdout.write(self.style.SUCCESS('='*70))
+        self.stdout.write(f'{len(traces)} traces, {len(endpoints)} endpoints')
+        self.stdout.write('Times are per request: total (self) and calls\n')
+
+        ranked = sorted(endpoints.items(), key=lambda item: sum(item[1]['durations']), reverse=True)
+        for key, endpoint in ranked[:options['limit']]:
+            durations = endpoint['durations']
+            self.stdout.write(self.style.SUCCESS(
+                f'\n{key}  {endpoint["requests"]} requests, '
+                f'p50 {_percentile(durations, 50):.1f} ms, p95 {_percentile(durations, 95):.1f} ms, '
+                f'max {max(durations):.1f} ms'
+            ))
+            self.write_tree(endpoint, options)
+
+    def write_tree(self, endpoint, options):
+        paths = endpoint['paths']
+        requests = endpoint['requests']
+        roots = [path for path in paths if len(path) == 1]
+        whole = sum(paths[path]['total_ms'] for path in roots) or 1
+        children = {}
+        for path in paths:
+            children.setdefault(path[:-1], []).append(path)
+
+        def write(path, depth):
+            stats = paths[path]
+            share = stats['total_ms'] / whole
+            if share * 100 < options['min_percent']:
+                return
+            bar = '█' * max(1, round(share * options['width']))
+            label = f'{"  " * depth}{path[-1]}'
+            line = (
+                f'{label:<32}{bar:<{options["width"]}} {share * 100:5.1f}%'
+                f'{stats["total_ms"] / requests:>10.2f} ms ({stats["self_ms"] / requests:.2f})'
+                f'{stats["calls"] / requests:>8.1f}x'
+            )
+            self.stdout.write(self.style.WARNING(line) if stats['self_ms'] / whole >= 0.25 else line)
+            for child in sorted(children.get(path, []), key=lambda p: paths[p]['total_ms'], reverse=True):
+                write(child, depth + 1)
+
+        for root in roots:
+            write(root, 0)
@@ -0,0 +1,99 @@
+"""
+Prometheus metrics for the POS, served at /metrics. Under gunicorn,
+PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes every worker write
+its samples to memory-mapped files in a shared directory, which the view
+merges; without it (runserver, waitress) samples stay in the process.
+
+Business counters are fed by post_save signals connected in CoreConfig.ready,
+plus explicit calls where rows are written with bulk_create.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+ACTIVE_ORDER_STATUSES = ['pending', 'confirmed', 'preparing', 'ready']
+
+REQUEST_LATENCY = Histogram(
+    'pos_request_duration_seconds', 'Request latency by URL name', ['view', 'method', 'status'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUEST_QUERIES = Histogram(
+    'pos_request_db_queries', 'Database queries per request by URL name', ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250),
+)
+ORDERS_CREATED = Counter('pos_orders_created', 'Orders created', ['order_type'])
+ITEMS_ADDED = Counter('pos_order_items_added', 'Order item lines added')
+PAYMENTS_SETTLED = Counter('pos_payments_settled', 'Completed payments', ['method'])
+PAYMENTS_AMOUNT = Counter('pos_payments_settled_amount', 'Amount of completed payments in Rs.', ['method'])
+STOCK_MOVEMENTS = Counter('pos_stock_movements', 'Stock movements recorded', ['type'])
+CACHE_REQUESTS = Counter('pos_cache_requests', 'Cache lookups by cache and result (hit or miss)', ['cache', 'result'])
+
+
+class ActiveOrdersCollector:
+    """Open orders by order status and the status of their table, read from the database at scrape time"""
+
+    def collect(self):
+        from django.db.models import Count
+        from orders.models import Order
+
+        gauge = GaugeMetricFamily('pos_active_orders', 'Open orders by table status', labels=['table_status', 'status'])
+        rows = Order.objects.filter(status__in=ACTIVE_ORDER_STATUSES).values('table__status', 'status').annotate(
+            orders=Count('id'),
+        ).order_by()
+        for row in rows:
+            gauge.add_metric([row['table__status'] or 'none', row['status']], row['orders'])
+        yield gauge
+
+
+def observe_request(request, response, seconds, queries):
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    REQUEST_LATENCY.labels(view, request.method, f'{response.status_code // 100}xx').observe(seconds)
+    REQUEST_QUERIES.labels(view).observe(queries)
+
+
+def cache_lookup(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def count_stock_movements(movements):
+    """For movements written with bulk_create, which sends no post_save"""
+    for movement in movements:
+        STOCK_MOVEMENTS.labels(movement.movement_type).inc()
+
+
+def order_saved(sender, instance, created, **kwargs):
+    if created:
+        ORDERS_CREATED.labels(instance.order_type).inc()
+
+
+def order_item_saved(sender, instance, created, **kwargs):
+    if created:
+        ITEMS_ADDED.inc()
+
+
+def payment_saved(sender, instance, created, **kwargs):
+    # Payments are recorded once settled, so creation is the settlement
+    if created and instance.status == 'completed':
+        PAYMENTS_SETTLED.labels(instance.payment_method).inc()
+        PAYMENTS_AMOUNT.labels(instance.payment_method).inc(float(instance.amount))
+
+
+def stock_movement_saved(sender, instance, created, **kwargs):
+    if created:
+        STOCK_MOVEMENTS.labels(instance.movement_type).inc()
+
+
+def render():
+    """Exposition text and content type for the /metrics response"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    live = CollectorRegistry()
+    live.register(ActiveOrdersCollector())
+    return generate_latest(registry) + generate_latest(live), CONTENT_TYPE_LATEST
@@ -2,49 +2,222 @@
 Custom Security Middleware
 """
 import logging
+import random
 import re
-from django.core.cache import cache
-from django.http import HttpResponseForbidden, HttpResponseBadRequest
+import time
+import uuid
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponseForbidden, HttpResponseBadRequest, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 
+from . import logs, metrics, ratelimit, slowqueries, timing, tracing
+
 logger = logging.getLogger('django.security')
+performance_logger = logging.getLogger('core.performance')
+
+REQUEST_ID_PATTERN = re.compile(r'[A-Za-z0-9._-]{1,64}')
+
+
+class TracingMiddleware:
+    """
+    Trace TRACE_SAMPLE_RATE of requests (TRACING_ENABLED), see core.tracing.
+    Goes first in MIDDLEWARE, with TracingViewMiddleware last, so a trace
+    nests request > middleware > view and SQL, template and cache spans sit
+    under whichever of those ran them.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.TRACE_SAMPLE_RATE
+        tracing.install()
+    
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        
+        with tracing.start_trace('request', method=request.method, path=request.path) as trace:
+            with connection.execute_wrapper(tracing.trace_query), tracing.span('middleware'):
+                response = self.get_response(request)
+            match = getattr(request, 'resolver_match', None)
+            trace.set('view', match.view_name if match else None)
+            trace.set('status', response.status_code)
+        return response
+
+
+class TracingViewMiddleware:
+    """Span around the view of a traced request; goes last in MIDDLEWARE"""
+    def __init__(self, get_response):
+        if not getattr(settings, 'TRACING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        if not tracing.active():
+            return self.get_response(request)
+        with tracing.span('view'):
+            return self.get_response(request)
+
+
+class RequestIdMiddleware:
+    """
+    Id for the request, stamped on every record it logs (core.logs) and sent
+    back as X-Request-ID. A well-formed id from the proxy is kept; otherwise
+    a traced request reuses its trace id so logs and traces line up.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        incoming = request.META.get('HTTP_X_REQUEST_ID', '')
+        if REQUEST_ID_PATTERN.fullmatch(incoming):
+            request.id = incoming
+        else:
+            request.id = tracing.current_trace_id() or uuid.uuid4().hex
+        
+        token = logs.set_request_id(request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            logs.reset_request_id(token)
+        response['X-Request-ID'] = request.id
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record latency and database query count per URL name for /metrics
+    (METRICS_ENABLED). Goes near the top of MIDDLEWARE so the latency covers
+    the rest of the stack.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        queries = 0
+        
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+        
+        start = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        metrics.observe_request(request, response, time.perf_counter() - start, queries)
+        return response
+
+
+class SlowQueryMiddleware:
+    """
+    Log statements slower than SLOW_QUERY_MS with their EXPLAIN plan
+    (SLOW_QUERY_LOG_ENABLED), see core.slowqueries
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SLOW_QUERY_LOG_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold_ms = settings.SLOW_QUERY_MS
+    
+    def __call__(self, request):
+        with connection.execute_wrapper(slowqueries.QueryRecorder(request, self.threshold_ms)):
+            return self.get_response(request)
+
+
+class ServerTimingMiddleware:
+    """
+    Opt-in request instrumentation (SERVER_TIMING_ENABLED). Adds a
+    Server-Timing header with database time and query count, template render
+    time and total time, and logs requests slower than SERVER_TIMING_SLOW_MS
+    with their slowest SQL. Goes first in MIDDLEWARE so the total covers the
+    rest of the stack.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVER_TIMING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = settings.SERVER_TIMING_SLOW_MS
+        self.keep_slowest = settings.SERVER_TIMING_SLOW_QUERIES
+        timing.install_template_timing()
+    
+    def __call__(self, request):
+        timer = timing.RequestTimer(keep_slowest=self.keep_slowest)
+        token = timing.activate(timer)
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            timing.deactivate(token)
+        
+        total = timer.elapsed()
+        response['Server-Timing'] = timer.header(total)
+        if total * 1000 >= self.slow_ms:
+            self.log_slow(request, response, timer, total)
+        return response
+    
+    @staticmethod
+    def log_slow(request, response, timer, total):
+        lines = [
+            f'Slow request: {request.method} {request.path} {response.status_code} '
+            f'total={total * 1000:.0f}ms db={timer.db_time * 1000:.0f}ms queries={timer.queries} '
+            f'tpl={timer.template_time * 1000:.0f}ms'
+        ]
+        for ms, sql in timer.slowest():
+            lines.append(f'  {ms:.1f}ms {sql[:1000]}')
+        performance_logger.warning('\n'.join(lines))
 
 
 class RateLimitMiddleware(MiddlewareMixin):
     """
-    Rate limiting middleware to prevent brute force attacks
+    Rate limiting middleware to prevent brute force attacks and to stop a
+    single terminal flooding the order endpoints. Counters live in the shared
+    rate-limit backend, so the limits hold across all worker processes.
     """
     def process_request(self, request):
         if request.path.startswith('/staff/login/'):
             ip = self.get_client_ip(request)
-            cache_key = f'login_attempts_{ip}'
-            attempts = cache.get(cache_key, 0)
+            limit, window = settings.RATE_LIMITS['login']
+            limited, retry_after = ratelimit.is_limited(f'login:{ip}', limit, window)
             
-            if attempts >= 5:
+            if limited:
                 logger.warning(f'Rate limit exceeded for IP: {ip}')
-                return HttpResponseForbidden(
+                response = HttpResponseForbidden(
                     '<h1>Too Many Requests</h1>'
-                    '<p>Too many login attempts. Please try again in 5 minutes.</p>'
+                    f'<p>Too many login attempts. Please try again in {window // 60} minutes.</p>'
+                )
+                response['Retry-After'] = str(retry_after)
+                return response
+        
+        elif request.method == 'POST' and request.path.startswith('/sales/order/') and request.user.is_authenticated:
+            limit, window = settings.RATE_LIMITS['order_write']
+            allowed, retry_after = ratelimit.hit(f'order_write:{request.user.pk}', limit, window)
+            
+            if not allowed:
+                logger.warning(f'Order rate limit exceeded for user: {request.user.username}')
+                response = JsonResponse(
+                    {'success': False, 'error': 'Too many requests from this terminal. Please wait a moment.'},
+                    status=429,
                 )
+                response['Retry-After'] = str(retry_after)
+                return response
             
         return None
     
     def process_response(self, request, response):
         if request.path.startswith('/staff/login/') and request.method == 'POST':
-            if response.status_code in [200, 302]:
-                # Check if login failed
-                if hasattr(response, 'context') and response.context:
-                    if response.context.get('error'):
-                        ip = self.get_client_ip(request)
-                        cache_key = f'login_attempts_{ip}'
-                        attempts = cache.get(cache_key, 0)
-                        cache.set(cache_key, attempts + 1, 300)  # 5 minutes
-                        logger.warning(f'Failed login attempt from IP: {ip}')
-                else:
-                    # Successful login - clear attempts
-                    ip = self.get_client_ip(request)
-                    cache_key = f'login_attempts_{ip}'
-                    cache.delete(cache_key)
+            ip = self.get_client_ip(request)
+            if response.status_code == 200:
+                # The login form was shown again, so the credentials were wrong
+                limit, window = settings.RATE_LIMITS['login']
+                ratelimit.hit(f'login:{ip}', limit, window)
+                logger.warning(f'Failed login attempt from IP: {ip}')
+            elif response.status_code == 302:
+                # Successful login - clear attempts
+                ratelimit.reset(f'login:{ip}')
         
         return response
     
@@ -58,6 +231,28 @@ class RateLimitMiddleware(MiddlewareMixin):
         return ip
 
 
+class SessionRefreshMiddleware(MiddlewareMixin):
+    """
+    Extend session expiry at most once every SESSION_REFRESH_INTERVAL seconds,
+    so requests that do not change the session do not write it.
+    Must come after SessionMiddleware.
+    """
+    REFRESHED_KEY = '_session_refreshed_at'
+    
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is None or not session.session_key or session.modified or response.status_code == 500:
+            return response
+        
+        last_refresh = session.get(self.REFRESHED_KEY, 0)
+        now = int(time.time())
+        if now - last_refresh >= settings.SESSION_REFRESH_INTERVAL:
+            # Marks the session modified, so SessionMiddleware saves it and re-issues the cookie
+            session[self.REFRESHED_KEY] = now
+        
+        return response
+
+
 class SecurityHeadersMiddleware(MiddlewareMixin):
     """
     Add additional security headers
@@ -102,21 +297,43 @@ class SQLInjectionProtectionMiddleware(MiddlewareMixin):
         r"('.*or.*'.*=.*')",
     ]
     
-    def process_request(self, request):
+    # Every pattern above needs at least one of these literals, so values
+    # without any of them are passed without running the regex
+    TRIGGER_LITERALS = ('=', '--', 'select', 'insert', 'update', 'delete', 'drop', 'exec')
+    
+    # Values are matched lower-cased, so the combined pattern needs no IGNORECASE
+    SQL_REGEX = re.compile('|'.join(SQL_PATTERNS))
+    
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.max_value_length = getattr(settings, 'SQL_INJECTION_MAX_VALUE_LENGTH', 8192)
+        self.long_fields = getattr(settings, 'SQL_INJECTION_LONG_FIELDS', {})
+        
         # Skip admin panel and static files
-        if request.path.startswith('/admin/') or request.path.startswith('/static/'):
+        prefixes = {'/admin/', '/' + settings.ADMIN_URL.lstrip('/'), '/' + settings.STATIC_URL.lstrip('/')}
+        self.exempt_prefixes = tuple(sorted(prefix for prefix in prefixes if prefix != '/'))
+    
+    def process_request(self, request):
+        if request.path.startswith(self.exempt_prefixes):
             return None
         
         # Check GET parameters
         for key, value in request.GET.items():
-            if self._contains_sql_injection(str(value)):
+            if len(value) > self.max_value_length:
+                logger.error(f'Oversized GET parameter: {key} ({len(value)} characters) from IP: {self._get_ip(request)}')
+                return HttpResponseBadRequest('Invalid request parameters')
+            if self._contains_sql_injection(value):
                 logger.error(f'SQL injection attempt in GET parameter: {key}={value} from IP: {self._get_ip(request)}')
                 return HttpResponseBadRequest('Invalid request parameters')
         
         # Check POST parameters
         if request.method == 'POST':
+            long_fields = self.long_fields.get(request.path, ())
             for key, value in request.POST.items():
-                if self._contains_sql_injection(str(value)):
+                if len(value) > self.max_value_length and key not in long_fields:
+                    logger.error(f'Oversized POST parameter: {key} ({len(value)} characters) from IP: {self._get_ip(request)}')
+                    return HttpResponseBadRequest('Invalid request data')
+                if self._contains_sql_injection(value):
                     logger.error(f'SQL injection attempt in POST parameter: {key} from IP: {self._get_ip(request)}')
                     return HttpResponseBadRequest('Invalid request data')
         
@@ -125,9 +342,9 @@ class SQLInjectionProtectionMiddleware(MiddlewareMixin):
     def _contains_sql_injection(self, value):
         """Check if value contains SQL injection patterns"""
         value_lower = value.lower()
-        for pattern in self.SQL_PATTERNS:
-            if re.search(pattern, value_lower, re.IGNORECASE):
-                return True
+        for literal in self.TRIGGER_LITERALS:
+            if literal in value_lower:
+                return self.SQL_REGEX.search(value_lower) is not None
         return False
     
     def _get_ip(self, request):
@@ -136,4 +353,3 @@ class SQLInjectionProtectionMiddleware(MiddlewareMixin):
         if x_forwarded_for:
             return x_forwarded_for.split(',')[0]
         return request.META.get('REMOTE_ADDR')
-
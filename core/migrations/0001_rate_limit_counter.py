@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200)),
+                ('window_start', models.BigIntegerField(help_text='Unix time the window starts')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('expires_at', models.BigIntegerField(db_index=True, help_text='Unix time after which the row is no longer read')),
+            ],
+            options={
+                'db_table': 'rate_limit_counters',
+                'unique_together': {('key', 'window_start')},
+            },
+        ),
+    ]
@@ -1,3 +1,18 @@
 from django.db import models
 
 # Core utility models can be added here if needed
+
+
+class RateLimitCounter(models.Model):
+    """Hits for one rate-limit key in one fixed window, shared by all workers"""
+    key = models.CharField(max_length=200)
+    window_start = models.BigIntegerField(help_text="Unix time the window starts")
+    count = models.PositiveIntegerField(default=0)
+    expires_at = models.BigIntegerField(db_index=True, help_text="Unix time after which the row is no longer read")
+    
+    class Meta:
+        db_table = 'rate_limit_counters'
+        unique_together = ['key', 'window_start']
+    
+    def __str__(self):
+        return f"{self.key} @ {self.window_start}: {self.count}"
@@ -0,0 +1,374 @@
+"""
+Checks behind `manage.py performance_audit`. Each check returns findings
+(priority, message, details); the command sorts and prints them.
+
+The view checks request every view of core.querybudget.checks() against the
+current database, inside a transaction that is rolled back, recording each
+statement with its parameters. Those statements drive the index, date-cast
+and unbounded-query checks, so they reflect what the views actually run.
+"""
+import re
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from .benchmarks import _Rollback
+from .slowqueries import fingerprint
+
+HIGH, MEDIUM, PASSED = 'high', 'medium', 'passed'
+
+LARGE_TABLE_ROWS = 10_000  # A missing index on a table this big is high priority
+UNBOUNDED_ROWS = 500  # Rows a SELECT without LIMIT may return before it is flagged
+MAX_DETAILS = 8
+
+Finding = namedtuple('Finding', ['priority', 'message', 'details'])
+
+_WHERE = re.compile(r'\bWHERE\b(.*?)(?:\bGROUP BY\b|\bORDER BY\b|\bLIMIT\b|\bHAVING\b|$)', re.S)
+_FILTERED_COLUMN = re.compile(r'"(\w+)"\."(\w+)"\s*(?:=|<>|!=|<=|>=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b)', re.I)
+_EQUALITY_COLUMN = re.compile(r'(?<!NOT \()"(\w+)"\."(\w+)"\s*(?:=|\bIN\b|\bIS NULL\b)', re.I)  # Not negated ones
+_DATE_CAST = re.compile(r'django_datetime_cast_date\(|AT TIME ZONE [^)]*\)::date|::date\b|\bDATE\(', re.I)
+_DATE_LOOKUP = re.compile(r"\b\w+__date(?:__\w+)?\b(?=\s*=|'|\")")
+
+
+def _project_apps():
+    base = Path(settings.BASE_DIR).resolve()
+    return [app for app in apps.get_app_configs() if Path(app.path).resolve().is_relative_to(base)]
+
+
+def _details(lines):
+    lines = list(lines)
+    if len(lines) > MAX_DETAILS:
+        lines = lines[:MAX_DETAILS] + [f'... and {len(lines) - MAX_DETAILS} more']
+    return lines
+
+
+# Configuration
+
+def check_database():
+    findings = []
+    database = settings.DATABASES['default']
+    conn_max_age = database.get('CONN_MAX_AGE', 0)
+    if conn_max_age == 0:
+        priority = MEDIUM if connection.vendor == 'sqlite' else HIGH
+        findings.append(Finding(priority, 'CONN_MAX_AGE is 0 - every request opens a new database connection', []))
+    elif conn_max_age is None and not database.get('CONN_HEALTH_CHECKS'):
+        findings.append(Finding(MEDIUM, 'Persistent connections without CONN_HEALTH_CHECKS - a dropped connection fails a request', []))
+    else:
+        findings.append(Finding(PASSED, f'Persistent database connections (CONN_MAX_AGE={conn_max_age})', []))
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            mode = cursor.fetchone()[0].lower()
+        if mode != 'wal':
+            findings.append(Finding(
+                HIGH, f'SQLite journal mode is {mode} - writers block readers; enable WAL (PRAGMA journal_mode=wal)', [],
+            ))
+        else:
+            findings.append(Finding(PASSED, 'SQLite is in WAL mode', []))
+    return findings
+
+
+def check_cache():
+    findings = []
+    for alias, options in settings.CACHES.items():
+        backend = options['BACKEND']
+        name = backend.rsplit('.', 1)[-1]
+        if 'DummyCache' in backend:
+            findings.append(Finding(HIGH, f'Cache "{alias}" is {name} - nothing is cached', []))
+        elif 'LocMemCache' in backend or 'FileBasedCache' in backend:
+            findings.append(Finding(
+                MEDIUM, f'Cache "{alias}" is {name} - each worker process keeps its own copy, '
+                        'so hit rates drop and invalidations do not reach other workers', [],
+            ))
+        else:
+            findings.append(Finding(PASSED, f'Cache "{alias}" is shared ({name})', []))
+    return findings
+
+
+def check_sessions():
+    findings = []
+    engine = settings.SESSION_ENGINE.rsplit('.', 1)[-1]
+    if engine == 'db':
+        findings.append(Finding(MEDIUM, 'SESSION_ENGINE is db - a session query on every request; use cached_db with a shared cache', []))
+    else:
+        findings.append(Finding(PASSED, f'SESSION_ENGINE is {engine}', []))
+    if settings.SESSION_SAVE_EVERY_REQUEST:
+        findings.append(Finding(HIGH, 'SESSION_SAVE_EVERY_REQUEST is True - every request writes its session', []))
+    else:
+        findings.append(Finding(PASSED, 'Sessions are only saved when they change', []))
+    if settings.DEBUG:
+        findings.append(Finding(MEDIUM, 'DEBUG is True - every query is kept in memory and responses are slower', []))
+    return findings
+
+
+# Source
+
+def check_date_lookups(views):
+    """__date lookups in project code, and the views whose SQL casts a column to a date"""
+    findings = []
+    base = Path(settings.BASE_DIR)
+    found = []
+    for app in _project_apps():
+        for path in sorted(Path(app.path).rglob('*.py')):
+            if 'migrations' in path.parts:
+                continue
+            for number, line in enumerate(path.read_text(encoding='utf-8').splitlines(), 1):
+                if _DATE_LOOKUP.search(line):
+                    found.append(f'{path.relative_to(base)}:{number}')
+    casting = sorted(name for name, result in views.items() if result and any(
+        _DATE_CAST.search(_where(sql)) for sql, _, _ in result['statements']
+    ))
+    if casting:
+        findings.append(Finding(
+            HIGH, f'{len(casting)} view(s) filter on a date cast of a datetime column - no index can be used; '
+                  'filter on a datetime range instead',
+            _details(casting),
+        ))
+    if found:
+        findings.append(Finding(MEDIUM, f'{len(found)} __date lookup(s) in project code', _details(found)))
+    if not casting and not found:
+        findings.append(Finding(PASSED, 'No __date lookups', []))
+    return findings
+
+
+# Views
+
+def _live_context():
+    """Two active tables and some available menu items from the current data, for the views that need an order"""
+    from menu.models import MenuItem
+    from tables.models import Table
+
+    tables = list(Table.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:2])
+    menu_items = list(MenuItem.objects.filter(is_available=True).order_by('id').values_list('id', flat=True)[:20])
+    if len(tables) < 2 or not menu_items:
+        return None
+    return {'order_table': tables[0], 'payment_table': tables[1], 'menu_items': menu_items, 'counter': 0}
+
+
+def _where(sql):
+    match = _WHERE.search(sql)
+    return match.group(1) if match else ''
+
+
+def _row_count(sql, params):
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM ({sql}) audit_rows', params)
+            return cursor.fetchone()[0]
+    except Exception:
+        return None
+
+
+def measure_views(days=30, only=None):
+    """
+    Request every checked view twice, keeping the second run, against the
+    current data and roll back. Returns {url name: {'status', 'ms',
+    'statements': [(sql, params, many)], 'unbounded': [(sql, rows)]}};
+    views that need an order are skipped when there are no tables or menu
+    items to build one from.
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from . import querybudget
+
+    results = {}
+    limits = dict(settings.RATE_LIMITS, order_write=(10 ** 9, 60))
+    end_date = timezone.localdate()
+    start_date = end_date - timedelta(days=days - 1)
+
+    with override_settings(RATE_LIMITS=limits):
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username=f'perfaudit_{int(time.time())}', password=None, role='admin', is_staff=True, is_superuser=True,
+                )
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                ctx = _live_context()
+                if ctx:
+                    ctx['user'] = user
+
+                for name, prepare, request in querybudget.checks(start_date, end_date):
+                    if only and not any(part in name for part in only):
+                        continue
+                    if prepare and not ctx:
+                        results[name] = None
+                        continue
+                    for _ in range(2):
+                        if prepare:
+                            prepare(client, ctx)
+                        cache.clear()
+                        statements = []
+
+                        def record(execute, sql, params, many, context):
+                            statements.append((sql, params, many))
+                            return execute(sql, params, many, context)
+
+                        start = time.perf_counter()
+                        with connection.execute_wrapper(record):
+                            response = request(client, ctx)
+                        elapsed = time.perf_counter() - start
+
+                    # Counted before the rollback, while the rows the view saw still exist
+                    unbounded = {}
+                    for sql, params, many in statements:
+                        if many or not sql.lstrip().upper().startswith('SELECT') or re.search(r'\bLIMIT\b', sql, re.I):
+                            continue
+                        key = fingerprint(sql)
+                        if key not in unbounded:
+                            rows = _row_count(sql, params)
+                            if rows is not None and rows >= UNBOUNDED_ROWS:
+                                unbounded[key] = rows
+                    results[name] = {
+                        'status': response.status_code,
+                        'ms': round(elapsed * 1000, 1),
+                        'statements': statements,
+                        'unbounded': sorted(unbounded.items(), key=lambda item: -item[1]),
+                    }
+                raise _Rollback
+        except _Rollback:
+            pass
+    cache.clear()
+    return results
+
+
+def check_views(results, budgets):
+    findings = []
+    skipped = sorted(name for name, result in results.items() if result is None)
+    measured = {name: result for name, result in results.items() if result is not None}
+
+    for name, result in measured.items():
+        budget = budgets.get(name)
+        queries = len(result['statements'])
+        if result['status'] >= 400:
+            findings.append(Finding(MEDIUM, f'{name} returned {result["status"]}', []))
+        elif budget is not None and queries > budget:
+            findings.append(Finding(HIGH, f'{name} ran {queries} queries, budget is {budget}', []))
+        for sql, rows in result['unbounded']:
+            priority = HIGH if rows >= UNBOUNDED_ROWS * 10 else MEDIUM
+            findings.append(Finding(priority, f'{name} reads {rows:,} rows without a LIMIT', [sql[:300]]))
+    if skipped:
+        findings.append(Finding(MEDIUM, 'Not run: no active tables or available menu items to build an order from', skipped))
+    within = [name for name, result in measured.items()
+              if result['status'] < 400 and len(result['statements']) <= budgets.get(name, float('inf'))]
+    if within:
+        findings.append(Finding(PASSED, f'{len(within)} view(s) within their query budgets', []))
+    return findings
+
+
+# Schema
+
+def _index_columns(table):
+    """Column lists of the indexes, unique constraints and primary key on table"""
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [c['columns'] for c in constraints.values() if c['columns'] and (c['index'] or c['unique'] or c['primary_key'])]
+
+
+def _condition_fields(condition):
+    """Field names a Q object filters on or compares against"""
+    names = set()
+    for child in condition.children:
+        if isinstance(child, models.Q):
+            names |= _condition_fields(child)
+            continue
+        lookup, value = child
+        names.add(lookup.split('__')[0])
+        if isinstance(value, models.F):
+            names.add(value.name.split('__')[0])
+    return names
+
+
+def _partial_index_columns(model):
+    """Columns in the condition of one of the model's partial indexes; the index serves that filter"""
+    columns = set()
+    for index in model._meta.indexes:
+        if index.condition is not None:
+            columns |= {model._meta.get_field(name).column for name in _condition_fields(index.condition)}
+    return columns
+
+
+def _covered(table, column, indexes, equal):
+    """
+    Whether an index can seek to column: it leads the index, or every column
+    before it in the index is equality-filtered (the (table, column) pairs in
+    equal) by the same statement
+    """
+    for columns in indexes:
+        if column in columns and all((table, before) in equal for before in columns[:columns.index(column)]):
+            return True
+    return False
+
+
+def _table_rows(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+        return cursor.fetchone()[0]
+
+
+def check_indexes(results):
+    """
+    Foreign keys of project models, and columns the measured views filter
+    on, that no index in the live schema serves. A column is served when it
+    leads an index, follows columns the same statement filters by equality
+    in a composite index, or is in a partial index's condition. Boolean
+    columns are left out; an index rarely helps them.
+    """
+    findings = []
+    fields = {}
+    partial = set()
+    for app in _project_apps():
+        for model in app.get_models():
+            if model._meta.proxy or not model._meta.managed:
+                continue
+            for field in model._meta.concrete_fields:
+                fields[(model._meta.db_table, field.column)] = field
+            partial |= {(model._meta.db_table, column) for column in _partial_index_columns(model)}
+
+    # Per filtered column: the views, and the equality-filtered columns of each statement
+    filtered = defaultdict(set)
+    statements = defaultdict(list)
+    for name, result in results.items():
+        for sql, _, _ in (result or {}).get('statements', []):
+            where = _where(sql)
+            equal = set(_EQUALITY_COLUMN.findall(where))
+            for table, column in set(_FILTERED_COLUMN.findall(where)):
+                filtered[(table, column)].add(name)
+                statements[(table, column)].append(equal)
+
+    tables = connection.introspection.table_names()
+    indexes = {}
+    missing = []
+    for (table, column), field in fields.items():
+        if table not in tables:
+            continue
+        if not (field.many_to_one or (table, column) in filtered) or isinstance(field, models.BooleanField):
+            continue
+        if (table, column) in partial:
+            continue
+        if table not in indexes:
+            indexes[table] = _index_columns(table)
+        uses = statements.get((table, column)) or [set()]
+        if not all(_covered(table, column, indexes[table], equal) for equal in uses):
+            missing.append((table, column, field, sorted(filtered.get((table, column), []))))
+
+    rows_by_table = {table: _table_rows(table) for table, _, _, _ in missing}
+    for table, column, field, views in missing:
+        rows = rows_by_table[table]
+        reason = 'foreign key' if field.many_to_one else 'filtered by ' + ', '.join(views[:3])
+        findings.append(Finding(
+            HIGH if rows >= LARGE_TABLE_ROWS else MEDIUM,
+            f'No index on {table}.{column} ({reason}; {rows:,} rows)', [],
+        ))
+    if not missing:
+        findings.append(Finding(PASSED, 'Every foreign key and filtered column is served by an index', []))
+    return findings
@@ -0,0 +1,176 @@
+"""
+Query-count budgets per view. Each view named in settings.QUERY_BUDGETS is
+requested against a small and a large synthetic fixture (see core.synthetic),
+built inside a transaction that is rolled back. A view fails when it runs
+more queries than its budget, or when the large fixture needs more queries
+than the small one, which is how an N+1 shows up.
+
+Counts are taken with an empty cache, so they include the session and user
+lookups a request makes on a cold cache.
+"""
+import time
+import warnings
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, reset_queries, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .benchmarks import _Rollback, _next_menu_item, _open_order
+from .slowqueries import fingerprint
+
+FIXTURES = {
+    'small': {'days': 7, 'orders_per_day': 20, 'tables': 6, 'menu_items': 24, 'customers': 40,
+              'stock_items': 12, 'extra_categories': 0},
+    'large': {'days': 14, 'orders_per_day': 80, 'tables': 18, 'menu_items': 72, 'customers': 200,
+              'stock_items': 36, 'extra_categories': 6},
+}
+
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def build_fixture(size, seed=7):
+    """Synthetic data of the given FIXTURES size ending today; call inside a transaction"""
+    from menu.models import Category
+    from . import synthetic
+
+    options = dict(FIXTURES[size])
+    extra_categories = options.pop('extra_categories')
+    if synthetic.exists():
+        synthetic.flush()
+    generator = synthetic.Generator(seed=seed, end_date=timezone.localdate(), **options)
+    with warnings.catch_warnings():
+        # With DEBUG on, the bulk inserts overflow the query log; nothing reads it here
+        warnings.filterwarnings('ignore', 'Limit for query logging exceeded')
+        generator.setup()
+        generator.orders()
+    Category.objects.bulk_create([
+        Category(name=f'Extra {i + 1}', description=synthetic.TAG, display_order=100 + i)
+        for i in range(extra_categories)
+    ])
+    return generator
+
+
+def checks(start_date, end_date):
+    """(url name, prepare, request) triples; prepare runs before the request and is not counted"""
+    order_ready = lambda client, ctx: _open_order(ctx['order_table'], ctx['user'], ctx['menu_items'])
+    payment_ready = lambda client, ctx: _open_order(ctx['payment_table'], ctx['user'], ctx['menu_items'])
+    get = lambda name, data=None, **kwargs: lambda client, ctx: client.get(
+        reverse(name, kwargs={key: ctx[value] for key, value in kwargs.items()}), data or {}, secure=True,
+    )
+    period = {'range': 'custom', 'start_date': start_date.isoformat(), 'end_date': end_date.isoformat()}
+
+    return [
+        ('core:sales', None, get('core:sales')),
+        ('core:dashboard', None, get('core:dashboard')),
+        ('core:order_entry', order_ready, get('core:order_entry', table_id='order_table')),
+        ('core:get_order_items', order_ready, get('core:get_order_items', table_id='order_table')),
+        ('core:menu_availability', None, get('core:menu_availability')),
+        ('core:add_order_item', order_ready, lambda client, ctx: client.post(
+            reverse('core:add_order_item', kwargs={'table_id': ctx['order_table']}),
+            {'menu_item_id': _next_menu_item(ctx), 'quantity': 1}, content_type='application/json', secure=True,
+        )),
+        ('core:payment_page', payment_ready, get('core:payment_page', table_id='payment_table')),
+        ('core:process_payment', payment_ready, lambda client, ctx: client.post(
+            reverse('core:process_payment', kwargs={'table_id': ctx['payment_table']}),
+            {'payment_method': 'cash'}, secure=True,
+        )),
+        ('orders:order_list', None, get('orders:order_list')),
+        ('menu:menu_list', None, get('menu:menu_list')),
+        ('tables:table_list', None, get('tables:table_list')),
+        ('inventory:inventory_list', None, get('inventory:inventory_list')),
+        ('inventory:stock_alerts', None, get('inventory:stock_alerts')),
+        ('inventory:stock_movements', None, get('inventory:stock_movements')),
+        ('inventory:vendor_analytics', None, get('inventory:vendor_analytics')),
+        ('reports:sales_report', None, get('reports:sales_report', period)),
+        ('reports:inventory_report', None, get('reports:inventory_report')),
+        ('reports:menu_engineering', None, get('reports:menu_engineering')),
+        ('reports:export_orders_pdf', None, get('reports:export_orders_pdf', period)),
+        ('admin:orders_order_changelist', None, get('admin:orders_order_changelist')),
+        ('admin:orders_orderitem_changelist', None, get('admin:orders_orderitem_changelist')),
+    ]
+
+
+def measure(size, only=None, progress=None):
+    """
+    Build the fixture, request every checked view once to warm up and once
+    under query capture, and roll everything back. Returns
+    {url name: {'status': int, 'queries': [sql, ...]}}.
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from .benchmarks import _context
+
+    progress = progress or (lambda message: None)
+    results = {}
+    limits = dict(settings.RATE_LIMITS, order_write=(10 ** 9, 60))
+
+    with override_settings(RATE_LIMITS=limits):
+        try:
+            with transaction.atomic():
+                generator = build_fixture(size)
+                progress(f'{size} fixture: {generator.created.get("orders", 0):,} orders, '
+                         f'{generator.created.get("menu items", 0)} menu items')
+                user = get_user_model().objects.create_user(
+                    username=f'querybudget_{int(time.time())}', password=None, role='admin', is_staff=True, is_superuser=True,
+                )
+                client = Client(raise_request_exception=False)
+                client.force_login(user)
+                ctx = dict(_context(), user=user)
+                end_date = timezone.localdate()
+                start_date = end_date - timedelta(days=FIXTURES[size]['days'] - 1)
+
+                for name, prepare, request in checks(start_date, end_date):
+                    if only and not any(part in name for part in only):
+                        continue
+                    for _ in range(2):
+                        if prepare:
+                            prepare(client, ctx)
+                        cache.clear()
+                        reset_queries()
+                        with CaptureQueriesContext(connection) as queries:
+                            response = request(client, ctx)
+                    results[name] = {
+                        'status': response.status_code,
+                        # Savepoints only exist because the fixture's transaction wraps the request
+                        'queries': [
+                            query['sql'] for query in queries.captured_queries
+                            if not query['sql'].startswith(TRANSACTION_CONTROL)
+                        ],
+                    }
+                raise _Rollback
+        except _Rollback:
+            pass
+    cache.clear()
+    return results
+
+
+def evaluate(small, large, budgets):
+    """
+    Compare measurements against the budgets. Returns a list of
+    (url name, budget, small count, large count, problems) rows.
+    """
+    rows = []
+    for name, result in large.items():
+        budget = budgets.get(name)
+        before = len(small[name]['queries']) if name in small else None
+        after = len(result['queries'])
+        problems = []
+        if result['status'] >= 400:
+            problems.append(f'returned {result["status"]}')
+        if budget is not None and max(after, before or 0) > budget:
+            problems.append(f'over budget of {budget}')
+        if before is not None and after > before:
+            problems.append(f'grows with data ({before} -> {after})')
+        rows.append((name, budget, before, after, problems))
+    return rows
+
+
+def repeated(queries, threshold=2):
+    """Fingerprints run at least threshold times, most repeated first"""
+    counts = Counter(fingerprint(sql) for sql in queries)
+    return [(sql, n) for sql, n in counts.most_common() if n >= threshold]
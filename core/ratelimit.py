@@ -0,0 +1,181 @@
+"""
+Rate limiting shared by every worker process. Hits are counted per fixed
+window in a backend all workers can see (the database by default), and each
+request is judged against a sliding window weighted from the current and
+previous window's counts.
+"""
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import F
+from django.utils.module_loading import import_string
+
+
+class RateLimitBackend:
+    """Storage for per-window hit counts"""
+
+    def incr(self, key, window_start, window):
+        """Count a hit in the window starting at window_start and return (current, previous) counts"""
+        raise NotImplementedError
+
+    def counts(self, key, window_start, window):
+        """Return (current, previous) counts without counting a hit"""
+        raise NotImplementedError
+
+    def reset(self, key):
+        raise NotImplementedError
+
+
+class DatabaseBackend(RateLimitBackend):
+    """
+    Counters in the rate_limit_counters table. On PostgreSQL and SQLite 3.35+
+    a hit is one upsert that returns this hit's count and the previous
+    window's; elsewhere it is an UPDATE (or INSERT) and a read in one
+    transaction. Either way concurrent workers never lose a hit and each hit
+    sees exactly its own position.
+    """
+
+    def incr(self, key, window_start, window):
+        from .models import RateLimitCounter
+
+        conn = connections[router.db_for_write(RateLimitCounter)]
+        if conn.vendor == 'postgresql' or (conn.vendor == 'sqlite' and conn.Database.sqlite_version_info >= (3, 35)):
+            counts = self._upsert(conn, key, window_start, window)
+            opened = counts[0] == 1
+        else:
+            counts, opened = self._update_or_create(key, window_start, window)
+        if opened:
+            # Once per key and window: drop counters nobody will read again
+            RateLimitCounter.objects.filter(expires_at__lt=int(time.time())).delete()
+        return counts
+
+    def _upsert(self, conn, key, window_start, window):
+        from .models import RateLimitCounter
+
+        table = conn.ops.quote_name(RateLimitCounter._meta.db_table)
+        key_column, count = conn.ops.quote_name('key'), conn.ops.quote_name('count')
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({key_column}, window_start, {count}, expires_at) VALUES (%s, %s, 1, %s) '
+                f'ON CONFLICT ({key_column}, window_start) DO UPDATE SET {count} = {table}.{count} + 1 '
+                f'RETURNING {count}, (SELECT previous.{count} FROM {table} AS previous '
+                f'WHERE previous.{key_column} = %s AND previous.window_start = %s)',
+                [key, window_start, window_start + 2 * window, key, window_start - window],
+            )
+            current, previous = cursor.fetchone()
+        return current, previous or 0
+
+    def _update_or_create(self, key, window_start, window):
+        from .models import RateLimitCounter
+
+        counter = RateLimitCounter.objects.filter(key=key, window_start=window_start)
+        opened = False
+        with transaction.atomic():
+            if not counter.update(count=F('count') + 1):
+                try:
+                    with transaction.atomic():
+                        RateLimitCounter.objects.create(
+                            key=key, window_start=window_start, count=1, expires_at=window_start + 2 * window,
+                        )
+                except IntegrityError:
+                    # Another worker opened the window first
+                    counter.update(count=F('count') + 1)
+                else:
+                    opened = True
+            # The updated row stays locked until commit, so no other hit lands in between
+            counts = self.counts(key, window_start, window)
+        return counts, opened
+
+    def counts(self, key, window_start, window):
+        from .models import RateLimitCounter
+
+        rows = dict(RateLimitCounter.objects.filter(
+            key=key, window_start__in=[window_start, window_start - window],
+        ).values_list('window_start', 'count'))
+        return rows.get(window_start, 0), rows.get(window_start - window, 0)
+
+    def reset(self, key):
+        from .models import RateLimitCounter
+
+        RateLimitCounter.objects.filter(key=key).delete()
+
+
+class CacheBackend(RateLimitBackend):
+    """
+    Counters in the default cache. Only shared between workers when the cache
+    itself is shared (Redis, Memcached or the database cache, not LocMemCache).
+    """
+
+    def _key(self, key, window_start):
+        return f'ratelimit:{key}:{window_start}'
+
+    def incr(self, key, window_start, window):
+        cache_key = self._key(key, window_start)
+        if not cache.add(cache_key, 1, 2 * window):
+            try:
+                cache.incr(cache_key)
+            except ValueError:
+                # Expired between add and incr
+                cache.set(cache_key, 1, 2 * window)
+        return self.counts(key, window_start, window)
+
+    def counts(self, key, window_start, window):
+        current_key = self._key(key, window_start)
+        previous_key = self._key(key, window_start - window)
+        values = cache.get_many([current_key, previous_key])
+        return values.get(current_key, 0), values.get(previous_key, 0)
+
+    def reset(self, key):
+        # Windows are aligned to multiples of their length, so clear the
+        # current and previous window of every configured limit
+        now = int(time.time())
+        keys = []
+        for _, window in settings.RATE_LIMITS.values():
+            window_start = now - now % window
+            keys += [self._key(key, window_start), self._key(key, window_start - window)]
+        cache.delete_many(keys)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(getattr(settings, 'RATE_LIMIT_BACKEND', 'core.ratelimit.DatabaseBackend'))()
+
+
+def _estimate(current, previous, window, elapsed):
+    """Sliding-window count: all of this window plus the overlapping share of the last"""
+    return current + previous * (window - elapsed) / window
+
+
+def _window(window):
+    now = time.time()
+    window_start = int(now) - int(now) % window
+    return window_start, now - window_start
+
+
+def hit(key, limit, window):
+    """
+    Count a hit against key and return (allowed, retry_after_seconds). Hits
+    over the limit are counted too, so a client that keeps retrying stays
+    blocked until it backs off.
+    """
+    window_start, elapsed = _window(window)
+    current, previous = get_backend().incr(key, window_start, window)
+    if _estimate(current, previous, window, elapsed) <= limit:
+        return True, 0
+    return False, max(int(window - elapsed), 1)
+
+
+def is_limited(key, limit, window):
+    """Return (limited, retry_after_seconds) without counting a hit"""
+    window_start, elapsed = _window(window)
+    current, previous = get_backend().counts(key, window_start, window)
+    if _estimate(current, previous, window, elapsed) < limit:
+        return False, 0
+    return True, max(int(window - elapsed), 1)
+
+
+def reset(key):
+    get_backend().reset(key)
@@ -0,0 +1,210 @@
+"""
+Slow-query log. SlowQueryMiddleware times every statement through a
+connection execute_wrapper; statements slower than SLOW_QUERY_MS are
+recorded with their parameters, the view and the line of project code that
+ran them. A background thread captures an EXPLAIN plan on its own database
+connection, so the request does not wait for it, and writes the entry as one
+JSON line through the core.slow_queries logger, whose rotating file handler
+(logs/slow_queries.jsonl) is configured in LOGGING.
+"""
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from .logs import read_jsonl
+
+logger = logging.getLogger('core.slow_queries')
+
+QUEUE_SIZE = 100
+MAX_PARAM_LENGTH = 200
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\((?:\s*%s\s*,?)+\)|\((?:\s*\?\s*,?)+\)')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN lists collapsed, so repeats of one query group together"""
+    return _IN_LISTS.sub('(...)', _LITERALS.sub('?', sql))
+
+
+def fingerprint_id(sql):
+    return hashlib.sha1(fingerprint(sql).encode()).hexdigest()[:12]
+
+
+def _short(value):
+    text = repr(value)
+    return text if len(text) <= MAX_PARAM_LENGTH else text[:MAX_PARAM_LENGTH] + '...'
+
+
+def _caller():
+    """
+    'path:line in function' of the innermost project frame that ran the
+    statement. Frames below Django's _execute_with_wrappers are the execute
+    wrappers themselves (this one, metrics, timing) and are skipped.
+    """
+    base = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_name != '_execute_with_wrappers':
+        frame = frame.f_back
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base) and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, base)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryRecorder:
+    """connection.execute_wrapper hook for one request"""
+
+    def __init__(self, request, threshold_ms):
+        self.request = request
+        self.threshold = threshold_ms / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.record(sql, params, many, duration)
+
+    def record(self, sql, params, many, duration):
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 1),
+            'fingerprint': fingerprint_id(sql),
+            'sql': sql,
+            'params': None if many or params is None else (
+                {key: _short(value) for key, value in params.items()} if isinstance(params, dict)
+                else [_short(value) for value in params]
+            ),
+            'many': bool(many),
+            'view': match.view_name if match else None,
+            'method': self.request.method,
+            'path': self.request.path,
+            'caller': _caller(),
+        }
+        _worker.submit(entry, None if many else params)
+
+
+def explain(sql, params):
+    """EXPLAIN rows for a SELECT, or None for other statements"""
+    from django.db import connection
+
+    if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        # (id, parent, notused, detail)
+        return [str(row[-1]) for row in rows]
+    return [' '.join(str(column) for column in row) for row in rows]
+
+
+def write(entry):
+    logger.info(json.dumps(entry, default=str))
+
+
+class _ExplainWorker:
+    """One daemon thread per process, started on the first slow query (and again after a fork)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.queue = None
+
+    def submit(self, entry, params):
+        if self.pid != os.getpid():
+            self._start()
+        try:
+            self.queue.put_nowait((entry, params))
+        except queue.Full:
+            entry['plan_error'] = 'EXPLAIN queue full'
+            write(entry)
+
+    def _start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+            threading.Thread(target=self._run, args=(self.queue,), name='slow-query-explain', daemon=True).start()
+            self.pid = os.getpid()
+
+    @staticmethod
+    def _run(jobs):
+        from django.db import close_old_connections
+
+        while True:
+            entry, params = jobs.get()
+            try:
+                entry['plan'] = explain(entry['sql'], params)
+            except Exception as e:
+                entry['plan_error'] = str(e)[:500]
+            finally:
+                close_old_connections()
+            write(entry)
+
+
+_worker = _ExplainWorker()
+
+
+def read_entries():
+    return read_jsonl(logger)
+
+
+def summary(entries=None, limit=100):
+    """
+    Entries grouped by fingerprint, most total time first. Each group keeps
+    its slowest entry as the example, with the newest plan captured for it.
+    """
+    groups = {}
+    for entry in entries if entries is not None else read_entries():
+        group = groups.get(entry['fingerprint'])
+        if group is None:
+            group = groups[entry['fingerprint']] = {
+                'fingerprint': entry['fingerprint'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'last_seen': entry['time'],
+                'views': Counter(),
+                'callers': Counter(),
+                'example': entry,
+                'plan': None,
+            }
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['last_seen'] = max(group['last_seen'], entry['time'])
+        group['views'][entry.get('view') or entry.get('path')] += 1
+        if entry.get('caller'):
+            group['callers'][entry['caller']] += 1
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['example'] = entry
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+
+    result = sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)[:limit]
+    for group in result:
+        group['sql'] = fingerprint(group['example']['sql'])
+        group['last_seen'] = datetime.fromisoformat(group['last_seen'])
+        group['total_ms'] = round(group['total_ms'], 1)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 1)
+        group['views'] = group['views'].most_common(3)
+        group['callers'] = group['callers'].most_common(3)
+    return result
@@ -0,0 +1,464 @@
+"""
+Synthetic restaurant data for load and scale testing. Everything is drawn
+from one seeded generator, so the same arguments always produce the same
+dataset, and rows are written with bulk_create in large batches.
+
+Synthetic rows are tagged (SY/SYN prefixes, @synthetic.test emails, the
+'synthetic' user) so flush() can remove them without touching real data.
+"""
+import math
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+TAG = 'Synthetic data'
+USERNAME = 'synthetic'
+EMAIL_DOMAIN = 'synthetic.test'
+
+CATEGORIES = [
+    # name, share of menu, price range (Rs.)
+    ('Starters', 0.18, (600, 1500)),
+    ('Mains', 0.24, (1400, 3500)),
+    ('Seafood', 0.16, (2000, 5500)),
+    ('Rice & Noodles', 0.14, (1100, 2400)),
+    ('Desserts', 0.10, (500, 1200)),
+    ('Beverages', 0.18, (300, 1200)),
+]
+
+DISH_STYLES = ['Devilled', 'Grilled', 'Garlic', 'Butter', 'Curried', 'Spicy', 'Lemon', 'Crispy', 'Tandoori', 'Coconut']
+DISH_BASES = ['Chicken', 'Prawns', 'Fish', 'Beef', 'Vegetable', 'Cuttlefish', 'Crab', 'Paneer', 'Mushroom', 'Pork']
+
+INGREDIENTS = [
+    # name, unit, cost range per unit (Rs.)
+    ('Chicken', 'kg', (1200, 1800)), ('Prawns', 'kg', (2500, 4500)), ('Fish Fillet', 'kg', (1800, 3200)),
+    ('Beef', 'kg', (2000, 2800)), ('Cuttlefish', 'kg', (1600, 2600)), ('Crab', 'kg', (2800, 4000)),
+    ('Rice', 'kg', (180, 320)), ('Noodles', 'kg', (400, 700)), ('Flour', 'kg', (150, 260)),
+    ('Onion', 'kg', (250, 450)), ('Garlic', 'kg', (600, 1100)), ('Tomato', 'kg', (300, 600)),
+    ('Potato', 'kg', (200, 380)), ('Butter', 'kg', (2400, 3200)), ('Cheese', 'kg', (3000, 4200)),
+    ('Coconut Milk', 'l', (500, 800)), ('Cooking Oil', 'l', (700, 1000)), ('Milk', 'l', (350, 500)),
+    ('Soy Sauce', 'l', (600, 900)), ('Fresh Juice Base', 'l', (400, 900)),
+    ('Eggs', 'pcs', (40, 60)), ('Lime', 'pcs', (15, 30)), ('Bread Roll', 'pcs', (40, 80)),
+    ('Ice Cream Scoop', 'pcs', (90, 160)), ('Soda Can', 'pcs', (120, 200)),
+]
+
+# Relative order volume Monday..Sunday
+WEEKDAY_FACTOR = [0.80, 0.85, 0.90, 1.00, 1.25, 1.45, 1.30]
+
+# Arrival-time mixture: (share, mean hour, sd hours); the remainder is spread over opening hours
+RUSH_HOURS = [(0.35, 12.75, 0.75), (0.50, 19.5, 1.1)]
+OPENING_HOURS = (10.0, 23.0)
+
+ORDER_TYPES = ['dine_in', 'takeaway', 'delivery']
+ORDER_TYPE_SHARE = [0.70, 0.20, 0.10]
+PAYMENT_METHODS = ['cash', 'card', 'mobile']
+PAYMENT_SHARE = [0.45, 0.40, 0.15]
+CANCEL_RATE = 0.03
+OPENING_STOCK_DAYS = 14  # Days of expected usage on hand when the history starts
+CUSTOMER_RATE = 0.40
+
+
+def exists():
+    from menu.models import MenuItem
+    return MenuItem.objects.filter(reference_number__startswith='SY').exists()
+
+
+def flush():
+    """Delete all synthetic rows; returns the number of rows deleted"""
+    from customers.models import Customer
+    from inventory.models import StockItem, StockLocation, StockMovement, Vendor
+    from menu.models import Category, MenuItem
+    from orders.models import Order
+    from tables.models import Table
+
+    deleted = 0
+    with transaction.atomic():
+        # Orders first, taking their items, bills and payments with them
+        deleted += Order.objects.filter(order_number__startswith='SYN').delete()[0]
+        deleted += StockMovement.objects.filter(reference__startswith='SYN').delete()[0]
+        deleted += MenuItem.objects.filter(reference_number__startswith='SY').delete()[0]
+        deleted += Category.objects.filter(description=TAG).delete()[0]
+        deleted += StockItem.objects.filter(sku__startswith='SYN-').delete()[0]
+        deleted += StockLocation.objects.filter(description=TAG).delete()[0]
+        deleted += Vendor.objects.filter(address=TAG).delete()[0]
+        deleted += Customer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()[0]
+        deleted += Table.objects.filter(table_number__startswith='SY').delete()[0]
+    return deleted
+
+
+class Generator:
+    """
+    Build a synthetic restaurant: call setup() for the catalogue, then
+    orders() for the trading history. Counts of created rows are kept in
+    self.created.
+    """
+
+    def __init__(self, seed=42, tables=30, menu_items=120, customers=5000, stock_items=60,
+                 days=90, orders_per_day=300, end_date=None, batch_size=5000, progress=None):
+        import numpy as np
+
+        self.rng = np.random.default_rng(seed)
+        self.tables = tables
+        self.menu_items = menu_items
+        self.customers = customers
+        self.stock_items = stock_items
+        self.days = days
+        self.orders_per_day = orders_per_day
+        self.end_date = end_date or timezone.localdate() - timedelta(days=1)
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+        self.created = {}
+
+    def _count(self, name, rows):
+        self.created[name] = self.created.get(name, 0) + len(rows)
+
+    def _bulk(self, model, rows, name):
+        model.objects.bulk_create(rows, batch_size=self.batch_size)
+        self._count(name, rows)
+        return rows
+
+    # Catalogue
+
+    def setup(self):
+        import numpy as np
+        from django.contrib.auth import get_user_model
+        from customers.models import Customer
+        from inventory.models import Recipe, StockItem, StockLocation, Vendor
+        from menu.models import Category, MenuItem
+        from tables.models import Table
+
+        rng = self.rng
+
+        self.user, _ = get_user_model().objects.get_or_create(
+            username=USERNAME, defaults={'first_name': 'Synthetic', 'role': 'waiter', 'is_active': False},
+        )
+
+        self.table_ids = [t.id for t in self._bulk(Table, [
+            Table(table_number=f'SY{i + 1:02d}', capacity=int(rng.choice([2, 4, 4, 6, 8])), location=TAG)
+            for i in range(self.tables)
+        ], 'tables')]
+
+        self.location = StockLocation.objects.create(name='Synthetic Store', description=TAG)
+        vendor = Vendor.objects.create(name='Synthetic Supplies', phone='0000000000', address=TAG)
+
+        # Stock items: cycle through the ingredient list, numbering repeats
+        stock = []
+        for i in range(self.stock_items):
+            name, unit, (low, high) = INGREDIENTS[i % len(INGREDIENTS)]
+            if i >= len(INGREDIENTS):
+                name = f'{name} {i // len(INGREDIENTS) + 1}'
+            stock.append(StockItem(
+                name=name, sku=f'SYN-{i + 1:04d}', category='Synthetic', unit=unit,
+                min_quantity=0, unit_cost=Decimal(int(rng.uniform(low, high))),
+                location=self.location, vendor=vendor,
+            ))
+        self.stock = self._bulk(StockItem, stock, 'stock items')
+        stock_cost = np.array([float(item.unit_cost) for item in self.stock])
+        stock_unit = [item.unit for item in self.stock]
+
+        # Menu: categories in proportion, popularity following a Zipf-like curve
+        categories = self._bulk(Category, [
+            Category(name=name, description=TAG, display_order=i) for i, (name, _, _) in enumerate(CATEGORIES)
+        ], 'categories')
+        items = []
+        seen = set()
+        for i in range(self.menu_items):
+            c = int(rng.choice(len(CATEGORIES), p=[share for _, share, _ in CATEGORIES]))
+            low, high = CATEGORIES[c][2]
+            name = f'{rng.choice(DISH_STYLES)} {rng.choice(DISH_BASES)}'
+            if name in seen:
+                name = f'{name} {i + 1}'
+            seen.add(name)
+            items.append(MenuItem(
+                category=categories[c], reference_number=f'SY{i + 1:04d}', name=name,
+                price=Decimal(int(round(rng.uniform(low, high), -1))),
+                is_vegetarian=bool(rng.random() < 0.25), is_spicy=bool(rng.random() < 0.35),
+                preparation_time=int(rng.integers(5, 30)),
+            ))
+        self.menu = self._bulk(MenuItem, items, 'menu items')
+        self.menu_price = [item.price for item in self.menu]
+
+        ranks = rng.permutation(self.menu_items) + 1
+        popularity = 1 / ranks ** 1.1
+        self.popularity = popularity / popularity.sum()
+
+        # Recipes: 2-5 ingredients, scaled so food cost is 22-38% of the price
+        self.recipe_matrix = np.zeros((self.menu_items, self.stock_items))
+        recipes = []
+        for m, item in enumerate(self.menu):
+            chosen = rng.choice(self.stock_items, size=min(int(rng.integers(2, 6)), self.stock_items), replace=False)
+            raw = np.array([rng.uniform(1, 3) if stock_unit[s] == 'pcs' else rng.uniform(0.05, 0.4) for s in chosen])
+            target = float(item.price) * rng.uniform(0.22, 0.38)
+            raw *= target / (raw * stock_cost[chosen]).sum()
+            for s, quantity in zip(chosen, raw):
+                quantity = max(round(float(quantity), 2), 0.01)
+                self.recipe_matrix[m, s] = quantity
+                recipes.append(Recipe(menu_item=item, stock_item=self.stock[s], quantity_required=Decimal(str(quantity))))
+        self._bulk(Recipe, recipes, 'recipes')
+
+        # Customers: a few regulars account for most visits
+        customers = [
+            Customer(
+                first_name=f'Guest{i + 1}', last_name='Synthetic', phone=f'+9470{i + 1:08d}',
+                email=f'guest{i + 1}@{EMAIL_DOMAIN}',
+            )
+            for i in range(self.customers)
+        ]
+        self.customer_ids = [c.id for c in self._bulk(Customer, customers, 'customers')]
+        weights = 1 / (np.arange(self.customers) + 1) ** 0.8
+        self.customer_weights = weights / weights.sum()
+
+    # Trading history
+
+    def _arrival_seconds(self, n):
+        import numpy as np
+
+        rng = self.rng
+        seconds = rng.uniform(OPENING_HOURS[0], OPENING_HOURS[1], n)
+        pick = rng.random(n)
+        edge = 0.0
+        for share, mean, sd in RUSH_HOURS:
+            mask = (pick >= edge) & (pick < edge + share)
+            seconds[mask] = rng.normal(mean, sd, mask.sum())
+            edge += share
+        return np.sort(np.clip(seconds, *OPENING_HOURS) * 3600).astype(int)
+
+    def _insert(self, model, names, rows, name):
+        """
+        INSERT tuples of the named fields with executemany; every other field
+        gets its default. Skips bulk_create's per-object SQL compilation,
+        which dominates at millions of rows, and its pre_save, so auto_now
+        timestamps keep the generated values.
+        """
+        if not rows:
+            return
+        conn = connections[DEFAULT_DB_ALIAS]
+        named = [model._meta.get_field(name) for name in names]
+        rest = [
+            field for field in model._meta.concrete_fields
+            if field not in named and not field.primary_key
+        ]
+        defaults = [field.get_db_prep_save(field.get_default(), conn) for field in rest]
+        columns = ', '.join(conn.ops.quote_name(field.column) for field in named + rest)
+        sql = (
+            f'INSERT INTO {conn.ops.quote_name(model._meta.db_table)} ({columns}) '
+            f'VALUES ({", ".join(["%s"] * (len(named) + len(rest)))})'
+        )
+        # Ids, text and flags go to the driver as they are; only decimals and
+        # datetimes need the backend's conversion
+        converted = [
+            (i, field.get_db_prep_save) for i, field in enumerate(named)
+            if field.get_internal_type() in ('DecimalField', 'DateTimeField', 'DateField')
+        ]
+        with conn.cursor() as cursor:
+            for start in range(0, len(rows), self.batch_size):
+                params = []
+                for row in rows[start:start + self.batch_size]:
+                    values = list(row)
+                    for i, prep in converted:
+                        values[i] = prep(values[i], conn)
+                    params.append(values + defaults)
+                cursor.executemany(sql, params)
+        self._count(name, rows)
+
+
+    def orders(self):
+        import numpy as np
+        from django.db.models import Max
+        from orders.models import Order
+
+        rng = self.rng
+        service_rate = Decimal(str(settings.SERVICE_CHARGE_RATE))
+        cent = Decimal('0.01')
+        zero = Decimal('0')
+        start_date = self.end_date - timedelta(days=self.days - 1)
+        tz = timezone.get_current_timezone()
+        user_id = self.user.id
+        menu_ids = [item.id for item in self.menu]
+
+        # Ids are assigned here so order items can reference them without a round trip
+        next_id = (Order.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+        # Expected daily usage drives purchase sizes and reorder levels
+        items_per_order = sum(
+            share * (1 + mean) for share, mean in zip(ORDER_TYPE_SHARE, [2.2, 1.2, 1.2])
+        ) * 1.18
+        expected_usage = self.orders_per_day * items_per_order * (self.popularity @ self.recipe_matrix)
+
+        # Stock is tracked in whole hundredths, exactly as the ledger stores it,
+        # so current_quantity always equals the sum of the movements written
+        batch = {'orders': [], 'items': [], 'bills': [], 'payments': [], 'movements': []}
+        on_hand = self._cents(expected_usage * OPENING_STOCK_DAYS)
+        first_opening = datetime.combine(start_date, time.min, tzinfo=tz)
+        self._movements(batch['movements'], 'adjustment', on_hand, first_opening, 'SYN-OPENING')
+        for day_index in range(self.days):
+            day = start_date + timedelta(days=day_index)
+            opening = datetime.combine(day, time.min, tzinfo=tz)
+            season = 1 + 0.1 * math.sin(2 * math.pi * day.timetuple().tm_yday / 365)
+            volume = self.orders_per_day * WEEKDAY_FACTOR[day.weekday()] * season * rng.lognormal(0, 0.1)
+            n = int(rng.poisson(volume))
+
+            arrivals = self._arrival_seconds(n)
+            types = rng.choice(3, size=n, p=ORDER_TYPE_SHARE)
+            sizes = 1 + rng.poisson(np.where(types == 0, 2.2, 1.2))
+            menu_idx = rng.choice(self.menu_items, size=int(sizes.sum()), p=self.popularity)
+            quantities = rng.choice([1, 2, 3], size=len(menu_idx), p=[0.85, 0.12, 0.03])
+            cancelled = rng.random(n) < CANCEL_RATE
+            has_customer = rng.random(n) < CUSTOMER_RATE
+            customers = rng.choice(self.customers, size=n, p=self.customer_weights) if self.customers else None
+            tables = rng.integers(0, max(self.tables, 1), size=n)
+            methods = rng.choice(3, size=n, p=PAYMENT_SHARE)
+            durations = rng.integers(20 * 60, 90 * 60, size=n)
+
+            offset = 0
+            for i in range(n):
+                order_id = next_id
+                next_id += 1
+                created = opening + timedelta(seconds=int(arrivals[i]))
+                completed = None if cancelled[i] else created + timedelta(seconds=int(durations[i]))
+                number = f'{day:%y%m%d}{i + 1:05d}'
+
+                subtotal = zero
+                for m, quantity in zip(menu_idx[offset:offset + sizes[i]].tolist(), quantities[offset:offset + sizes[i]].tolist()):
+                    price = self.menu_price[m]
+                    line = price * quantity
+                    subtotal += line
+                    batch['items'].append((order_id, menu_ids[m], quantity, price, line, created))
+                offset += sizes[i]
+                service = (subtotal * service_rate).quantize(cent)
+                total = subtotal + service
+
+                order_type = ORDER_TYPES[types[i]]
+                batch['orders'].append((
+                    order_id, f'SYN{number}', order_type, 'cancelled' if cancelled[i] else 'completed',
+                    self.table_ids[tables[i]] if order_type == 'dine_in' and self.table_ids else None,
+                    self.customer_ids[customers[i]] if has_customer[i] and self.customers else None,
+                    user_id, subtotal, service, total,
+                    '1 Beach Road, Hikkaduwa' if order_type == 'delivery' else '',
+                    created, completed or created, completed,
+                ))
+                if completed:
+                    batch['bills'].append((
+                        f'SYB{number}', order_id, subtotal, zero, service, total, total, True, True, user_id, completed, completed,
+                    ))
+                    batch['payments'].append((
+                        f'SYP{number}', order_id, PAYMENT_METHODS[methods[i]], total, 'completed', user_id, completed, completed,
+                    ))
+
+            # Stock: one sale movement per ingredient per day, weekly deliveries and waste
+            sold_lines = ~np.repeat(cancelled, sizes)
+            usage = self._cents(
+                np.bincount(menu_idx[sold_lines], weights=quantities[sold_lines], minlength=self.menu_items) @ self.recipe_matrix
+            )
+            closing = opening + timedelta(hours=23, minutes=30)
+            reference = f'SYN-{day:%Y%m%d}'
+            if day.weekday() == 0:
+                delivery = self._cents(expected_usage * 7 * 1.15)
+                self._movements(batch['movements'], 'purchase', delivery, opening + timedelta(hours=8), reference)
+                on_hand += delivery
+            self._movements(batch['movements'], 'sale', usage, closing, reference)
+            on_hand -= usage
+            if day.weekday() == 6:
+                waste = self._cents(expected_usage * 7 * 0.02)
+                self._movements(batch['movements'], 'waste', waste, closing, reference)
+                on_hand -= waste
+            # Sold more than was on hand: book the shortfall as a count correction
+            shortfall = np.maximum(-on_hand, 0)
+            self._movements(batch['movements'], 'adjustment', shortfall, closing + timedelta(minutes=15), reference)
+            on_hand += shortfall
+
+            if len(batch['orders']) >= self.batch_size or day_index + 1 == self.days:
+                self._flush(batch)
+            if (day_index + 1) % 30 == 0 or day_index + 1 == self.days:
+                self.progress(f'{day_index + 1}/{self.days} days, {self.created.get("orders", 0):,} orders')
+
+        self._reset_sequences()
+        self._finish(on_hand, expected_usage)
+
+    @staticmethod
+    def _cents(quantities):
+        import numpy as np
+        return np.rint(quantities * 100).astype(np.int64)
+
+    def _movements(self, rows, movement_type, cents, created, reference):
+        """One movement per stock item with a non-zero quantity, given in hundredths"""
+        import numpy as np
+        from inventory.models import StockMovement
+
+        inbound = movement_type in StockMovement.INBOUND_TYPES
+        for s in np.nonzero(cents > 0)[0].tolist():
+            item = self.stock[s]
+            rows.append((
+                item.id, movement_type, Decimal(int(cents[s])).scaleb(-2), item.unit_cost,
+                None if inbound else self.location.id, self.location.id if inbound else None,
+                reference, self.user.id, created,
+            ))
+
+    @transaction.atomic
+    def _flush(self, batch):
+        from billing.models import Bill, Payment
+        from inventory.models import StockMovement
+        from orders.models import Order, OrderItem
+
+        self._insert(Order, [
+            'id', 'order_number', 'order_type', 'status', 'table', 'customer', 'created_by',
+            'subtotal', 'service_charge', 'total', 'delivery_address', 'created_at', 'updated_at', 'completed_at',
+        ], batch['orders'], 'orders')
+        self._insert(OrderItem, ['order', 'menu_item', 'quantity', 'unit_price', 'total_price', 'created_at'], batch['items'], 'order items')
+        self._insert(Bill, [
+            'bill_number', 'order', 'subtotal', 'tax_amount', 'service_charge', 'total_amount', 'paid_amount',
+            'is_paid', 'is_printed', 'created_by', 'created_at', 'paid_at',
+        ], batch['bills'], 'bills')
+        self._insert(Payment, [
+            'payment_number', 'order', 'payment_method', 'amount', 'status', 'processed_by', 'created_at', 'completed_at',
+        ], batch['payments'], 'payments')
+        self._insert(StockMovement, [
+            'stock_item', 'movement_type', 'quantity', 'unit_cost', 'from_location', 'to_location',
+            'reference', 'created_by', 'created_at',
+        ], batch['movements'], 'stock movements')
+        for rows in batch.values():
+            rows.clear()
+
+    def _reset_sequences(self):
+        """Move PostgreSQL sequences past the ids assigned in orders(); a no-op on SQLite"""
+        from django.core.management.color import no_style
+        from orders.models import Order
+
+        conn = connections[DEFAULT_DB_ALIAS]
+        statements = conn.ops.sequence_reset_sql(no_style(), [Order])
+        if statements:
+            with conn.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def _finish(self, on_hand, expected_usage):
+        """Closing stock, reorder levels, cached menu costs and customer totals"""
+        from django.db.models import Count, DecimalField, Max, OuterRef, Subquery, Sum
+        from django.db.models.functions import Coalesce
+        from customers.models import Customer
+        from inventory.models import StockItem, StockLevel
+        from menu.availability import recompute_sellable
+        from menu.costing import recompute_menu_costs
+        from orders.models import Order
+
+        for s, item in enumerate(self.stock):
+            item.current_quantity = Decimal(int(on_hand[s])).scaleb(-2)
+            item.min_quantity = Decimal(str(round(float(expected_usage[s] * 5), 2)))
+        StockItem.objects.bulk_update(self.stock, ['current_quantity', 'min_quantity'], batch_size=self.batch_size)
+        self._bulk(StockLevel, [
+            StockLevel(stock_item=item, location=self.location, quantity=item.current_quantity) for item in self.stock
+        ], 'stock levels')
+
+        menu_ids = [item.id for item in self.menu]
+        recompute_menu_costs(menu_ids)
+        recompute_sellable(menu_ids)
+
+        visits = Order.objects.filter(customer=OuterRef('pk'), status='completed').order_by().values('customer')
+        Customer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').update(
+            visit_count=Coalesce(Subquery(visits.annotate(n=Count('id')).values('n')), 0),
+            total_spent=Coalesce(Subquery(visits.annotate(s=Sum('total')).values('s')), Decimal('0'),
+                                 output_field=DecimalField()),
+            last_visit=Subquery(visits.annotate(last=Max('created_at')).values('last')),
+        )
@@ -0,0 +1,56 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from menu.models import Category, MenuItem
+from orders.models import Order
+from tables.models import Table
+
+
+class AddOrderItemTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='waiter', password=None)
+        self.client.force_login(self.user)
+        self.table = Table.objects.create(table_number='T1', capacity=4)
+        category = Category.objects.create(name='Mains')
+        self.curry = MenuItem.objects.create(category=category, reference_number='M1', name='Curry', price=Decimal('1000'))
+        self.rice = MenuItem.objects.create(category=category, reference_number='M2', name='Rice', price=Decimal('500'))
+
+    def add(self, menu_item, quantity=1, table=None):
+        return self.client.post(
+            reverse('core:add_order_item', kwargs={'table_id': (table or self.table).id}),
+            json.dumps({'menu_item_id': menu_item.id, 'quantity': quantity}),
+            content_type='application/json', secure=True,
+        )
+
+    def test_first_item_opens_an_order(self):
+        response = self.add(self.curry, 2)
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(table=self.table)
+        self.assertEqual(order.subtotal, Decimal('2000'))
+        self.table.refresh_from_db()
+        self.assertEqual(self.table.status, 'occupied')
+
+    def test_repeated_item_adds_to_its_line_and_totals_every_line(self):
+        self.add(self.curry)
+        self.add(self.rice)
+        response = self.add(self.curry, 2)
+
+        self.assertEqual(response.json()['quantity'], 3)
+        order = Order.objects.get(table=self.table)
+        self.assertEqual(order.items.count(), 2)
+        self.assertEqual(order.subtotal, Decimal('3500'))
+        self.assertEqual(response.json()['subtotal'], 3500.0)
+
+    def test_inactive_table_is_not_found(self):
+        self.add(self.curry)
+        Table.objects.filter(id=self.table.id).update(is_active=False)
+
+        response = self.add(self.curry)
+
+        self.assertNotEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.get(table=self.table).items.get().quantity, 1)
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import benchmarks
+from core.querybudget import build_fixture
+from orders.models import Order
+
+
+# The pages need static files, which the manifest storage only has after collectstatic
+@override_settings(STORAGES={
+    **settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class BenchmarkRunTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_fixture('small')
+
+    def test_every_scenario_succeeds_and_leaves_no_trace(self):
+        orders = Order.objects.count()
+
+        results = benchmarks.run(repeat=2, warmup=0)
+
+        self.assertEqual(sorted(results), sorted(name for name, _, _ in benchmarks.scenarios()))
+        for name, stats in results.items():
+            with self.subTest(scenario=name):
+                self.assertLess(stats['status'], 400)
+                self.assertEqual(stats['samples'], 2)
+                self.assertGreater(stats['queries'], 0)
+        self.assertEqual(Order.objects.count(), orders)
+
+    def test_only_limits_the_scenarios(self):
+        results = benchmarks.run(repeat=1, warmup=0, only=['sales_report'])
+
+        self.assertEqual(sorted(results), sorted(f'sales_report_{name}' for name in benchmarks.REPORT_RANGES))
+
+
+class CompareTests(SimpleTestCase):
+    def test_reports_percentage_and_query_changes(self):
+        previous = {'dashboard': {'p50_ms': 10, 'p95_ms': 0, 'queries': 12}}
+        current = {
+            'dashboard': {'p50_ms': 12.5, 'p95_ms': 20, 'queries': 9},
+            'inventory_list': {'p50_ms': 5, 'p95_ms': 8, 'queries': 4},
+        }
+
+        self.assertEqual(
+            benchmarks.compare(current, previous),
+            {'dashboard': {'p50_ms': 25.0, 'p95_ms': None, 'queries': -3}},
+        )
@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.backends import user_cache_key
+from core.checks import check_shared_cache
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'}}
+CACHED = {
+    'AUTHENTICATION_BACKENDS': ['core.backends.CachedModelBackend'],
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+}
+
+
+class SharedCacheCheckTests(TestCase):
+    @override_settings(CACHES=LOCMEM, **CACHED)
+    def test_cached_auth_and_sessions_need_a_shared_cache(self):
+        self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001', 'core.E002'])
+
+    @override_settings(CACHES=REDIS, **CACHED)
+    def test_shared_cache_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+    @override_settings(
+        CACHES=LOCMEM, AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+    )
+    def test_uncached_fallback_passes(self):
+        self.assertEqual(check_shared_cache(None), [])
+
+
+class CachedUserInvalidationTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='cashier', password=None)
+        self.key = user_cache_key(self.user.pk)
+        cache.set(self.key, self.user)
+        self.addCleanup(cache.clear)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.user.first_name = 'Nimal'
+        self.user.save()
+
+        self.assertIsNone(cache.get(self.key))
+
+    def test_logging_out_drops_the_cached_copy(self):
+        self.client.force_login(self.user)
+        cache.set(self.key, self.user)
+
+        self.client.logout()
+
+        self.assertIsNone(cache.get(self.key))
@@ -0,0 +1,99 @@
+import json
+import logging
+import tempfile
+import threading
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.logs import JSONFormatter, QueuedRotatingFileHandler, read_jsonl, set_request_id, reset_request_id
+
+
+class QueuedRotatingFileHandlerTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'test.log'
+        self.handler = QueuedRotatingFileHandler(self.path, queue_size=2)
+        self.handler.setFormatter(logging.Formatter('%(message)s'))
+        self.addCleanup(self.handler.close)
+
+    def log(self, message):
+        self.handler.handle(logging.makeLogRecord({'msg': message, 'levelno': logging.INFO}))
+
+    def test_drops_and_counts_records_when_the_queue_is_full(self):
+        writing, release = threading.Event(), threading.Event()
+
+        def stalled_emit(record, emit=self.handler.target.emit):
+            writing.set()
+            release.wait(5)
+            emit(record)
+        self.handler.target.emit = stalled_emit
+
+        self.log('first')
+        self.assertTrue(writing.wait(5))
+        for message in ('queued 1', 'queued 2', 'dropped 1', 'dropped 2'):
+            self.log(message)
+        self.assertEqual(self.handler.dropped, 2)
+
+        release.set()
+        self.handler.queue.join()
+        self.log('after')
+        self.handler.close()
+
+        self.assertEqual(self.path.read_text().splitlines(), [
+            'first', 'queued 1', 'queued 2', '2 log records dropped, log queue full', 'after',
+        ])
+        self.assertEqual(self.handler.dropped, 0)
+
+    def test_prepared_record_formats_with_request_id_and_extra_fields(self):
+        record = logging.makeLogRecord({'msg': 'paid %s', 'args': ('ORD-1',), 'levelno': logging.INFO,
+                                        'levelname': 'INFO', 'order_id': 7})
+        token = set_request_id('abc123')
+        try:
+            record = self.handler.prepare(record)
+        finally:
+            reset_request_id(token)
+
+        entry = json.loads(JSONFormatter().format(record))
+        self.assertEqual((entry['message'], entry['request_id'], entry['order_id']), ('paid ORD-1', 'abc123', 7))
+
+    def test_close_writes_what_is_still_queued(self):
+        for i in range(2):
+            self.log(f'record {i}')
+        self.handler.close()
+
+        self.assertEqual(self.path.read_text().splitlines(), ['record 0', 'record 1'])
+
+
+class ReadJsonlTests(SimpleTestCase):
+    def test_reads_rotated_backups_oldest_first(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'traces.jsonl'
+            for name, value in [('traces.jsonl.2', 1), ('traces.jsonl.1', 2), ('traces.jsonl', 3)]:
+                (Path(directory) / name).write_text(json.dumps({'n': value}) + '\nnot json\n')
+            logger = logging.getLogger('core.tests.read_jsonl')
+            handler = logging.FileHandler(path, delay=True)
+            logger.addHandler(handler)
+            try:
+                self.assertEqual([record['n'] for record in read_jsonl(logger)], [1, 2, 3])
+            finally:
+                logger.removeHandler(handler)
+
+
+class RequestIdMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cashier', password=None))
+        self.url = reverse('core:menu_availability')
+
+    def test_keeps_a_well_formed_incoming_id(self):
+        response = self.client.get(self.url, secure=True, HTTP_X_REQUEST_ID='lb-1234.abc')
+
+        self.assertEqual(response['X-Request-ID'], 'lb-1234.abc')
+
+    def test_replaces_a_malformed_id(self):
+        response = self.client.get(self.url, secure=True, HTTP_X_REQUEST_ID='bad id\n')
+
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
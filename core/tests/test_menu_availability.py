@@ -0,0 +1,50 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from menu.models import Category, MenuItem
+
+
+class MenuAvailabilityTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cashier', password=None))
+        self.url = reverse('core:menu_availability')
+        category = Category.objects.create(name='Mains')
+        self.item = MenuItem.objects.create(
+            category=category, reference_number='M1', name='Curry', price=Decimal('1000'),
+            availability_changed_at=timezone.now() - timedelta(hours=1),
+        )
+
+    def assertFullResponse(self, since):
+        response = self.client.get(self.url, {'since': since}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('now', response.json())
+        self.assertEqual([item['id'] for item in response.json()['items']], [self.item.id])
+
+    def test_out_of_range_since_gets_every_item(self):
+        self.assertFullResponse('2024-13-45T00:00')
+
+    def test_unparseable_since_gets_every_item(self):
+        self.assertFullResponse('yesterday')
+
+    def test_since_that_overflows_gets_every_item(self):
+        self.assertFullResponse('0001-01-01T00:00:00+00:00')
+
+    def test_oversized_year_gets_every_item(self):
+        self.assertFullResponse('99999999-01-01T00:00')
+
+    def test_valid_since(self):
+        response = self.client.get(self.url, {'since': timezone.now().isoformat()}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'], [])
+
+    def test_missing_since_gets_no_items(self):
+        response = self.client.get(self.url, secure=True)
+
+        self.assertEqual(response.json()['items'], [])
@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from orders.models import Order
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        self.url = reverse('core:metrics')
+
+    def scrape(self, **extra):
+        return self.client.get(self.url, secure=True, **extra)
+
+    def test_allowed_address_gets_the_exposition(self):
+        Order.objects.create(order_number='ORD-1', order_type='takeaway', status='pending')
+
+        response = self.scrape(REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'pos_active_orders{status="pending",table_status="none"} 1.0', response.content)
+
+    def test_other_addresses_are_forbidden(self):
+        # A forwarded header naming an allowed address does not count
+        response = self.scrape(REMOTE_ADDR='10.1.2.3', HTTP_X_FORWARDED_FOR='127.0.0.1')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_staff_users_are_allowed_from_anywhere(self):
+        self.client.force_login(get_user_model().objects.create_user(username='manager', password=None, is_staff=True))
+
+        self.assertEqual(self.scrape(REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.1.0.0/16'])
+    def test_allow_list_takes_networks(self):
+        self.assertEqual(self.scrape(REMOTE_ADDR='10.1.2.3').status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_not_found_when_disabled(self):
+        self.assertEqual(self.scrape(REMOTE_ADDR='127.0.0.1').status_code, 404)
+
+
+class BusinessCounterTests(TestCase):
+    def sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_created_orders_are_counted_by_type(self):
+        before = self.sample('pos_orders_created_total', {'order_type': 'delivery'})
+
+        order = Order.objects.create(order_number='ORD-1', order_type='delivery')
+        order.save()
+
+        self.assertEqual(self.sample('pos_orders_created_total', {'order_type': 'delivery'}), before + 1)
+
+    def test_requests_are_observed_by_url_name(self):
+        labels = {'view': 'core:metrics', 'method': 'GET', 'status': '2xx'}
+        before = self.sample('pos_request_duration_seconds_count', labels)
+
+        self.client.get(reverse('core:metrics'), secure=True, REMOTE_ADDR='127.0.0.1')
+
+        self.assertEqual(self.sample('pos_request_duration_seconds_count', labels), before + 1)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from core import perfaudit
+
+
+def results(*where):
+    return {'test:view': {'statements': [(f'SELECT 1 FROM "t" WHERE {clause}', [], False) for clause in where]}}
+
+
+class CheckIndexesTests(TestCase):
+    def messages(self, *where):
+        return [finding.message for finding in perfaudit.check_indexes(results(*where))]
+
+    def test_column_after_an_equality_filtered_leading_column_is_served(self):
+        messages = self.messages('("payments"."status" = %s AND "payments"."completed_at" >= %s)')
+
+        self.assertEqual(messages, ['Every foreign key and filtered column is served by an index'])
+
+    def test_column_in_a_partial_index_condition_is_served(self):
+        messages = self.messages('("stock_items"."current_quantity" <= ("stock_items"."min_quantity"))')
+
+        self.assertEqual(messages, ['Every foreign key and filtered column is served by an index'])
+
+    def test_range_without_the_leading_column_is_reported(self):
+        messages = self.messages('("payments"."completed_at" >= %s)')
+
+        self.assertEqual(len(messages), 1)
+        self.assertIn('No index on payments.completed_at', messages[0])
+
+    def test_negated_leading_column_does_not_serve(self):
+        messages = self.messages('(NOT ("payments"."status" = %s) AND "payments"."completed_at" >= %s)')
+
+        self.assertIn('No index on payments.completed_at', messages[0])
+
+    def test_small_tables_are_medium_priority(self):
+        findings = perfaudit.check_indexes(results('("payments"."completed_at" >= %s)'))
+
+        self.assertEqual(findings[0].priority, perfaudit.MEDIUM)
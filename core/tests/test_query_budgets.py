@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+
+from core import querybudget
+
+
+# The admin pages need static files, which the manifest storage only has after collectstatic
+@override_settings(STORAGES={
+    **settings.STORAGES, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class QueryBudgetTests(TestCase):
+    """Every view in QUERY_BUDGETS stays within its budget and does not grow with the data"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.small = querybudget.measure('small')
+        cls.large = querybudget.measure('large')
+
+    def test_every_budget_has_a_request(self):
+        self.assertEqual(sorted(settings.QUERY_BUDGETS), sorted(self.large))
+
+    def test_views_stay_within_budget(self):
+        rows = querybudget.evaluate(self.small, self.large, settings.QUERY_BUDGETS)
+        for name, budget, before, after, problems in rows:
+            with self.subTest(view=name):
+                self.assertEqual(problems, [], f'{name}: {before} / {after} queries, budget {budget}')
@@ -0,0 +1,41 @@
+from django.db import connection
+from django.test import TestCase
+
+INDEXES = {
+    # table: {index name: columns}
+    'orders': {
+        'order_table_status_idx': ['table_id', 'status'],
+        'order_status_created_idx': ['status', 'created_at'],
+        'order_created_idx': ['created_at'],
+    },
+    'payments': {'payment_status_completed_idx': ['status', 'completed_at']},
+    'stock_items': {'stock_item_low_idx': ['name']},
+    'reservations': {'reservation_date_time_idx': ['reservation_date', 'reservation_time']},
+    'waitlist': {'waitlist_status_created_idx': ['status', 'created_at']},
+    'attendance': {'attendance_open_idx': ['user_id']},
+}
+
+PARTIAL = {
+    'stock_item_low_idx': '"current_quantity" <= ("min_quantity")',
+    'attendance_open_idx': '"check_out" IS NULL',
+}
+
+
+class QueryIndexTests(TestCase):
+    def test_indexes_exist_after_migrating(self):
+        with connection.cursor() as cursor:
+            for table, indexes in INDEXES.items():
+                constraints = connection.introspection.get_constraints(cursor, table)
+                for name, columns in indexes.items():
+                    with self.subTest(index=name):
+                        self.assertIn(name, constraints)
+                        self.assertEqual(constraints[name]['columns'], columns)
+
+    def test_partial_indexes_keep_their_condition(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Reads the index definition from sqlite_master')
+        with connection.cursor() as cursor:
+            for name, condition in PARTIAL.items():
+                with self.subTest(index=name):
+                    cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'index' AND name = %s", [name])
+                    self.assertIn(f'WHERE {condition}', cursor.fetchone()[0])
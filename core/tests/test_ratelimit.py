@@ -0,0 +1,92 @@
+import json
+import multiprocessing
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import ratelimit
+from core.models import RateLimitCounter
+
+
+def _hammer(key, limit, window, hits, allowed):
+    """Worker process: send hits and add up the ones the limiter let through"""
+    passed = sum(ratelimit.hit(key, limit, window)[0] for _ in range(hits))
+    with allowed.get_lock():
+        allowed.value += passed
+    connections.close_all()
+
+
+@override_settings(RATE_LIMIT_BACKEND='core.ratelimit.DatabaseBackend')
+class DatabaseBackendConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        ratelimit.get_backend.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+        connection = connections['default']
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Worker processes cannot see an in-memory test database, so give them a file
+            fd, path = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(fd)
+            self.addCleanup(os.remove, path)
+            shared = connection.__class__({**connection.settings_dict, 'NAME': path}, 'default')
+            connections['default'] = shared
+            self.addCleanup(connections.__setitem__, 'default', connection)
+            self.addCleanup(shared.close)
+            with shared.schema_editor() as editor:
+                editor.create_model(RateLimitCounter)
+        # Workers open their own connections rather than sharing the parent's
+        connections['default'].close()
+
+    def test_workers_share_one_limit(self):
+        limit, workers, hits = 40, 4, 25
+        context = multiprocessing.get_context('fork')
+        allowed = context.Value('i', 0)
+        processes = [
+            context.Process(target=_hammer, args=('test:shared', limit, 86400, hits, allowed))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            self.assertEqual(process.exitcode, 0)
+
+        self.assertEqual(allowed.value, limit)
+        self.assertEqual(sum(RateLimitCounter.objects.filter(key='test:shared').values_list('count', flat=True)), workers * hits)
+
+
+@override_settings(
+    RATE_LIMIT_BACKEND='core.ratelimit.DatabaseBackend',
+    RATE_LIMITS={'login': (2, 300), 'order_write': (2, 60)},
+)
+class RateLimitMiddlewareTests(TestCase):
+    def setUp(self):
+        ratelimit.get_backend.cache_clear()
+        self.addCleanup(ratelimit.get_backend.cache_clear)
+        self.user = get_user_model().objects.create_user(username='waiter', password='correct-horse')
+
+    def test_order_writes_get_429_once_over_the_limit(self):
+        self.client.force_login(self.user)
+        url = reverse('core:add_order_item', kwargs={'table_id': 999})
+        post = lambda: self.client.post(url, json.dumps({}), content_type='application/json', secure=True)
+
+        self.assertNotEqual(post().status_code, 429)
+        self.assertNotEqual(post().status_code, 429)
+        response = post()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.json()['success'])
+        self.assertGreater(int(response['Retry-After']), 0)
+
+    def test_failed_logins_lock_out_the_address(self):
+        url = reverse('staff:login')
+        for _ in range(2):
+            self.assertEqual(self.client.post(url, {'username': 'waiter', 'password': 'wrong'}, secure=True).status_code, 200)
+
+        response = self.client.post(url, {'username': 'waiter', 'password': 'correct-horse'}, secure=True)
+
+        self.assertEqual(response.status_code, 403)
+        self.assertIn('Retry-After', response)
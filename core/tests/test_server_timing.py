@@ -0,0 +1,54 @@
+import re
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.timing import RequestTimer
+
+HEADER = re.compile(r'db;dur=[\d.]+;desc="(\d+) queries", tpl;dur=[\d.]+, total;dur=[\d.]+')
+
+
+class RequestTimerTests(SimpleTestCase):
+    def test_keeps_only_the_slowest_statements(self):
+        timer = RequestTimer(keep_slowest=2)
+        for sql, seconds in [('fast', 0), ('slowest', 0.03), ('medium', 0.01), ('slow', 0.02)]:
+            timer(lambda *args, seconds=seconds: time.sleep(seconds), sql, None, False, {})
+
+        self.assertEqual([sql for _, sql in timer.slowest()], ['slowest', 'slow'])
+
+    def test_counts_every_statement_it_wraps(self):
+        timer = RequestTimer(keep_slowest=1)
+        for sql in ('SELECT 1', 'SELECT 2'):
+            timer(lambda *args: None, sql, None, False, {})
+
+        self.assertEqual(timer.queries, 2)
+        self.assertEqual(len(timer.slowest()), 1)
+        self.assertRegex(timer.header(0.01), HEADER)
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cashier', password=None))
+        self.url = reverse('core:menu_availability')
+
+    def test_off_by_default(self):
+        self.assertNotIn('Server-Timing', self.client.get(self.url, secure=True))
+
+    @override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SLOW_MS=60_000)
+    def test_adds_the_header_without_logging_fast_requests(self):
+        with self.assertNoLogs('core.performance'):
+            response = self.client.get(self.url, secure=True)
+
+        self.assertGreater(int(HEADER.fullmatch(response['Server-Timing']).group(1)), 0)
+
+    @override_settings(SERVER_TIMING_ENABLED=True, SERVER_TIMING_SLOW_MS=0)
+    def test_logs_slow_requests_with_their_statements(self):
+        with self.assertLogs('core.performance', 'WARNING') as logs:
+            self.client.get(self.url, secure=True)
+
+        summary, *statements = logs.records[0].getMessage().splitlines()
+        self.assertTrue(summary.startswith(f'Slow request: GET {self.url} 200'))
+        self.assertEqual(len(statements), settings.SERVER_TIMING_SLOW_QUERIES)
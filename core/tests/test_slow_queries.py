@@ -0,0 +1,71 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import slowqueries
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists_are_collapsed(self):
+        self.assertEqual(
+            slowqueries.fingerprint("SELECT * FROM orders WHERE id IN (%s, %s, %s) AND status = 'paid' AND total > 10.5"),
+            "SELECT * FROM orders WHERE id IN (...) AND status = ? AND total > ?",
+        )
+
+    def test_repeats_with_other_values_share_an_id(self):
+        self.assertEqual(
+            slowqueries.fingerprint_id('SELECT * FROM t WHERE id IN (?, ?) LIMIT 21'),
+            slowqueries.fingerprint_id('SELECT * FROM t WHERE id IN (?) LIMIT 5'),
+        )
+
+
+class SummaryTests(SimpleTestCase):
+    def entry(self, sql, duration_ms, time, plan=None):
+        return {
+            'fingerprint': slowqueries.fingerprint_id(sql), 'sql': sql, 'duration_ms': duration_ms,
+            'time': time, 'view': 'core:dashboard', 'caller': 'core/views.py:10 in dashboard', 'plan': plan,
+        }
+
+    def test_groups_by_fingerprint_with_most_total_time_first(self):
+        entries = [
+            self.entry('SELECT * FROM a WHERE id = 1', 300, '2024-01-01T10:00:00+05:30', plan=['SCAN a']),
+            self.entry('SELECT * FROM b', 500, '2024-01-01T10:00:00+05:30'),
+            self.entry('SELECT * FROM a WHERE id = 2', 400, '2024-01-02T10:00:00+05:30'),
+        ]
+
+        first, second = slowqueries.summary(entries)
+
+        self.assertEqual((first['count'], first['total_ms'], first['max_ms'], first['avg_ms']), (2, 700, 400, 350))
+        self.assertEqual(first['example']['sql'], 'SELECT * FROM a WHERE id = 2')
+        self.assertEqual(first['plan'], ['SCAN a'])
+        self.assertEqual(first['last_seen'].day, 2)
+        self.assertEqual(second['sql'], 'SELECT * FROM b')
+
+
+class SlowQueryMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cashier', password=None))
+        self.url = reverse('core:menu_availability')
+
+    def test_off_by_default(self):
+        with mock.patch.object(slowqueries._worker, 'submit') as submit:
+            self.client.get(self.url, secure=True)
+
+        submit.assert_not_called()
+
+    @override_settings(SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_MS=0)
+    def test_records_statements_over_the_threshold(self):
+        with mock.patch.object(slowqueries._worker, 'submit') as submit:
+            self.client.get(self.url, {'since': '2024-01-01T00:00:00+05:30'}, secure=True)
+
+        entries = [call.args[0] for call in submit.call_args_list]
+        [entry] = [entry for entry in entries if 'menu_items' in entry['sql']]
+        self.assertEqual(entry['view'], 'core:menu_availability')
+        self.assertTrue(entry['caller'].startswith('core/views.py:'))
+        self.assertEqual(entry['fingerprint'], slowqueries.fingerprint_id(entry['sql']))
+
+    def test_explain_only_runs_for_reads(self):
+        self.assertTrue(slowqueries.explain('SELECT 1', []))
+        self.assertIsNone(slowqueries.explain('DELETE FROM menu_items', []))
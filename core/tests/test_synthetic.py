@@ -0,0 +1,57 @@
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import synthetic
+from inventory.models import StockItem, StockMovement
+
+
+def generate(**options):
+    generator = synthetic.Generator(
+        seed=3, tables=4, menu_items=12, customers=20, stock_items=8, days=21, orders_per_day=30, batch_size=200,
+        **options,
+    )
+    generator.setup()
+    generator.orders()
+
+
+def reconcile():
+    out = StringIO()
+    call_command('reconcile_stock', stdout=out)
+    return out.getvalue()
+
+
+class GeneratorLedgerTests(TestCase):
+    def setUp(self):
+        generate()
+
+    def test_stock_reconciles_with_the_ledger(self):
+        self.assertIn('All stock quantities match the movement ledger', reconcile())
+
+    def test_every_item_has_an_opening_movement_and_no_negative_stock(self):
+        opening = StockMovement.objects.filter(reference='SYN-OPENING', movement_type='adjustment')
+
+        self.assertEqual(opening.count(), StockItem.objects.count())
+        self.assertFalse(StockItem.objects.filter(current_quantity__lt=0).exists())
+
+    def test_history_keeps_its_timestamps(self):
+        first = StockMovement.objects.order_by('created_at').first()
+
+        self.assertEqual(first.reference, 'SYN-OPENING')
+        self.assertLess(first.created_at.date(), StockMovement.objects.order_by('-created_at').first().created_at.date())
+
+
+
+class GeneratorShortfallTests(TestCase):
+    @mock.patch.object(synthetic, 'OPENING_STOCK_DAYS', 0)
+    def test_shortfalls_are_booked_as_adjustments(self):
+        # Starts on a Tuesday with nothing on hand, six days before the first delivery
+        generate(end_date=date(2026, 3, 23))
+
+        corrections = StockMovement.objects.filter(movement_type='adjustment').exclude(reference='SYN-OPENING')
+        self.assertTrue(corrections.exists())
+        self.assertFalse(StockItem.objects.filter(current_quantity__lt=0).exists())
+        self.assertIn('All stock quantities match the movement ledger', reconcile())
@@ -0,0 +1,84 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core import tracing
+
+
+def known_trace(view='core:dashboard'):
+    """request 100 > middleware 90 > view 70 > (sql 20, sql 10, template 30 > sql 5)"""
+    spans = [
+        (1, None, 'request', 100), (2, 1, 'middleware', 90), (3, 2, 'view', 70),
+        (4, 3, 'sql', 20), (5, 3, 'sql', 10), (6, 3, 'template', 30), (7, 6, 'sql', 5),
+    ]
+    return {
+        'name': 'request', 'duration_ms': 100, 'attrs': {'view': view},
+        'spans': [{'id': id, 'parent': parent, 'name': name, 'duration_ms': ms} for id, parent, name, ms in spans],
+    }
+
+
+class AggregateTests(SimpleTestCase):
+    def test_total_and_self_time_per_path(self):
+        endpoint = tracing.aggregate([known_trace(), known_trace()])['core:dashboard']
+
+        self.assertEqual(endpoint['requests'], 2)
+        self.assertEqual(endpoint['durations'], [100, 100])
+        paths = {';'.join(path): stats for path, stats in endpoint['paths'].items()}
+        self.assertEqual(paths['request'], {'calls': 2, 'total_ms': 200, 'self_ms': 20})
+        self.assertEqual(paths['request;middleware'], {'calls': 2, 'total_ms': 180, 'self_ms': 40})
+        self.assertEqual(paths['request;middleware;view'], {'calls': 2, 'total_ms': 140, 'self_ms': 20})
+        self.assertEqual(paths['request;middleware;view;sql'], {'calls': 4, 'total_ms': 60, 'self_ms': 60})
+        self.assertEqual(paths['request;middleware;view;template'], {'calls': 2, 'total_ms': 60, 'self_ms': 50})
+        self.assertEqual(paths['request;middleware;view;template;sql'], {'calls': 2, 'total_ms': 10, 'self_ms': 10})
+
+    def test_endpoints_are_kept_apart(self):
+        self.assertEqual(sorted(tracing.aggregate([known_trace('a'), known_trace('b')])), ['a', 'b'])
+
+
+class SpanTests(SimpleTestCase):
+    def test_spans_nest_under_the_trace_root(self):
+        with self.assertLogs('core.tracing', 'INFO') as logs:
+            with tracing.start_trace('job', kind='test') as trace:
+                with tracing.span('outer'):
+                    with tracing.span('inner') as inner:
+                        inner.set('rows', 3)
+
+        exported = json.loads(logs.records[0].getMessage())
+        self.assertEqual(exported['trace_id'], trace.trace.id)
+        spans = {s['name']: s for s in exported['spans']}
+        self.assertIsNone(spans['job']['parent'])
+        self.assertEqual(spans['outer']['parent'], spans['job']['id'])
+        self.assertEqual(spans['inner']['parent'], spans['outer']['id'])
+        self.assertEqual(spans['inner']['attrs'], {'rows': 3})
+
+    def test_span_outside_a_trace_records_nothing(self):
+        with self.assertNoLogs('core.tracing'):
+            with tracing.span('idle') as idle:
+                idle.set('ignored', True)
+
+        self.assertFalse(tracing.active())
+
+
+class TracingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='cashier', password=None))
+
+    @override_settings(TRACING_ENABLED=True, TRACE_SAMPLE_RATE=1.0)
+    def test_sampled_request_is_traced_with_its_queries(self):
+        with self.assertLogs('core.tracing', 'INFO') as logs:
+            response = self.client.get(reverse('core:menu_availability'), secure=True)
+
+        exported = json.loads(logs.records[0].getMessage())
+        self.assertEqual(exported['attrs']['view'], 'core:menu_availability')
+        self.assertEqual(exported['attrs']['status'], 200)
+        self.assertEqual(response['X-Request-ID'], exported['trace_id'])
+        names = {s['id']: s['name'] for s in exported['spans']}
+        self.assertIn('view', names.values())
+        self.assertTrue(any(s['name'] == 'sql' and names[s['parent']] in ('middleware', 'view') for s in exported['spans']))
+
+    @override_settings(TRACING_ENABLED=True, TRACE_SAMPLE_RATE=0.0)
+    def test_unsampled_request_is_not_traced(self):
+        with self.assertNoLogs('core.tracing'):
+            self.client.get(reverse('core:menu_availability'), secure=True)
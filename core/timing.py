@@ -0,0 +1,93 @@
+"""
+Per-request timing of database queries and template rendering, collected
+by ServerTimingMiddleware. The timer for the current request lives in a
+context variable; queries are timed through a connection execute_wrapper
+and templates through a wrapper around the Django template backend's
+render(), installed once when the middleware is enabled.
+"""
+import heapq
+import time
+from contextvars import ContextVar
+
+_current = ContextVar('request_timer', default=None)
+
+
+class RequestTimer:
+    """Totals for one request, plus its slowest SQL statements"""
+
+    def __init__(self, keep_slowest=3):
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []  # min-heap of (seconds, sequence, sql)
+        self._rendering = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """connection.execute_wrapper hook"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_time += duration
+            self.queries += 1
+            if self.keep_slowest:
+                entry = (duration, self.queries, sql)
+                if len(self._slowest) < self.keep_slowest:
+                    heapq.heappush(self._slowest, entry)
+                elif duration > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, entry)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def slowest(self):
+        """[(milliseconds, sql)], slowest first"""
+        return [(round(seconds * 1000, 1), sql) for seconds, _, sql in sorted(self._slowest, reverse=True)]
+
+    def header(self, total):
+        """Server-Timing value; template time includes any queries run while rendering"""
+        return (
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries", '
+            f'tpl;dur={self.template_time * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+
+
+def activate(timer):
+    return _current.set(timer)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def install_template_timing():
+    """Wrap the Django template backend's render() so it reports to the current timer"""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'timed', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        timer = _current.get()
+        if timer is None or timer._rendering:
+            # Not instrumented, or nested inside a render that is already timed
+            return original(self, context, request)
+        timer._rendering += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timer.template_time += time.perf_counter() - start
+            timer._rendering -= 1
+
+    render.timed = True
+    Template.render = render
@@ -0,0 +1,238 @@
+"""
+Lightweight in-process request tracing. A sampled request gets a trace whose
+spans nest through a context variable: the request itself, middleware
+before and after the view, the view, every SQL statement, template renders,
+cache calls and any code wrapped in span() (the reportlab build in the PDF
+export, for one). When the request ends the whole trace is written as one
+JSON line through the core.tracing logger (logs/traces.jsonl);
+`manage.py trace_report` aggregates them.
+
+Outside a sampled request span() does nothing beyond one context lookup.
+"""
+import json
+import logging
+import time
+import uuid
+from contextvars import ContextVar
+from functools import wraps
+
+from django.utils import timezone
+
+from .logs import read_jsonl
+
+logger = logging.getLogger('core.tracing')
+
+MAX_ATTR_LENGTH = 300
+CACHE_METHODS = ['get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many', 'incr', 'touch']
+
+_trace = ContextVar('trace', default=None)
+_span = ContextVar('span', default=None)
+
+
+class Span:
+    __slots__ = ('id', 'parent_id', 'name', 'start', 'duration', 'attrs')
+
+    def __init__(self, id, parent_id, name, attrs):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.perf_counter()
+        self.duration = None
+        self.attrs = attrs
+
+    def as_dict(self, origin):
+        return {
+            'id': self.id,
+            'parent': self.parent_id,
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'attrs': self.attrs,
+        }
+
+
+class Trace:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.time = timezone.now()
+        self.spans = []
+        self._next_id = 0
+
+    def next_id(self):
+        self._next_id += 1
+        return self._next_id
+
+
+class span:
+    """
+    Context manager (and decorator) timing a block as a child of the current
+    span. Attributes can be added while it runs with set().
+    """
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+        self._span = None
+
+    def __enter__(self):
+        trace = _trace.get()
+        if trace is None:
+            return self
+        parent = _span.get()
+        self._span = Span(trace.next_id(), parent.id if parent else None, self.name, dict(self.attrs))
+        self._trace = trace
+        self._token = _span.set(self._span)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        current = self._span
+        if current is None:
+            return False
+        current.duration = time.perf_counter() - current.start
+        if exc_type is not None:
+            current.attrs['error'] = exc_type.__name__
+        self._trace.spans.append(current)
+        _span.reset(self._token)
+        self._span = None
+        return False
+
+    def set(self, key, value):
+        if self._span is not None:
+            self._span.attrs[key] = value
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(self.name, **self.attrs):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def active():
+    return _trace.get() is not None
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.id if trace else None
+
+
+class start_trace:
+    """Root span of a new trace; the trace is exported when it closes"""
+
+    def __init__(self, name, **attrs):
+        self.trace = Trace()
+        self.root = span(name, **attrs)
+
+    def __enter__(self):
+        self._token = _trace.set(self.trace)
+        self.root.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        root = self.root._span
+        self.root.__exit__(exc_type, exc, tb)
+        _trace.reset(self._token)
+        export(self.trace, root)
+        return False
+
+    def set(self, key, value):
+        self.root.set(key, value)
+
+
+def export(trace, root):
+    origin = root.start
+    logger.info(json.dumps({
+        'trace_id': trace.id,
+        'time': trace.time.isoformat(),
+        'name': root.name,
+        'duration_ms': round(root.duration * 1000, 3),
+        'attrs': root.attrs,
+        'spans': [s.as_dict(origin) for s in sorted(trace.spans, key=lambda s: s.start)],
+    }, default=str))
+
+
+def _short(text):
+    text = str(text)
+    return text if len(text) <= MAX_ATTR_LENGTH else text[:MAX_ATTR_LENGTH] + '...'
+
+
+def trace_query(execute, sql, params, many, context):
+    """connection.execute_wrapper hook: one span per statement"""
+    with span('sql', statement=_short(sql), many=bool(many)):
+        return execute(sql, params, many, context)
+
+
+def install():
+    """Wrap template rendering and the configured caches so they report spans; safe to call repeatedly"""
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.template.backends.django import Template
+
+    if not getattr(Template.render, 'traced', False):
+        Template.render = _traced_render(Template.render)
+    for alias in settings.CACHES:
+        backend = type(caches[alias])
+        for method in CACHE_METHODS:
+            original = getattr(backend, method, None)
+            if original is not None and not getattr(original, 'traced', False):
+                setattr(backend, method, _traced_cache_method(method, original))
+
+
+def _traced_render(original):
+    @wraps(original)
+    def render(self, context=None, request=None):
+        if _trace.get() is None:
+            return original(self, context, request)
+        with span('template', template=getattr(self.template, 'name', None)):
+            return original(self, context, request)
+    render.traced = True
+    return render
+
+
+def _traced_cache_method(name, original):
+    @wraps(original)
+    def method(self, *args, **kwargs):
+        if _trace.get() is None:
+            return original(self, *args, **kwargs)
+        key = args[0] if args else kwargs.get('key', kwargs.get('keys'))
+        with span(f'cache.{name}', key=_short(key)):
+            return original(self, *args, **kwargs)
+    method.traced = True
+    return method
+
+
+# Reading and aggregating
+
+def read_traces():
+    return read_jsonl(logger)
+
+
+def aggregate(traces):
+    """
+    Per root name + view: request count, durations and a flame tree of span
+    paths ('request;view;template;sql') with total and self time.
+    """
+    endpoints = {}
+    for trace in traces:
+        key = trace['attrs'].get('view') or trace['attrs'].get('path') or trace['name']
+        endpoint = endpoints.setdefault(key, {'requests': 0, 'durations': [], 'paths': {}})
+        endpoint['requests'] += 1
+        endpoint['durations'].append(trace['duration_ms'])
+
+        spans = {s['id']: s for s in trace['spans']}
+        children = {}
+        for s in trace['spans']:
+            children[s['parent']] = children.get(s['parent'], 0) + s['duration_ms']
+        for s in trace['spans']:
+            names = []
+            node = s
+            while node is not None:
+                names.append(node['name'])
+                node = spans.get(node['parent'])
+            path = tuple(reversed(names))
+            stats = endpoint['paths'].setdefault(path, {'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0})
+            stats['calls'] += 1
+            stats['total_ms'] += s['duration_ms']
+            stats['self_ms'] += max(s['duration_ms'] - children.get(s['id'], 0), 0)
+    return endpoints
@@ -5,9 +5,12 @@ app_name = 'core'
 
 urlpatterns = [
     path('', views.home, name='home'),
+    path('metrics', views.metrics, name='metrics'),
+    path('performance/slow-queries/', views.slow_queries, name='slow_queries'),
     path('sales/', views.sales, name='sales'),
     path('sales/order/<int:table_id>/', views.order_entry, name='order_entry'),
     path('sales/order/<int:table_id>/items/', views.get_order_items, name='get_order_items'),
+    path('sales/menu-availability/', views.menu_availability, name='menu_availability'),
     path('sales/order/create/<int:table_id>/', views.create_order, name='create_order'),
     path('sales/order/<int:table_id>/add-item/', views.add_order_item, name='add_order_item'),
     path('sales/order/item/<int:item_id>/update/', views.update_order_item, name='update_order_item'),
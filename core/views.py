@@ -1,5 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
@@ -42,20 +43,22 @@ def dashboard(request):
     from tables.models import Table
     from billing.models import Payment
     from inventory.models import StockItem
+    from inventory.valuation import start_of_day, end_of_day
     from datetime import datetime
     
     # Get today's date in the local timezone
     now = timezone.now()
     today = now.date()
     
-    # Today's statistics
-    today_orders = Order.objects.filter(created_at__date=today)
+    # Today's statistics; datetime bounds instead of __date so the indexes are used
+    today_orders = Order.objects.filter(created_at__gte=start_of_day(today), created_at__lt=end_of_day(today))
     
     # Calculate revenue from completed payments today
     # Use timezone-aware comparison to avoid date mismatch issues
     today_revenue = Payment.objects.filter(
         status='completed',
-        completed_at__date=today
+        completed_at__gte=start_of_day(today),
+        completed_at__lt=end_of_day(today)
     ).aggregate(total=Sum('amount'))['total'] or 0
     
     # Table status
@@ -78,10 +81,11 @@ def dashboard(request):
     daily_revenue = []
     for i in range(7):
         day = week_ago + timedelta(days=i)
+        day_start, day_end = start_of_day(day), end_of_day(day)
         revenue = Payment.objects.filter(
             status='completed'
         ).filter(
-            Q(completed_at__date=day) | Q(created_at__date=day)
+            Q(completed_at__gte=day_start, completed_at__lt=day_end) | Q(created_at__gte=day_start, created_at__lt=day_end)
         ).aggregate(total=Sum('amount'))['total'] or 0
         daily_revenue.append({
             'date': day.strftime('%a'),
@@ -118,6 +122,50 @@ def home(request):
     return redirect('staff:login')
 
 
+def metrics(request):
+    """Prometheus metrics, for staff users or addresses in METRICS_ALLOWED_IPS"""
+    import ipaddress
+    from django.conf import settings
+    from django.http import Http404, HttpResponse, HttpResponseForbidden
+    from . import metrics as pos_metrics
+    
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    
+    allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        # REMOTE_ADDR, not X-Forwarded-For, which any client can set
+        try:
+            address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+        except ValueError:
+            address = None
+        allowed = address is not None and any(
+            address in ipaddress.ip_network(network.strip(), strict=False)
+            for network in settings.METRICS_ALLOWED_IPS if network.strip()
+        )
+    if not allowed:
+        return HttpResponseForbidden('Forbidden')
+    
+    body, content_type = pos_metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
+@staff_member_required
+def slow_queries(request):
+    """Slow-query log grouped by normalized SQL, most total time first"""
+    from django.conf import settings
+    from . import slowqueries
+    
+    groups = slowqueries.summary()
+    context = {
+        'groups': groups,
+        'enabled': settings.SLOW_QUERY_LOG_ENABLED,
+        'threshold_ms': settings.SLOW_QUERY_MS,
+        'total_entries': sum(group['count'] for group in groups),
+    }
+    return render(request, 'core/slow_queries.html', context)
+
+
 @login_required
 def order_entry(request, table_id):
     """Order entry interface for a specific table"""
@@ -138,9 +186,12 @@ def order_entry(request, table_id):
     if order:
         order_items = order.items.select_related('menu_item').all()
     
-    # Get all menu items and categories
+    # Get all menu items and categories; items switched off for lack of stock
+    # are shown greyed out so they can come back without a reload
     categories = Category.objects.filter(is_active=True).order_by('name')
-    menu_items = MenuItem.objects.filter(is_available=True).select_related('category')
+    menu_items = MenuItem.objects.filter(
+        Q(is_available=True) | Q(auto_unavailable=True)
+    ).select_related('category')
     
     context = {
         'table': table,
@@ -148,11 +199,43 @@ def order_entry(request, table_id):
         'order_items': order_items,
         'categories': categories,
         'menu_items': menu_items,
+        'availability_since': timezone.now().isoformat(),
     }
     
     return render(request, 'core/order_entry.html', context)
 
 
+# Overlap between availability polls, so a change committed just after the
+# previous poll's timestamp is still picked up
+AVAILABILITY_POLL_OVERLAP = timedelta(seconds=10)
+
+
+@login_required
+def menu_availability(request):
+    """Menu items whose availability or sellable quantity changed since the given time"""
+    from menu.models import MenuItem
+    from django.utils.dateparse import parse_datetime
+    
+    now = timezone.now()
+    since_param = request.GET.get('since', '').strip()
+    items = MenuItem.objects.values('id', 'is_available', 'sellable_quantity')
+    if not since_param:
+        items = items.none()
+    else:
+        # An unusable since (malformed, out of range, or too close to
+        # datetime.min to subtract the overlap) gets every item, so the
+        # client resynchronises from the returned now instead of failing
+        try:
+            since = parse_datetime(since_param.replace(' ', '+'))
+            if since is not None:
+                items = items.filter(availability_changed_at__gt=since - AVAILABILITY_POLL_OVERLAP)
+        except (ValueError, OverflowError):
+            pass
+    items = list(items)
+    
+    return JsonResponse({'now': now.isoformat(), 'items': items})
+
+
 @login_required
 def get_order_items(request, table_id):
     """Get order items for AJAX refresh without page reload"""
@@ -190,7 +273,7 @@ def create_order(request, table_id):
     import random
     
     try:
-        logger.info(f"Creating order for table {table_id} by user {request.user}")
+        logger.info("Creating order for table %s by user %s", table_id, request.user)
         
         table = get_object_or_404(Table, id=table_id, is_active=True)
         
@@ -201,7 +284,7 @@ def create_order(request, table_id):
         ).first()
         
         if existing_order:
-            logger.info(f"Existing order found: {existing_order.order_number}")
+            logger.info("Existing order found: %s", existing_order.order_number)
             return JsonResponse({
                 'success': True,
                 'order_id': existing_order.id,
@@ -228,7 +311,7 @@ def create_order(request, table_id):
         table.occupied_since = timezone.now()
         table.save()
         
-        logger.info(f"Order created successfully: {order.order_number}")
+        logger.info("Order created successfully: %s", order.order_number)
         
         return JsonResponse({
             'success': True,
@@ -237,7 +320,7 @@ def create_order(request, table_id):
             'message': 'Order created successfully'
         })
     except Exception as e:
-        logger.error(f"Error creating order for table {table_id}: {str(e)}", exc_info=True)
+        logger.error("Error creating order for table %s: %s", table_id, e, exc_info=True)
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -253,16 +336,17 @@ def add_order_item(request, table_id):
     from menu.models import MenuItem
     
     try:
-        table = get_object_or_404(Table, id=table_id, is_active=True)
-        
-        # Get or create order
+        # Get or create order; the table is only loaded on its own to open a new one
         order = Order.objects.filter(
-            table=table,
+            table_id=table_id,
+            table__is_active=True,
             status__in=['pending', 'confirmed', 'preparing']
         ).first()
+        items = None
         
         if not order:
             # Create new order if doesn't exist
+            table = get_object_or_404(Table, id=table_id, is_active=True)
             import random
             order_number = f"ORD{timezone.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}"
             while Order.objects.filter(order_number=order_number).exists():
@@ -279,6 +363,7 @@ def add_order_item(request, table_id):
             table.status = 'occupied'
             table.occupied_since = timezone.now()
             table.save()
+            items = []
         
         # Get menu item
         data = json.loads(request.body)
@@ -287,11 +372,10 @@ def add_order_item(request, table_id):
         
         menu_item = get_object_or_404(MenuItem, id=menu_item_id, is_available=True)
         
-        # Check if item already exists in order
-        order_item = OrderItem.objects.filter(
-            order=order,
-            menu_item=menu_item
-        ).first()
+        # Check if item already exists in order; the same rows give the new totals
+        if items is None:
+            items = list(order.items.order_by('id'))
+        order_item = next((item for item in items if item.menu_item_id == menu_item.id), None)
         
         if order_item:
             # Update quantity
@@ -307,9 +391,10 @@ def add_order_item(request, table_id):
                 unit_price=menu_item.price,
                 total_price=menu_item.price * quantity
             )
+            items.append(order_item)
         
         # Recalculate order totals
-        order.calculate_totals()
+        order.calculate_totals(items)
         
         return JsonResponse({
             'success': True,
@@ -430,7 +515,7 @@ def cancel_order(request, table_id):
         table.occupied_since = None
         table.save()
         
-        logger.info(f'Order {order_number} deleted by {request.user.username}')
+        logger.info('Order %s deleted by %s', order_number, request.user.username)
         
         return JsonResponse({
             'success': True,
@@ -438,7 +523,7 @@ def cancel_order(request, table_id):
         })
         
     except Exception as e:
-        logger.error(f'Error cancelling order: {str(e)}', exc_info=True)
+        logger.error('Error cancelling order: %s', e, exc_info=True)
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -501,7 +586,10 @@ def change_table(request, table_id):
         new_table.occupied_since = timezone.now()
         new_table.save()
         
-        logger.info(f'Order {order.order_number} moved from Table {current_table.table_number} to Table {new_table.table_number} by {request.user.username}')
+        logger.info(
+            'Order %s moved from Table %s to Table %s by %s',
+            order.order_number, current_table.table_number, new_table.table_number, request.user.username,
+        )
         
         return JsonResponse({
             'success': True,
@@ -516,7 +604,7 @@ def change_table(request, table_id):
             'error': 'Invalid JSON data'
         }, status=400)
     except Exception as e:
-        logger.error(f'Error changing table: {str(e)}', exc_info=True)
+        logger.error('Error changing table: %s', e, exc_info=True)
         return JsonResponse({
             'success': False,
             'error': str(e)
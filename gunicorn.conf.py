@@ -0,0 +1,25 @@
+"""
+Gunicorn settings, read automatically from the working directory. Gives the
+workers a shared directory for prometheus_client, so /metrics reports all
+workers together whichever one serves the scrape.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+multiproc_dir = Path(os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'maikai_pos_metrics'),
+))
+
+
+def on_starting(server):
+    # Files left by a previous run would be merged into this one's counters
+    shutil.rmtree(multiproc_dir, ignore_errors=True)
+    multiproc_dir.mkdir(parents=True, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Vendor, StockLocation, StockItem, Recipe, StockMovement, PurchaseOrder, PurchaseOrderItem, StockAlert
+from .models import Vendor, StockLocation, StockItem, Recipe, StockMovement, PurchaseOrder, PurchaseOrderItem, StockAlert, StockSnapshot, StockLevel, StockLot
+from menu.costing import recompute_menu_costs, recompute_costs_for_stock_items
+from menu.availability import recompute_sellable, recompute_sellable_for_stock_items
 
 
 @admin.register(Vendor)
@@ -20,7 +22,7 @@ class StockItemAdmin(admin.ModelAdmin):
     list_display = ('name', 'sku', 'category', 'current_quantity', 'min_quantity', 'unit', 'unit_cost', 'stock_value', 'is_low_stock')
     list_filter = ('category', 'location', 'vendor')
     search_fields = ('name', 'sku')
-    readonly_fields = ('stock_value',)
+    readonly_fields = ('stock_value', 'forecast_daily_usage', 'suggested_min_quantity', 'suggested_max_quantity', 'forecast_updated_at')
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'sku', 'category')
@@ -38,7 +40,18 @@ class StockItemAdmin(admin.ModelAdmin):
             'fields': ('expiry_tracking', 'expiry_date'),
             'classes': ('collapse',)
         }),
+        ('Forecast', {
+            'fields': ('forecast_daily_usage', 'suggested_min_quantity', 'suggested_max_quantity', 'forecast_updated_at'),
+            'classes': ('collapse',)
+        }),
     )
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'unit_cost' in form.changed_data:
+            recompute_costs_for_stock_items([obj.id])
+        if change and 'current_quantity' in form.changed_data:
+            recompute_sellable_for_stock_items([obj.id])
 
 
 @admin.register(PurchaseOrder)
@@ -72,3 +85,46 @@ class RecipeAdmin(admin.ModelAdmin):
     list_display = ('menu_item', 'stock_item', 'quantity_required')
     list_filter = ('menu_item__category',)
     search_fields = ('menu_item__name', 'stock_item__name')
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        menu_item_ids = {obj.menu_item_id}
+        if 'menu_item' in form.changed_data and form.initial.get('menu_item'):
+            menu_item_ids.add(form.initial['menu_item'])
+        recompute_menu_costs(list(menu_item_ids))
+        recompute_sellable(list(menu_item_ids))
+    
+    def delete_model(self, request, obj):
+        menu_item_id = obj.menu_item_id
+        super().delete_model(request, obj)
+        recompute_menu_costs([menu_item_id])
+        recompute_sellable([menu_item_id])
+    
+    def delete_queryset(self, request, queryset):
+        menu_item_ids = list(queryset.values_list('menu_item_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        recompute_menu_costs(menu_item_ids)
+        recompute_sellable(menu_item_ids)
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('stock_item', 'snapshot_date', 'quantity', 'unit_cost', 'value')
+    list_filter = ('snapshot_date',)
+    search_fields = ('stock_item__name', 'stock_item__sku')
+    date_hierarchy = 'snapshot_date'
+
+
+@admin.register(StockLevel)
+class StockLevelAdmin(admin.ModelAdmin):
+    list_display = ('stock_item', 'location', 'quantity', 'updated_at')
+    list_filter = ('location',)
+    search_fields = ('stock_item__name', 'stock_item__sku')
+
+
+@admin.register(StockLot)
+class StockLotAdmin(admin.ModelAdmin):
+    list_display = ('stock_item', 'quantity', 'received_quantity', 'expiry_date', 'received_at')
+    list_filter = ('expiry_date',)
+    search_fields = ('stock_item__name', 'stock_item__sku')
+    raw_id_fields = ('stock_item', 'purchase_order_item')
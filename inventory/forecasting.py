@@ -0,0 +1,146 @@
+"""
+Demand forecasting and reorder-point suggestions from the movement ledger.
+
+Daily sale/waste totals for every item come from one grouped query and are laid
+out as an items x days matrix, so the statistics for all SKUs are computed
+together with NumPy instead of item by item.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from statistics import NormalDist
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+CONSUMPTION_TYPES = ['sale', 'waste']
+
+
+def load_daily_demand(start_date, end_date):
+    """
+    Return (item_ids, matrix) where matrix[i, d] is the quantity of item_ids[i]
+    sold or wasted on start_date + d days.
+    """
+    import numpy as np
+    from .models import StockMovement
+    from .valuation import start_of_day, end_of_day
+
+    rows = list(
+        StockMovement.objects.filter(
+            movement_type__in=CONSUMPTION_TYPES,
+            created_at__gte=start_of_day(start_date),
+            created_at__lt=end_of_day(end_date),
+        ).annotate(
+            day=TruncDate('created_at')
+        ).order_by().values_list('stock_item_id', 'day').annotate(total=Sum('quantity'))
+    )
+
+    n_days = (end_date - start_date).days + 1
+    if not rows:
+        return np.array([], dtype=np.int64), np.zeros((0, n_days))
+
+    item_col, day_col, total_col = zip(*rows)
+    item_col = np.array(item_col, dtype=np.int64)
+    item_ids = np.unique(item_col)
+
+    day_index = (np.array(day_col, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(np.int64)
+    matrix = np.zeros((len(item_ids), n_days))
+    matrix[np.searchsorted(item_ids, item_col), day_index] = np.array(total_col, dtype=float)
+
+    return item_ids, matrix
+
+
+def forecast(matrix, start_date, lead_time_days=3, review_days=7, service_level=0.95, window=28):
+    """
+    Vectorised forecast for every row of a demand matrix.
+
+    Returns a dict of per-item arrays: daily_usage (moving average),
+    reorder_point (lead-time demand plus safety stock) and order_up_to
+    (reorder point plus demand over the review period). Days before an item's
+    first recorded consumption are ignored so new items are not diluted.
+    """
+    import numpy as np
+
+    n_items, n_days = matrix.shape
+    lead_time_days = max(int(lead_time_days), 1)
+    review_days = max(int(review_days), 0)
+
+    has_demand = matrix > 0
+    first_day = np.where(has_demand.any(axis=1), has_demand.argmax(axis=1), n_days)
+    active = np.arange(n_days)[None, :] >= first_day[:, None]
+    active_days = active.sum(axis=1)
+
+    # Moving average over the most recent window
+    recent = active[:, -window:]
+    moving_avg = (matrix[:, -window:] * recent).sum(axis=1) / np.maximum(recent.sum(axis=1), 1)
+
+    # Day-of-week seasonality: mean demand per weekday relative to the overall mean
+    overall_mean = (matrix * active).sum(axis=1) / np.maximum(active_days, 1)
+    weekdays = (np.arange(n_days) + start_date.weekday()) % 7
+    season = np.ones((n_items, 7))
+    for dow in range(7):
+        mask = active & (weekdays == dow)[None, :]
+        count = mask.sum(axis=1)
+        dow_mean = np.where(count > 0, (matrix * mask).sum(axis=1) / np.maximum(count, 1), overall_mean)
+        season[:, dow] = np.divide(dow_mean, overall_mean, out=np.ones(n_items), where=overall_mean > 0)
+
+    # Expected demand for each day after the end of the history
+    last_weekday = (start_date.weekday() + n_days - 1) % 7
+    future_weekdays = (np.arange(1, lead_time_days + review_days + 1) + last_weekday) % 7
+    daily_forecast = moving_avg[:, None] * season[:, future_weekdays]
+    lead_demand = daily_forecast[:, :lead_time_days].sum(axis=1)
+    review_demand = daily_forecast[:, lead_time_days:].sum(axis=1)
+
+    # Safety stock from day-to-day variability over the active span
+    variance = (((matrix - overall_mean[:, None]) ** 2) * active).sum(axis=1) / np.maximum(active_days - 1, 1)
+    safety_stock = NormalDist().inv_cdf(service_level) * np.sqrt(variance) * np.sqrt(lead_time_days)
+
+    reorder_point = lead_demand + safety_stock
+    return {
+        'daily_usage': moving_avg,
+        'reorder_point': reorder_point,
+        'order_up_to': reorder_point + review_demand,
+    }
+
+
+def update_suggestions(history_days=730, lead_time_days=3, review_days=7, service_level=0.95, apply=False):
+    """
+    Forecast every item with consumption history and write the suggested
+    min/max quantities back with bulk_update. With apply=True the suggestions
+    also replace min_quantity/max_quantity. Returns the number of items updated.
+    """
+    from .models import StockItem
+
+    end_date = timezone.localdate() - timedelta(days=1)
+    start_date = end_date - timedelta(days=history_days - 1)
+
+    item_ids, matrix = load_daily_demand(start_date, end_date)
+    if not len(item_ids):
+        return 0
+
+    result = forecast(matrix, start_date, lead_time_days, review_days, service_level)
+
+    def to_decimal(value):
+        return Decimal(str(round(float(value), 2)))
+
+    now = timezone.now()
+    fields = ['forecast_daily_usage', 'suggested_min_quantity', 'suggested_max_quantity', 'forecast_updated_at']
+    if apply:
+        fields += ['min_quantity', 'max_quantity']
+
+    items = []
+    for i, item_id in enumerate(item_ids.tolist()):
+        item = StockItem(
+            id=item_id,
+            forecast_daily_usage=to_decimal(result['daily_usage'][i]),
+            suggested_min_quantity=to_decimal(result['reorder_point'][i]),
+            suggested_max_quantity=to_decimal(result['order_up_to'][i]),
+            forecast_updated_at=now,
+        )
+        if apply:
+            item.min_quantity = item.suggested_min_quantity
+            item.max_quantity = item.suggested_max_quantity
+        items.append(item)
+
+    StockItem.objects.bulk_update(items, fields, batch_size=500)
+    return len(items)
@@ -0,0 +1,92 @@
+"""
+Expiry lots: a StockLot is opened for each received purchase-order line and
+drawn down first-expiry-first-out (FEFO) as stock leaves
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+def consume_fefo(quantities):
+    """
+    Draw {stock_item_id: quantity} from open lots, earliest expiry first and
+    lots without an expiry last. Must run inside a transaction; the lots are
+    locked in one query and written back with bulk_update. Returns
+    {stock_item_id: quantity} that no lot covered, e.g. stock received
+    before lot tracking.
+    """
+    from .models import StockLot
+
+    remaining = {item_id: quantity for item_id, quantity in quantities.items() if quantity > 0}
+    if not remaining:
+        return {}
+
+    lots = StockLot.objects.select_for_update().filter(
+        stock_item_id__in=list(remaining),
+        quantity__gt=0,
+    ).order_by('stock_item_id', F('expiry_date').asc(nulls_last=True), 'received_at', 'id')
+
+    changed = []
+    for lot in lots:
+        needed = remaining[lot.stock_item_id]
+        if needed <= 0:
+            continue
+        taken = min(lot.quantity, needed)
+        lot.quantity -= taken
+        remaining[lot.stock_item_id] = needed - taken
+        changed.append(lot)
+
+    StockLot.objects.bulk_update(changed, ['quantity'], batch_size=500)
+    return {item_id: quantity for item_id, quantity in remaining.items() if quantity > 0}
+
+
+def expiring_lots(days=7):
+    """Open lots that have expired or expire within the given number of days, soonest first"""
+    from .models import StockLot
+
+    cutoff = timezone.localdate() + timedelta(days=days)
+    return StockLot.objects.filter(
+        quantity__gt=0,
+        expiry_date__lte=cutoff,
+    ).select_related('stock_item', 'stock_item__location').order_by('expiry_date', 'id')
+
+
+def write_off_lot(lot_id, user):
+    """
+    Record the remaining quantity of a lot as waste and close the lot.
+    Returns the quantity written off (zero if the lot was already empty).
+    """
+    from menu.availability import recompute_sellable_for_stock_items
+    from .models import StockItem, StockLevel, StockLot, StockMovement
+
+    with transaction.atomic():
+        lot = StockLot.objects.select_for_update().select_related('stock_item').get(id=lot_id)
+        if lot.quantity <= 0:
+            return Decimal('0')
+
+        item = lot.stock_item
+        StockMovement.objects.create(
+            stock_item=item,
+            movement_type='waste',
+            quantity=lot.quantity,
+            unit_cost=lot.unit_cost,
+            from_location_id=item.location_id,
+            reference=f"Expired lot #{lot.id}",
+            notes=f"Expiry {lot.expiry_date:%Y-%m-%d}" if lot.expiry_date else '',
+            created_by=user,
+        )
+        StockItem.objects.filter(id=item.id).update(
+            current_quantity=F('current_quantity') - lot.quantity,
+            updated_at=timezone.now(),
+        )
+        StockLevel.adjust(item.id, item.location_id, -lot.quantity)
+
+        written_off = lot.quantity
+        lot.quantity = 0
+        lot.save(update_fields=['quantity'])
+        recompute_sellable_for_stock_items([item.id])
+
+    return written_off
@@ -0,0 +1,45 @@
+"""
+Management command to forecast demand and suggest reorder points
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Forecast daily usage from the movement history and store suggested min/max quantities'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=730, help='Days of history to use (default: 730)')
+        parser.add_argument('--lead-time', type=int, default=3, help='Supplier lead time in days (default: 3)')
+        parser.add_argument('--review-days', type=int, default=7, help='Days between orders (default: 7)')
+        parser.add_argument('--service-level', type=float, default=0.95, help='Target service level (default: 0.95)')
+        parser.add_argument('--apply', action='store_true', help='Also copy the suggestions into min/max quantity')
+
+    def handle(self, *args, **options):
+        from inventory.forecasting import update_suggestions
+
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        if not 0.5 <= options['service_level'] < 1:
+            raise CommandError('--service-level must be between 0.5 and 1')
+
+        started = time.monotonic()
+        updated = update_suggestions(
+            history_days=options['days'],
+            lead_time_days=options['lead_time'],
+            review_days=options['review_days'],
+            service_level=options['service_level'],
+            apply=options['apply'],
+        )
+        elapsed = time.monotonic() - started
+
+        if not updated:
+            self.stdout.write(self.style.WARNING('No sale or waste movements in the selected history'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(f'Forecast {updated} item(s) in {elapsed:.2f}s'))
+        if options['apply']:
+            self.stdout.write('Suggested quantities copied into min_quantity/max_quantity')
+        else:
+            self.stdout.write('Run with --apply to use the suggestions as min/max quantities')
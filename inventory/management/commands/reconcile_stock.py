@@ -0,0 +1,84 @@
+"""
+Management command to reconcile stock quantities against the movement ledger
+"""
+import csv
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Round
+
+
+class Command(BaseCommand):
+    help = 'Recompute stock quantities from the StockMovement ledger and report (or fix) discrepancies'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Set current_quantity to the ledger quantity')
+        parser.add_argument('--export', metavar='PATH', help='Write discrepancies to a CSV file')
+        parser.add_argument('--limit', type=int, default=50, help='Maximum discrepancies to print (default: 50)')
+
+    def handle(self, *args, **options):
+        from inventory.models import StockItem, StockMovement
+        from menu.availability import recompute_sellable_for_stock_items
+
+        decimal_field = DecimalField(max_digits=12, decimal_places=2)
+
+        # One grouped aggregate over the ledger; the comparison runs in SQL (HAVING).
+        # Rounded to the column's scale, as SQLite sums decimals as floats
+        discrepancies = list(
+            StockItem.objects.annotate(
+                ledger_quantity=Round(Coalesce(
+                    Sum(StockMovement.signed_quantity('movements__')),
+                    Value(Decimal('0')),
+                    output_field=decimal_field,
+                ), 2)
+            ).exclude(
+                current_quantity=F('ledger_quantity')
+            ).order_by('name').values_list('id', 'sku', 'name', 'current_quantity', 'ledger_quantity')
+        )
+
+        # SQLite returns aggregates without the column's scale
+        discrepancies = [
+            (item_id, sku, name, current, Decimal(ledger).quantize(Decimal('0.01')))
+            for item_id, sku, name, current, ledger in discrepancies
+        ]
+
+        if not discrepancies:
+            self.stdout.write(self.style.SUCCESS('All stock quantities match the movement ledger'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{len(discrepancies)} item(s) differ from the movement ledger:\n'))
+        self.stdout.write(f'{"SKU":<15} {"Item":<30} {"Current":>12} {"Ledger":>12} {"Difference":>12}')
+        for _, sku, name, current, ledger in discrepancies[:options['limit']]:
+            self.stdout.write(f'{sku:<15} {name[:30]:<30} {current:>12} {ledger:>12} {current - ledger:>12}')
+        if len(discrepancies) > options['limit']:
+            self.stdout.write(f'... and {len(discrepancies) - options["limit"]} more')
+
+        if options['export']:
+            with open(options['export'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['sku', 'name', 'current_quantity', 'ledger_quantity', 'difference'])
+                for _, sku, name, current, ledger in discrepancies:
+                    writer.writerow([sku, name, current, ledger, current - ledger])
+            self.stdout.write(f'\nDiscrepancies exported to {options["export"]}')
+
+        if options['fix']:
+            ledger_total = StockMovement.objects.filter(
+                stock_item=OuterRef('pk')
+            ).order_by().values('stock_item').annotate(
+                total=Round(Sum(StockMovement.signed_quantity()), 2)
+            ).values('total')
+
+            # Single UPDATE that recomputes from the ledger at write time, so
+            # movements posted since the report above are not lost
+            with transaction.atomic():
+                updated = StockItem.objects.filter(
+                    id__in=[row[0] for row in discrepancies]
+                ).update(
+                    current_quantity=Coalesce(Subquery(ledger_total), Value(Decimal('0')), output_field=decimal_field)
+                )
+                recompute_sellable_for_stock_items([row[0] for row in discrepancies])
+            self.stdout.write(self.style.SUCCESS(f'\nUpdated {updated} item(s) to match the ledger'))
+        else:
+            self.stdout.write('\nRun with --fix to update current quantities from the ledger')
@@ -0,0 +1,71 @@
+"""
+Management command to record the nightly stock snapshot
+"""
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Record stock on hand, unit cost and value per item for a day (run nightly)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Snapshot date (YYYY-MM-DD). Defaults to today; past dates are rebuilt from the ledger',
+        )
+
+    def handle(self, *args, **options):
+        from inventory.models import StockItem, StockSnapshot
+        from inventory.valuation import end_of_day, stock_as_of
+
+        today = timezone.localdate()
+        if options['date']:
+            try:
+                snapshot_date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Date must be in YYYY-MM-DD format')
+        else:
+            snapshot_date = today
+
+        if snapshot_date > today:
+            raise CommandError('Cannot snapshot a future date')
+
+        if snapshot_date == today:
+            taken_at = timezone.now()
+            positions = {
+                item_id: {
+                    'quantity': quantity,
+                    'unit_cost': unit_cost,
+                    'value': (quantity * unit_cost).quantize(Decimal('0.01')),
+                }
+                for item_id, quantity, unit_cost in StockItem.objects.values_list('id', 'current_quantity', 'unit_cost')
+            }
+        else:
+            taken_at = end_of_day(snapshot_date)
+            positions = stock_as_of(snapshot_date)
+
+        snapshots = [
+            StockSnapshot(
+                stock_item_id=item_id,
+                snapshot_date=snapshot_date,
+                quantity=position['quantity'],
+                unit_cost=position['unit_cost'],
+                value=position['value'],
+                taken_at=taken_at,
+            )
+            for item_id, position in positions.items()
+        ]
+
+        # Re-running for the same day replaces that day's snapshot
+        with transaction.atomic():
+            StockSnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+            StockSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+        total_value = sum((s.value for s in snapshots), Decimal('0'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot for {snapshot_date}: {len(snapshots)} items, total value Rs.{total_value:,.2f}'
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 22:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateField()),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('value', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('taken_at', models.DateTimeField(help_text='Movements after this moment are not included')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.stockitem')),
+            ],
+            options={
+                'db_table': 'stock_snapshots',
+                'ordering': ['-snapshot_date'],
+                'indexes': [models.Index(fields=['snapshot_date'], name='stock_snap_date_idx')],
+                'unique_together': {('stock_item', 'snapshot_date')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-18 22:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_stockmovement_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLevel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('location', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='levels', to='inventory.stocklocation')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='levels', to='inventory.stockitem')),
+            ],
+            options={
+                'db_table': 'stock_levels',
+                'unique_together': {('stock_item', 'location')},
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def populate_stock_levels(apps, schema_editor):
+    """Seed each item's level at its home location from current_quantity"""
+    StockItem = apps.get_model('inventory', 'StockItem')
+    StockLevel = apps.get_model('inventory', 'StockLevel')
+
+    levels = [
+        StockLevel(stock_item_id=item_id, location_id=location_id, quantity=quantity)
+        for item_id, location_id, quantity in StockItem.objects.filter(
+            location__isnull=False
+        ).values_list('id', 'location_id', 'current_quantity')
+    ]
+    StockLevel.objects.bulk_create(levels, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_stocklevel'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_stock_levels, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_populate_stock_levels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='forecast_daily_usage',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='forecast_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='suggested_max_quantity',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Forecast order-up-to level', max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='suggested_min_quantity',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Forecast reorder point', max_digits=10, null=True),
+        ),
+    ]
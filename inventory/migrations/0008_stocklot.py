@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 22:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_stockitem_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockLot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, help_text='Quantity remaining', max_digits=10)),
+                ('received_quantity', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unit_cost', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('purchase_order_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='lots', to='inventory.purchaseorderitem')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='inventory.stockitem')),
+            ],
+            options={
+                'db_table': 'stock_lots',
+                'ordering': ['expiry_date', 'received_at'],
+                'indexes': [models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiry_date'], name='stock_lot_open_expiry_idx'), models.Index(condition=models.Q(('quantity__gt', 0)), fields=['stock_item', 'expiry_date'], name='stock_lot_open_item_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_stocklot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(condition=models.Q(('current_quantity__lte', models.F('min_quantity'))), fields=['name'], name='stock_item_low_idx'),
+        ),
+    ]
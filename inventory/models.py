@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Vendor(models.Model):
@@ -64,12 +65,25 @@ class StockItem(models.Model):
     expiry_tracking = models.BooleanField(default=False)
     expiry_date = models.DateField(null=True, blank=True)
     
+    # Written nightly by the forecast_stock command
+    suggested_min_quantity = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text='Forecast reorder point')
+    suggested_max_quantity = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, help_text='Forecast order-up-to level')
+    forecast_daily_usage = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    forecast_updated_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'stock_items'
         ordering = ['name']
+        indexes = [
+            # Only the low-stock rows, in list order, for the alerts and the dashboard
+            models.Index(
+                fields=['name'], name='stock_item_low_idx',
+                condition=models.Q(current_quantity__lte=models.F('min_quantity')),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.sku})"
@@ -83,6 +97,39 @@ class StockItem(models.Model):
         return self.current_quantity * self.unit_cost
 
 
+class StockLevel(models.Model):
+    """Quantity of a stock item held at one location"""
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='levels')
+    location = models.ForeignKey(StockLocation, on_delete=models.CASCADE, related_name='levels')
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'stock_levels'
+        unique_together = ['stock_item', 'location']
+    
+    def __str__(self):
+        return f"{self.stock_item.name} @ {self.location.name}: {self.quantity}"
+    
+    @classmethod
+    def adjust(cls, stock_item_id, location_id, delta):
+        """Atomically add delta (negative to remove) to the quantity held at a location"""
+        if not location_id or not delta:
+            return
+        
+        updated = cls.objects.filter(stock_item_id=stock_item_id, location_id=location_id).update(
+            quantity=models.F('quantity') + delta
+        )
+        if not updated:
+            level, created = cls.objects.get_or_create(
+                stock_item_id=stock_item_id, location_id=location_id, defaults={'quantity': delta}
+            )
+            if not created:
+                # Another request created the row first
+                cls.objects.filter(pk=level.pk).update(quantity=models.F('quantity') + delta)
+
+
 class Recipe(models.Model):
     """Recipes for menu items - links menu items to inventory"""
     from menu.models import MenuItem
@@ -109,6 +156,10 @@ class StockMovement(models.Model):
         ('transfer', 'Transfer'),
     ]
     
+    # Movement types that add to / take from current_quantity
+    INBOUND_TYPES = ['purchase', 'adjustment']
+    OUTBOUND_TYPES = ['sale', 'waste']
+    
     stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='movements')
     movement_type = models.CharField(max_length=20, choices=MOVEMENT_TYPE_CHOICES)
     quantity = models.DecimalField(max_digits=10, decimal_places=2)
@@ -126,9 +177,50 @@ class StockMovement(models.Model):
     class Meta:
         db_table = 'stock_movements'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination over (created_at, id), globally and per item/type
+            models.Index(fields=['-created_at', '-id'], name='stock_mov_created_idx'),
+            models.Index(fields=['stock_item', '-created_at', '-id'], name='stock_mov_item_created_idx'),
+            models.Index(fields=['movement_type', '-created_at', '-id'], name='stock_mov_type_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_movement_type_display()} - {self.stock_item.name}"
+    
+    @classmethod
+    def signed_quantity(cls, prefix=''):
+        """
+        Quantity expression that is positive for stock in and negative for stock out.
+        Pass prefix='movements__' to use it from a StockItem queryset.
+        """
+        return models.Case(
+            models.When(**{f'{prefix}movement_type__in': cls.INBOUND_TYPES}, then=models.F(f'{prefix}quantity')),
+            models.When(**{f'{prefix}movement_type__in': cls.OUTBOUND_TYPES}, then=-models.F(f'{prefix}quantity')),
+            default=models.Value(0),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+
+
+class StockSnapshot(models.Model):
+    """Daily stock on hand and valuation per item, used for as-of-date reporting"""
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='snapshots')
+    snapshot_date = models.DateField()
+    quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    value = models.DecimalField(max_digits=12, decimal_places=2)
+    
+    taken_at = models.DateTimeField(help_text='Movements after this moment are not included')
+    
+    class Meta:
+        db_table = 'stock_snapshots'
+        ordering = ['-snapshot_date']
+        unique_together = ['stock_item', 'snapshot_date']
+        indexes = [
+            models.Index(fields=['snapshot_date'], name='stock_snap_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock_item.name} - {self.snapshot_date}"
 
 
 class PurchaseOrder(models.Model):
@@ -180,6 +272,35 @@ class PurchaseOrderItem(models.Model):
         return f"{self.stock_item.name} - {self.quantity}"
 
 
+class StockLot(models.Model):
+    """A received batch of a stock item with its own expiry, consumed first-expiry-first-out"""
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='lots')
+    purchase_order_item = models.ForeignKey(PurchaseOrderItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='lots')
+    
+    quantity = models.DecimalField(max_digits=10, decimal_places=2, help_text='Quantity remaining')
+    received_quantity = models.DecimalField(max_digits=10, decimal_places=2)
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    expiry_date = models.DateField(null=True, blank=True)
+    
+    received_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        db_table = 'stock_lots'
+        ordering = ['expiry_date', 'received_at']
+        indexes = [
+            # Only open lots are ever searched, so the partial indexes stay small
+            models.Index(fields=['expiry_date'], name='stock_lot_open_expiry_idx', condition=models.Q(quantity__gt=0)),
+            models.Index(fields=['stock_item', 'expiry_date'], name='stock_lot_open_item_idx', condition=models.Q(quantity__gt=0)),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock_item.name} - {self.quantity} (exp. {self.expiry_date or 'n/a'})"
+    
+    @property
+    def value(self):
+        return self.quantity * self.unit_cost
+
+
 class StockAlert(models.Model):
     """Stock alert notifications"""
     ALERT_TYPE_CHOICES = [
@@ -0,0 +1,154 @@
+"""
+Purchase-order suggestions: items at or below their reorder point are grouped
+by vendor and ordered up to their target level as draft purchase orders
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+OPEN_PO_STATUSES = ['draft', 'sent']
+
+
+def reorder_candidates(vendor_ids=None):
+    """
+    Items with a vendor whose stock (including quantity already on open
+    purchase orders) is at or below the reorder point, annotated in SQL with
+    reorder_point, order_up_to, on_order and order_quantity.
+
+    The reorder point is the forecast suggestion when there is one, otherwise
+    min_quantity; the target is max_quantity, then the forecast order-up-to level.
+    """
+    from .models import PurchaseOrderItem, StockItem
+
+    decimal_field = DecimalField(max_digits=12, decimal_places=2)
+    zero = Value(Decimal('0'), output_field=decimal_field)
+
+    on_order = PurchaseOrderItem.objects.filter(
+        stock_item=OuterRef('pk'),
+        purchase_order__status__in=OPEN_PO_STATUSES,
+    ).order_by().values('stock_item').annotate(
+        outstanding=Sum(F('quantity') - F('received_quantity'))
+    ).values('outstanding')
+
+    items = StockItem.objects.filter(vendor__isnull=False, vendor__is_active=True)
+    if vendor_ids:
+        items = items.filter(vendor_id__in=vendor_ids)
+
+    return items.annotate(
+        reorder_point=Coalesce('suggested_min_quantity', 'min_quantity', output_field=decimal_field),
+        order_up_to=Coalesce('max_quantity', 'suggested_max_quantity', 'min_quantity', output_field=decimal_field),
+        on_order=Coalesce(Subquery(on_order), zero, output_field=decimal_field),
+    ).annotate(
+        order_quantity=ExpressionWrapper(
+            F('order_up_to') - F('current_quantity') - F('on_order'), output_field=decimal_field
+        ),
+    ).filter(
+        current_quantity__lte=F('reorder_point') - F('on_order'),
+        order_quantity__gt=0,
+    ).order_by('vendor__name', 'name')
+
+
+def suggested_orders(vendor_ids=None):
+    """
+    Run the candidate query once and group the rows by vendor.
+    Returns a list of {'vendor_id', 'vendor_name', 'lines', 'subtotal'} dicts.
+    """
+    rows = reorder_candidates(vendor_ids).values_list(
+        'id', 'name', 'sku', 'unit', 'unit_cost', 'current_quantity',
+        'reorder_point', 'order_up_to', 'on_order', 'order_quantity',
+        'vendor_id', 'vendor__name',
+    )
+
+    groups = {}
+    for (item_id, name, sku, unit, unit_cost, current, reorder_point, order_up_to,
+         on_order, order_quantity, vendor_id, vendor_name) in rows:
+        # SQLite returns computed decimals without the column's scale
+        order_quantity = Decimal(order_quantity).quantize(Decimal('0.01'))
+        group = groups.setdefault(vendor_id, {
+            'vendor_id': vendor_id,
+            'vendor_name': vendor_name,
+            'lines': [],
+            'subtotal': Decimal('0'),
+        })
+        group['lines'].append({
+            'stock_item_id': item_id,
+            'name': name,
+            'sku': sku,
+            'unit': unit,
+            'unit_cost': unit_cost,
+            'current_quantity': current,
+            'reorder_point': Decimal(reorder_point).quantize(Decimal('0.01')),
+            'order_up_to': Decimal(order_up_to).quantize(Decimal('0.01')),
+            'on_order': Decimal(on_order).quantize(Decimal('0.01')),
+            'quantity': order_quantity,
+            'total_cost': order_quantity * unit_cost,
+        })
+        group['subtotal'] += order_quantity * unit_cost
+
+    return list(groups.values())
+
+
+def _po_numbers(count):
+    """Reserve count PO numbers following the PO-<year>-<nnnn> scheme"""
+    from .models import PurchaseOrder
+
+    year = timezone.now().year
+    prefix = f"PO-{year}-"
+    taken = set(PurchaseOrder.objects.filter(po_number__startswith=prefix).values_list('po_number', flat=True))
+    sequence = PurchaseOrder.objects.filter(order_date__year=year).count()
+
+    numbers = []
+    while len(numbers) < count:
+        sequence += 1
+        number = f"{prefix}{str(sequence).zfill(4)}"
+        if number not in taken:
+            numbers.append(number)
+    return numbers
+
+
+def create_suggested_orders(user, vendor_ids=None, lead_time_days=3, tax_rate=Decimal('0.10')):
+    """
+    Create one draft purchase order per vendor from the current suggestions.
+    Each vendor's order and its lines (bulk_create) are written in their own
+    transaction. Returns the created PurchaseOrder objects.
+    """
+    from .models import PurchaseOrder, PurchaseOrderItem
+
+    groups = suggested_orders(vendor_ids)
+    if not groups:
+        return []
+
+    expected_delivery = timezone.localdate() + timedelta(days=lead_time_days)
+    created = []
+
+    for group, po_number in zip(groups, _po_numbers(len(groups))):
+        with transaction.atomic():
+            subtotal = group['subtotal']
+            po = PurchaseOrder.objects.create(
+                po_number=po_number,
+                vendor_id=group['vendor_id'],
+                expected_delivery=expected_delivery,
+                subtotal=subtotal,
+                tax_amount=subtotal * tax_rate,
+                total_amount=subtotal + subtotal * tax_rate,
+                notes='Generated from reorder suggestions',
+                created_by=user,
+                status='draft',
+            )
+            PurchaseOrderItem.objects.bulk_create([
+                PurchaseOrderItem(
+                    purchase_order=po,
+                    stock_item_id=line['stock_item_id'],
+                    quantity=line['quantity'],
+                    unit_cost=line['unit_cost'],
+                    total_cost=line['total_cost'],
+                )
+                for line in group['lines']
+            ], batch_size=1000)
+        created.append(po)
+
+    return created
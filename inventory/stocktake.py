@@ -0,0 +1,182 @@
+"""
+Stocktake import: counted quantities are compared with current stock and the
+variances posted as adjustment movements in one transaction.
+
+A count is either of everything held (compared with current_quantity, the
+total over all locations, and booked at each item's home location) or of one
+location (compared with what the StockLevel there holds, and booked there).
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+
+def parse_quantity(text):
+    """Decimal for a counted quantity, or None when it is not a finite number"""
+    try:
+        quantity = Decimal(str(text).strip())
+    except InvalidOperation:
+        return None
+    return quantity if quantity.is_finite() else None
+
+
+def parse_counts_csv(uploaded_file):
+    """
+    Parse a 'sku, counted_quantity' CSV upload.
+    Returns (counts, errors) where counts maps SKU -> Decimal.
+    """
+    counts = {}
+    errors = []
+    text = io.TextIOWrapper(uploaded_file, encoding='utf-8-sig')
+
+    for line_number, row in enumerate(csv.reader(text), start=1):
+        if not row or not row[0].strip():
+            continue
+        if line_number == 1 and row[0].strip().lower() == 'sku':
+            continue
+        if len(row) < 2:
+            errors.append(f'Line {line_number}: expected "sku, counted_quantity"')
+            continue
+
+        sku = row[0].strip()
+        quantity = parse_quantity(row[1])
+        if quantity is None:
+            errors.append(f'Line {line_number}: "{row[1].strip()}" is not a valid quantity for {sku}')
+            continue
+        if quantity < 0:
+            errors.append(f'Line {line_number}: counted quantity for {sku} cannot be negative')
+            continue
+        counts[sku] = quantity
+
+    return counts, errors
+
+
+def compute_variances(counts, location_id=None):
+    """
+    Compare counted quantities with current stock in a single query: the
+    total on hand, or the quantity held at location_id when given.
+    Returns (lines, unknown_skus); lines are dicts ordered by item name.
+    """
+    from django.db.models import DecimalField, OuterRef, Subquery, Value
+    from django.db.models.functions import Coalesce
+    from .models import StockItem, StockLevel
+
+    items = StockItem.objects.filter(sku__in=list(counts))
+    if location_id:
+        held = StockLevel.objects.filter(stock_item=OuterRef('pk'), location_id=location_id).values('quantity')
+        items = items.annotate(system_quantity=Coalesce(
+            Subquery(held), Value(Decimal('0')), output_field=DecimalField(max_digits=10, decimal_places=2),
+        ))
+        quantity_field = 'system_quantity'
+    else:
+        quantity_field = 'current_quantity'
+    items = items.values_list('id', 'sku', 'name', 'unit', 'unit_cost', quantity_field).order_by('name')
+
+    lines = []
+    for item_id, sku, name, unit, unit_cost, current in items:
+        counted = counts[sku]
+        lines.append({
+            'item_id': item_id,
+            'sku': sku,
+            'name': name,
+            'unit': unit,
+            'current_quantity': current,
+            'counted_quantity': counted,
+            'variance': counted - current,
+            'variance_value': (counted - current) * unit_cost,
+        })
+
+    known = {line['sku'] for line in lines}
+    unknown_skus = sorted(sku for sku in counts if sku not in known)
+    return lines, unknown_skus
+
+
+def post_stocktake(counts, user, reference='', location_id=None):
+    """
+    Post the counted quantities: one adjustment movement per item whose count
+    differs, created with bulk_create, and the new quantities written with
+    bulk_update, all in one transaction. With location_id the counts are of
+    that location only. Returns the number of items adjusted.
+    """
+    from core import metrics
+    from menu.availability import recompute_sellable_for_stock_items
+    from .lots import consume_fefo
+    from .models import StockItem, StockLevel, StockMovement
+
+    reference = reference or f"Stocktake {timezone.localdate():%Y-%m-%d}"
+    now = timezone.now()
+
+    with transaction.atomic():
+        # Lock the counted rows so concurrent sales don't interleave with the post
+        items = list(
+            StockItem.objects.select_for_update().filter(sku__in=list(counts)).only(
+                'id', 'sku', 'unit_cost', 'current_quantity', 'location_id', 'updated_at'
+            )
+        )
+
+        # Each item's variance is booked at the counted location, or its home location
+        booked_at = {item.id: location_id or item.location_id for item in items}
+        levels = {
+            level.stock_item_id: level
+            for level in StockLevel.objects.select_for_update().filter(
+                stock_item_id__in=[item_id for item_id, at in booked_at.items() if at]
+            )
+            if level.location_id == booked_at[level.stock_item_id]
+        }
+        if location_id:
+            system = {item.id: levels[item.id].quantity if item.id in levels else Decimal('0') for item in items}
+        else:
+            system = {item.id: item.current_quantity for item in items}
+
+        movements = []
+        changed = []
+        for item in items:
+            variance = counts[item.sku] - system[item.id]
+            if not variance:
+                continue
+            movements.append(StockMovement(
+                stock_item=item,
+                movement_type='adjustment',
+                quantity=variance,
+                unit_cost=item.unit_cost,
+                to_location_id=booked_at[item.id] if variance > 0 else None,
+                from_location_id=booked_at[item.id] if variance < 0 else None,
+                reference=reference,
+                notes=f'Counted {counts[item.sku]}, system {system[item.id]}',
+                created_by=user,
+            ))
+            item.current_quantity += variance
+            item.updated_at = now
+            changed.append(item)
+
+        StockMovement.objects.bulk_create(movements, batch_size=1000)
+        metrics.count_stock_movements(movements)
+        StockItem.objects.bulk_update(changed, ['current_quantity', 'updated_at'], batch_size=500)
+
+        # An item without a level where the variance is booked gets one holding
+        # the counted quantity
+        variances = {movement.stock_item_id: movement.quantity for movement in movements}
+        new_levels = []
+        for item in changed:
+            if not booked_at[item.id]:
+                continue
+            if item.id in levels:
+                levels[item.id].quantity += variances[item.id]
+                levels[item.id].updated_at = now
+            else:
+                new_levels.append(StockLevel(
+                    stock_item_id=item.id, location_id=booked_at[item.id], quantity=counts[item.sku],
+                ))
+        StockLevel.objects.bulk_update(
+            [levels[item_id] for item_id in variances if item_id in levels], ['quantity', 'updated_at'], batch_size=500,
+        )
+        StockLevel.objects.bulk_create(new_levels, batch_size=1000)
+        
+        # Shortfalls are taken from the earliest-expiring lots
+        consume_fefo({item_id: -variance for item_id, variance in variances.items() if variance < 0})
+        recompute_sellable_for_stock_items([item.id for item in changed])
+
+    return len(changed)
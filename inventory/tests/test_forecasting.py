@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.forecasting import forecast, update_suggestions
+from inventory.models import StockItem, StockMovement
+from inventory.valuation import end_of_day
+
+
+class ForecastTests(TestCase):
+    start = date(2024, 1, 1)
+
+    def test_steady_demand_needs_no_safety_stock(self):
+        result = forecast(np.full((1, 28), 5.0), self.start, lead_time_days=3, review_days=7)
+
+        self.assertAlmostEqual(result['daily_usage'][0], 5)
+        self.assertAlmostEqual(result['reorder_point'][0], 15)
+        self.assertAlmostEqual(result['order_up_to'][0], 50)
+
+    def test_days_before_first_consumption_are_ignored(self):
+        matrix = np.zeros((1, 28))
+        matrix[0, 21:] = 4
+
+        self.assertAlmostEqual(forecast(matrix, self.start)['daily_usage'][0], 4)
+
+    def test_variable_demand_adds_safety_stock(self):
+        steady, variable = forecast(np.array([[4.0, 4.0] * 14, [0.0, 8.0] * 14]), self.start, lead_time_days=2)['reorder_point']
+
+        self.assertGreater(variable, steady)
+
+
+class UpdateSuggestionsTests(TestCase):
+    def test_writes_suggestions_from_the_ledger(self):
+        item = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('50'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('100'),
+        )
+        yesterday = timezone.localdate() - timedelta(days=1)
+        for days_ago in range(14):
+            movement = StockMovement.objects.create(stock_item=item, movement_type='sale', quantity=Decimal('2'))
+            StockMovement.objects.filter(pk=movement.pk).update(
+                created_at=end_of_day(yesterday - timedelta(days=days_ago)) - timedelta(hours=12)
+            )
+
+        self.assertEqual(update_suggestions(history_days=14, lead_time_days=3, review_days=7), 1)
+
+        item.refresh_from_db()
+        self.assertEqual(item.forecast_daily_usage, Decimal('2'))
+        self.assertEqual(item.suggested_min_quantity, Decimal('6'))
+        self.assertEqual(item.suggested_max_quantity, Decimal('20'))
+        # Without apply the working reorder level is left alone
+        self.assertEqual(item.min_quantity, Decimal('1'))
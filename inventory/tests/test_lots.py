@@ -0,0 +1,61 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.lots import consume_fefo, expiring_lots, write_off_lot
+from inventory.models import StockItem, StockLevel, StockLocation, StockLot, StockMovement
+
+
+class StockLotTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.store = StockLocation.objects.create(name='Store')
+        self.item = StockItem.objects.create(
+            name='Milk', sku='MILK', category='Dairy', unit='l', current_quantity=Decimal('12'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('400'), location=self.store,
+        )
+        StockLevel.objects.create(stock_item=self.item, location=self.store, quantity=Decimal('12'))
+        self.undated = self.lot('4', None)
+        self.late = self.lot('4', self.today + timedelta(days=20))
+        self.soon = self.lot('4', self.today + timedelta(days=2))
+
+    def lot(self, quantity, expiry_date):
+        return StockLot.objects.create(
+            stock_item=self.item, quantity=Decimal(quantity), received_quantity=Decimal(quantity),
+            unit_cost=Decimal('400'), expiry_date=expiry_date,
+        )
+
+    def remaining(self):
+        return [StockLot.objects.get(id=lot.id).quantity for lot in (self.soon, self.late, self.undated)]
+
+    def test_consumes_earliest_expiry_first_and_undated_last(self):
+        with transaction.atomic():
+            uncovered = consume_fefo({self.item.id: Decimal('6')})
+
+        self.assertEqual(uncovered, {})
+        self.assertEqual(self.remaining(), [Decimal('0'), Decimal('2'), Decimal('4')])
+
+    def test_returns_what_no_lot_covers(self):
+        with transaction.atomic():
+            uncovered = consume_fefo({self.item.id: Decimal('15')})
+
+        self.assertEqual(uncovered, {self.item.id: Decimal('3')})
+        self.assertEqual(self.remaining(), [Decimal('0')] * 3)
+
+    def test_expiring_lots_are_within_the_window(self):
+        self.assertEqual(list(expiring_lots(days=7)), [self.soon])
+
+    def test_write_off_records_waste_and_closes_the_lot(self):
+        user = get_user_model().objects.create_user(username='storekeeper', password=None)
+
+        self.assertEqual(write_off_lot(self.soon.id, user), Decimal('4'))
+        self.assertEqual(write_off_lot(self.soon.id, user), Decimal('0'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_quantity, Decimal('8'))
+        self.assertEqual(StockLevel.objects.get(stock_item=self.item).quantity, Decimal('8'))
+        self.assertEqual(StockMovement.objects.get(stock_item=self.item).movement_type, 'waste')
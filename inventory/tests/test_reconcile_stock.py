@@ -0,0 +1,43 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from inventory.models import StockItem, StockLocation, StockMovement
+
+
+class ReconcileStockTests(TestCase):
+    def setUp(self):
+        store = StockLocation.objects.create(name='Store')
+        self.item = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('0.30'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('100'), location=store,
+        )
+
+    def reconcile(self, *args):
+        out = StringIO()
+        call_command('reconcile_stock', *args, stdout=out)
+        return out.getvalue()
+
+    def test_sums_that_are_inexact_as_floats_still_match(self):
+        # 0.1 + 0.2 is not 0.3 in floating point, which is how SQLite sums decimals
+        for quantity in ('0.10', '0.20'):
+            StockMovement.objects.create(stock_item=self.item, movement_type='purchase', quantity=Decimal(quantity))
+
+        self.assertIn('All stock quantities match the movement ledger', self.reconcile())
+
+    def test_reports_a_real_difference(self):
+        StockMovement.objects.create(stock_item=self.item, movement_type='purchase', quantity=Decimal('0.20'))
+
+        self.assertIn('1 item(s) differ from the movement ledger', self.reconcile())
+
+    def test_fix_writes_a_quantity_that_then_reconciles(self):
+        for quantity in ('0.10', '0.20', '0.40'):
+            StockMovement.objects.create(stock_item=self.item, movement_type='purchase', quantity=Decimal(quantity))
+
+        self.assertIn('Updated 1 item(s) to match the ledger', self.reconcile('--fix'))
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_quantity, Decimal('0.70'))
+        self.assertIn('All stock quantities match the movement ledger', self.reconcile())
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from inventory.models import PurchaseOrder, StockItem, Vendor
+from inventory.reorder import create_suggested_orders, suggested_orders
+
+
+class SuggestedOrderTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='buyer', password=None)
+        self.vendor = Vendor.objects.create(name='Wholesale', phone='0110000000')
+        self.rice = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('3'),
+            min_quantity=Decimal('5'), max_quantity=Decimal('20'), unit_cost=Decimal('100'), vendor=self.vendor,
+        )
+        # Above its reorder point, so not suggested
+        StockItem.objects.create(
+            name='Flour', sku='FLOUR', category='Dry', unit='kg', current_quantity=Decimal('30'),
+            min_quantity=Decimal('5'), max_quantity=Decimal('20'), unit_cost=Decimal('80'), vendor=self.vendor,
+        )
+
+    def test_orders_low_items_up_to_their_target(self):
+        [group] = suggested_orders()
+
+        self.assertEqual(group['vendor_id'], self.vendor.id)
+        self.assertEqual([line['sku'] for line in group['lines']], ['RICE'])
+        self.assertEqual(group['lines'][0]['quantity'], Decimal('17.00'))
+        self.assertEqual(group['subtotal'], Decimal('1700'))
+
+    def test_forecast_reorder_point_takes_precedence(self):
+        StockItem.objects.filter(pk=self.rice.pk).update(suggested_min_quantity=Decimal('2'))
+
+        self.assertEqual(suggested_orders(), [])
+
+    def test_draft_order_counts_as_on_order(self):
+        [po] = create_suggested_orders(self.user)
+
+        self.assertEqual(po.status, 'draft')
+        self.assertEqual(po.items.get().quantity, Decimal('17'))
+        # The open draft already covers the shortfall
+        self.assertEqual(create_suggested_orders(self.user), [])
+        self.assertEqual(PurchaseOrder.objects.count(), 1)
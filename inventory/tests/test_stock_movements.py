@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory.models import StockItem, StockMovement
+from inventory.views import MOVEMENTS_PAGE_SIZE
+
+
+class StockMovementPagingTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='storekeeper', password=None))
+        self.item = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('0'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('100'),
+        )
+
+    def test_pages_cover_every_movement_once_when_timestamps_tie(self):
+        StockMovement.objects.bulk_create(
+            StockMovement(stock_item=self.item, movement_type='purchase', quantity=Decimal('1'))
+            for _ in range(MOVEMENTS_PAGE_SIZE + 5)
+        )
+        # Identical timestamps leave the id as the only tie-break
+        StockMovement.objects.update(created_at=timezone.now())
+
+        first = self.client.get(reverse('inventory:stock_movements'), secure=True)
+        second = self.client.get(reverse('inventory:stock_movements'), {'cursor': first.context['next_cursor']}, secure=True)
+
+        ids = [m.id for m in first.context['movements']] + [m.id for m in second.context['movements']]
+        self.assertEqual(len(first.context['movements']), MOVEMENTS_PAGE_SIZE)
+        self.assertIsNone(second.context['next_cursor'])
+        self.assertEqual(ids, list(StockMovement.objects.order_by('-id').values_list('id', flat=True)))
+
+    def test_item_history_has_running_balance(self):
+        for movement_type, quantity in [('purchase', '10'), ('sale', '3'), ('waste', '2'), ('purchase', '4')]:
+            StockMovement.objects.create(stock_item=self.item, movement_type=movement_type, quantity=Decimal(quantity))
+
+        response = self.client.get(reverse('inventory:stock_item_history', args=[self.item.id]), secure=True)
+
+        # Newest first, each row showing the balance after it
+        self.assertEqual([m.balance for m in response.context['movements']], [Decimal('9'), Decimal('5'), Decimal('7'), Decimal('10')])
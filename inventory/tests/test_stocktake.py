@@ -0,0 +1,138 @@
+import io
+import json
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from inventory.models import StockItem, StockLevel, StockLocation, StockMovement
+from inventory.stocktake import compute_variances, parse_counts_csv, post_stocktake
+
+
+class PostStocktakeTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='counter', password=None)
+        self.store = StockLocation.objects.create(name='Store')
+        self.item = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('10'),
+            min_quantity=Decimal('2'), unit_cost=Decimal('100'), location=self.store,
+        )
+
+    def test_new_home_level_holds_counted_quantity(self):
+        post_stocktake({'RICE': Decimal('7')}, self.user)
+
+        level = StockLevel.objects.get(stock_item=self.item, location=self.store)
+        self.assertEqual(level.quantity, Decimal('7'))
+        movement = StockMovement.objects.get(stock_item=self.item, movement_type='adjustment')
+        self.assertEqual(movement.quantity, Decimal('-3'))
+
+    def test_existing_home_level_gets_variance(self):
+        StockLevel.objects.create(stock_item=self.item, location=self.store, quantity=Decimal('10'))
+
+        post_stocktake({'RICE': Decimal('12')}, self.user)
+
+        self.assertEqual(StockLevel.objects.get(stock_item=self.item).quantity, Decimal('12'))
+
+
+
+class LocationStocktakeTests(TestCase):
+    """Counting one location compares with its level, not the total held everywhere"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='counter', password=None)
+        self.store = StockLocation.objects.create(name='Store')
+        self.bar = StockLocation.objects.create(name='Bar')
+        self.item = StockItem.objects.create(
+            name='Rum', sku='RUM', category='Bar', unit='l', current_quantity=Decimal('10'),
+            min_quantity=Decimal('2'), unit_cost=Decimal('100'), location=self.store,
+        )
+        StockLevel.objects.create(stock_item=self.item, location=self.store, quantity=Decimal('6'))
+        StockLevel.objects.create(stock_item=self.item, location=self.bar, quantity=Decimal('4'))
+
+    def test_matching_count_at_one_location_has_no_variance(self):
+        lines, _ = compute_variances({'RUM': Decimal('4')}, location_id=self.bar.id)
+
+        self.assertEqual(lines[0]['current_quantity'], Decimal('4'))
+        self.assertEqual(lines[0]['variance'], 0)
+        self.assertEqual(post_stocktake({'RUM': Decimal('4')}, self.user, location_id=self.bar.id), 0)
+
+    def test_variance_is_booked_at_the_counted_location(self):
+        post_stocktake({'RUM': Decimal('3')}, self.user, location_id=self.bar.id)
+
+        levels = dict(StockLevel.objects.values_list('location__name', 'quantity'))
+        self.assertEqual(levels, {'Store': Decimal('6'), 'Bar': Decimal('3')})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_quantity, Decimal('9'))
+        movement = StockMovement.objects.get(movement_type='adjustment')
+        self.assertEqual((movement.quantity, movement.from_location), (Decimal('-1'), self.bar))
+
+    def test_location_without_a_level_gets_one(self):
+        kitchen = StockLocation.objects.create(name='Kitchen')
+
+        post_stocktake({'RUM': Decimal('2')}, self.user, location_id=kitchen.id)
+
+        self.assertEqual(StockLevel.objects.get(location=kitchen).quantity, Decimal('2'))
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_quantity, Decimal('12'))
+
+    def test_whole_count_compares_with_the_total(self):
+        lines, _ = compute_variances({'RUM': Decimal('10')})
+
+        self.assertEqual(lines[0]['variance'], 0)
+
+    def test_view_posts_against_the_chosen_location(self):
+        self.client.force_login(self.user)
+
+        response = self.client.post(
+            reverse('inventory:stocktake'),
+            {'action': 'post', 'counts': json.dumps({'RUM': '5'}), 'location': self.bar.id}, secure=True,
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StockLevel.objects.get(location=self.bar).quantity, Decimal('5'))
+
+class ParseCountsCsvTests(TestCase):
+    def test_non_finite_quantities_are_rejected(self):
+        upload = io.BytesIO(b'sku,counted_quantity\nRICE,nan\nSALT,Infinity\nFLOUR,sNaN\nSUGAR,4\n')
+
+        counts, errors = parse_counts_csv(upload)
+
+        self.assertEqual(counts, {'SUGAR': Decimal('4')})
+        self.assertEqual(len(errors), 3)
+
+
+class StocktakeViewTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='counter', password=None)
+        self.client.force_login(self.user)
+        store = StockLocation.objects.create(name='Store')
+        StockItem.objects.bulk_create(
+            StockItem(
+                name=f'Item {n}', sku=f'SKU-{n:05d}', category='Dry', unit='kg', current_quantity=Decimal('10'),
+                min_quantity=Decimal('2'), unit_cost=Decimal('100'), location=store,
+            )
+            for n in range(1200)
+        )
+
+    def test_posting_a_large_stocktake_passes_the_middleware(self):
+        counts = json.dumps({f'SKU-{n:05d}': '7.5' for n in range(1200)})
+        self.assertGreater(len(counts), settings.SQL_INJECTION_MAX_VALUE_LENGTH)
+
+        response = self.client.post(
+            reverse('inventory:stocktake'), {'action': 'post', 'counts': counts}, secure=True,
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(StockItem.objects.filter(current_quantity=Decimal('7.5')).count(), 1200)
+        self.assertEqual(StockMovement.objects.filter(movement_type='adjustment').count(), 1200)
+
+    def test_other_long_fields_are_still_rejected(self):
+        response = self.client.post(
+            reverse('inventory:stocktake'),
+            {'action': 'post', 'counts': '{}', 'reference': 'x' * (settings.SQL_INJECTION_MAX_VALUE_LENGTH + 1)},
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,48 @@
+import json
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from inventory.models import StockItem, StockLevel, StockLocation, StockMovement
+
+
+class TransferStockTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user(username='storekeeper', password=None))
+        self.store = StockLocation.objects.create(name='Store')
+        self.bar = StockLocation.objects.create(name='Bar')
+        self.item = StockItem.objects.create(
+            name='Gin', sku='GIN', category='Spirits', unit='l', current_quantity=Decimal('10'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('5000'), location=self.store,
+        )
+        StockLevel.objects.create(stock_item=self.item, location=self.store, quantity=Decimal('10'))
+
+    def transfer(self, quantity):
+        return self.client.post(
+            reverse('inventory:transfer_stock', args=[self.item.id]),
+            json.dumps({'from_location_id': self.store.id, 'to_location_id': self.bar.id, 'quantity': quantity}),
+            content_type='application/json', secure=True,
+        )
+
+    def levels(self):
+        return dict(StockLevel.objects.filter(stock_item=self.item).values_list('location__name', 'quantity'))
+
+    def test_moves_stock_between_levels(self):
+        response = self.transfer('4')
+
+        self.assertTrue(response.json()['success'])
+        self.assertEqual(self.levels(), {'Store': Decimal('6'), 'Bar': Decimal('4')})
+        movement = StockMovement.objects.get(stock_item=self.item)
+        self.assertEqual((movement.movement_type, movement.from_location, movement.to_location), ('transfer', self.store, self.bar))
+        # A transfer moves stock around without changing the total held
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.current_quantity, Decimal('10'))
+
+    def test_refuses_to_take_more_than_the_source_holds(self):
+        response = self.transfer('11')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.levels(), {'Store': Decimal('10')})
+        self.assertFalse(StockMovement.objects.exists())
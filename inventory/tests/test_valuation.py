@@ -0,0 +1,65 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory.models import StockItem, StockMovement, StockSnapshot
+from inventory.valuation import end_of_day, stock_as_of
+
+
+class StockAsOfTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.item = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('10'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('100'),
+        )
+        StockItem.objects.filter(pk=self.item.pk).update(created_at=end_of_day(self.today - timedelta(days=5)))
+
+    def move(self, movement_type, quantity, days_ago):
+        movement = StockMovement.objects.create(stock_item=self.item, movement_type=movement_type, quantity=Decimal(quantity))
+        # Midday on the given day, well clear of both day boundaries
+        StockMovement.objects.filter(pk=movement.pk).update(
+            created_at=end_of_day(self.today - timedelta(days=days_ago)) - timedelta(hours=12)
+        )
+
+    def test_without_snapshots_rolls_back_from_current_quantity(self):
+        self.move('sale', '3', days_ago=1)
+        self.move('purchase', '5', days_ago=0)
+
+        position = stock_as_of(self.today - timedelta(days=2))[self.item.id]
+
+        # 10 now, less today's purchase, plus yesterday's sale
+        self.assertEqual(position['quantity'], Decimal('8'))
+        self.assertEqual(position['value'], Decimal('800.00'))
+
+    def test_rolls_forward_from_the_latest_snapshot(self):
+        snapshot_date = self.today - timedelta(days=3)
+        StockSnapshot.objects.create(
+            stock_item=self.item, snapshot_date=snapshot_date, quantity=Decimal('20'),
+            unit_cost=Decimal('100'), value=Decimal('2000'), taken_at=end_of_day(snapshot_date),
+        )
+        self.move('waste', '2', days_ago=2)
+        self.move('sale', '4', days_ago=0)
+
+        positions = stock_as_of(self.today - timedelta(days=1))
+
+        # The snapshot wins over current_quantity, and today's sale is after the cutoff
+        self.assertEqual(positions[self.item.id]['quantity'], Decimal('18'))
+
+    def test_items_created_after_the_date_are_left_out(self):
+        self.assertEqual(stock_as_of(self.today - timedelta(days=6)), {})
+
+    def test_snapshot_command_rebuilds_a_past_day_from_the_ledger(self):
+        self.move('purchase', '4', days_ago=0)
+        day = self.today - timedelta(days=1)
+
+        call_command('snapshot_stock', '--date', day.isoformat(), stdout=StringIO())
+
+        snapshot = StockSnapshot.objects.get(stock_item=self.item, snapshot_date=day)
+        self.assertEqual(snapshot.quantity, Decimal('6'))
+        self.assertEqual(snapshot.value, Decimal('600.00'))
+        self.assertEqual(snapshot.taken_at, end_of_day(day))
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from inventory import vendor_analytics
+from inventory.models import PurchaseOrder, Vendor
+
+
+class VendorSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.vendor = Vendor.objects.create(name='Fresh Farms', phone='0770000000')
+        self.today = timezone.localdate()
+
+    def tearDown(self):
+        cache.clear()
+
+    def receive(self, number, received_date, total):
+        po = PurchaseOrder.objects.create(
+            po_number=number, vendor=self.vendor, status='received', expected_delivery=self.today,
+            total_amount=total,
+        )
+        PurchaseOrder.objects.filter(id=po.id).update(order_date=self.today, received_date=received_date)
+
+    def test_lead_time_is_never_negative(self):
+        # A receipt dated the UTC day before the local order date
+        self.receive('PO-1', self.today - timedelta(days=1), Decimal('100.00'))
+        self.receive('PO-2', self.today + timedelta(days=2), Decimal('50.00'))
+
+        summary = {row['name']: row for row in vendor_analytics.vendor_summary()}['Fresh Farms']
+
+        self.assertEqual(summary['lead_p50'], 0)
+        self.assertEqual(summary['lead_p90'], 2)
+        self.assertEqual(summary['average_lead'], 1.0)
+
+    def test_spend_is_rounded_to_cents(self):
+        self.receive('PO-1', self.today, Decimal('10.10'))
+        self.receive('PO-2', self.today, Decimal('20.20'))
+
+        summary = vendor_analytics.vendor_summary()[0]
+
+        self.assertEqual(str(summary['spend']), '30.30')
@@ -7,9 +7,12 @@ urlpatterns = [
     path('', views.inventory_list, name='inventory_list'),
     path('stock-items/', views.stock_items, name='stock_items'),
     path('alerts/', views.stock_alerts, name='stock_alerts'),
+    path('expiring/', views.expiring_stock, name='expiring_stock'),
+    path('lots/<int:lot_id>/write-off/', views.write_off_lot, name='write_off_lot'),
     
     # Vendors
     path('vendors/', views.vendors_list, name='vendors_list'),
+    path('vendors/analytics/', views.vendor_analytics, name='vendor_analytics'),
     path('vendors/add/', views.add_vendor, name='add_vendor'),
     path('vendors/<int:vendor_id>/edit/', views.edit_vendor, name='edit_vendor'),
     path('vendors/<int:vendor_id>/delete/', views.delete_vendor, name='delete_vendor'),
@@ -17,6 +20,7 @@ urlpatterns = [
     # Purchase Orders
     path('purchase-orders/', views.purchase_orders, name='purchase_orders'),
     path('purchase-orders/create/', views.create_purchase_order, name='create_purchase_order'),
+    path('purchase-orders/suggest/', views.suggest_orders, name='suggest_orders'),
     path('purchase-orders/<int:po_id>/', views.view_purchase_order, name='view_purchase_order'),
     path('purchase-orders/<int:po_id>/edit/', views.edit_purchase_order, name='edit_purchase_order'),
     path('purchase-orders/<int:po_id>/delete/', views.delete_purchase_order, name='delete_purchase_order'),
@@ -24,6 +28,9 @@ urlpatterns = [
     path('purchase-orders/<int:po_id>/receive/', views.receive_purchase_order, name='receive_purchase_order'),
     
     path('movements/', views.stock_movements, name='stock_movements'),
+    path('movements/item/<int:item_id>/', views.stock_item_history, name='stock_item_history'),
     path('add-item/', views.add_stock_item, name='add_stock_item'),
     path('update-stock/<int:item_id>/', views.update_stock, name='update_stock'),
+    path('transfer-stock/<int:item_id>/', views.transfer_stock, name='transfer_stock'),
+    path('stocktake/', views.stocktake, name='stocktake'),
 ]
@@ -0,0 +1,82 @@
+"""
+Point-in-time stock valuation built on daily StockSnapshot rows
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import Max, Sum
+from django.utils import timezone
+
+
+def start_of_day(day):
+    """Aware datetime for midnight at the start of the given local date"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def end_of_day(day):
+    """Aware datetime for midnight at the end of the given local date"""
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def stock_as_of(as_of_date):
+    """
+    Return {stock_item_id: {'quantity', 'unit_cost', 'value'}} at the end of as_of_date.
+
+    Starts from the latest snapshot on or before the date and applies only the
+    movements recorded after it was taken, so the cost does not grow with the
+    size of the ledger. Items missing from that snapshot are rolled back from
+    their current quantity instead.
+    """
+    from .models import StockItem, StockMovement, StockSnapshot
+
+    cutoff = end_of_day(as_of_date)
+    positions = {}
+
+    latest = StockSnapshot.objects.filter(
+        snapshot_date__lte=as_of_date
+    ).aggregate(snapshot_date=Max('snapshot_date'))['snapshot_date']
+
+    if latest:
+        snapshots = StockSnapshot.objects.filter(snapshot_date=latest).values_list(
+            'stock_item_id', 'quantity', 'unit_cost', 'taken_at'
+        )
+        taken_at = None
+        for item_id, quantity, unit_cost, taken_at in snapshots:
+            positions[item_id] = [quantity, unit_cost]
+
+        if taken_at and taken_at < cutoff:
+            deltas = StockMovement.objects.filter(
+                created_at__gt=taken_at,
+                created_at__lt=cutoff,
+            ).order_by().values('stock_item_id').annotate(delta=Sum(StockMovement.signed_quantity()))
+
+            for row in deltas:
+                if row['stock_item_id'] in positions:
+                    positions[row['stock_item_id']][0] += row['delta']
+
+    # Items without a snapshot (new since, or no snapshots at all) are rolled
+    # back from their live quantity
+    missing = {}
+    items = StockItem.objects.filter(created_at__lt=cutoff).values_list('id', 'current_quantity', 'unit_cost')
+    for item_id, quantity, unit_cost in items:
+        if item_id not in positions:
+            missing[item_id] = [quantity, unit_cost]
+
+    if missing:
+        deltas = StockMovement.objects.filter(
+            created_at__gte=cutoff,
+        ).order_by().values('stock_item_id').annotate(delta=Sum(StockMovement.signed_quantity()))
+
+        for row in deltas:
+            if row['stock_item_id'] in missing:
+                missing[row['stock_item_id']][0] -= row['delta']
+        positions.update(missing)
+
+    return {
+        item_id: {
+            'quantity': quantity,
+            'unit_cost': unit_cost,
+            'value': (quantity * unit_cost).quantize(Decimal('0.01')),
+        }
+        for item_id, (quantity, unit_cost) in positions.items()
+    }
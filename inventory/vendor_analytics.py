@@ -0,0 +1,153 @@
+"""
+Vendor performance from purchase-order history: lead-time percentiles,
+on-time delivery rate and per-item price trends, computed with grouped
+aggregates and window functions and cached for the day
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q, Sum, Value, Window
+from django.db.models.functions import FirstValue, Greatest, RowNumber
+from django.utils import timezone
+
+from core import metrics
+
+PERCENTILES = [50, 90]
+
+
+def _seconds_until_midnight():
+    now = timezone.localtime()
+    midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(int((midnight - now).total_seconds()), 60)
+
+
+def _cached(key, compute):
+    """Cache a result until the end of the current day"""
+    key = f'vendor_analytics:{timezone.localdate()}:{key}'
+    result = cache.get(key)
+    metrics.cache_lookup('vendor_analytics', result is not None)
+    if result is None:
+        result = compute()
+        cache.set(key, result, _seconds_until_midnight())
+    return result
+
+
+def vendor_summary():
+    """Per-vendor order counts, spend, on-time rate and lead-time percentiles"""
+    return _cached('summary', _vendor_summary)
+
+
+def price_trends(vendor_id):
+    """Per-item price history for one vendor"""
+    return _cached(f'prices:{vendor_id}', lambda: _price_trends(vendor_id))
+
+
+def _cost(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+
+def _lead_time():
+    # Clamped at zero: POs received before a timezone fix could carry a received_date a day early
+    return Greatest(
+        ExpressionWrapper(F('received_date') - F('order_date'), output_field=DurationField()),
+        Value(timedelta(0), output_field=DurationField()),
+    )
+
+
+def _vendor_summary():
+    from .models import PurchaseOrder, Vendor
+
+    received = PurchaseOrder.objects.filter(status='received', received_date__isnull=False)
+
+    # Order counts, spend and on-time deliveries in one grouped query
+    totals = {
+        row['vendor_id']: row
+        for row in received.order_by().values('vendor_id').annotate(
+            orders=Count('id'),
+            spend=Sum('total_amount'),
+            on_time=Count('id', filter=Q(received_date__lte=F('expected_delivery'))),
+            average_lead=Avg(_lead_time()),
+            last_received=Max('received_date'),
+        )
+    }
+
+    # Lead-time histogram per vendor: one row per vendor and distinct lead
+    # time rather than one per order; percentiles are read off the running total
+    histogram = received.order_by().annotate(lead=_lead_time()).values('vendor_id', 'lead').annotate(
+        orders=Count('id'),
+    ).order_by('vendor_id', 'lead')
+
+    percentiles = {}
+    cumulative = {}
+    for row in histogram:
+        vendor_id = row['vendor_id']
+        cumulative[vendor_id] = cumulative.get(vendor_id, 0) + row['orders']
+        found = percentiles.setdefault(vendor_id, {})
+        for p in PERCENTILES:
+            if p not in found and cumulative[vendor_id] * 100 >= p * totals[vendor_id]['orders']:
+                found[p] = row['lead'].days
+
+    vendors = []
+    for vendor_id, name, is_active in Vendor.objects.values_list('id', 'name', 'is_active').order_by('name'):
+        row = totals.get(vendor_id)
+        if not row:
+            vendors.append({'id': vendor_id, 'name': name, 'is_active': is_active, 'orders': 0})
+            continue
+        vendors.append({
+            'id': vendor_id,
+            'name': name,
+            'is_active': is_active,
+            'orders': row['orders'],
+            'spend': _cost(row['spend'] or 0),
+            'on_time_rate': round(row['on_time'] * 100 / row['orders'], 1),
+            'average_lead': round(row['average_lead'].total_seconds() / 86400, 1) if row['average_lead'] is not None else None,
+            'lead_p50': percentiles[vendor_id].get(50),
+            'lead_p90': percentiles[vendor_id].get(90),
+            'last_received': row['last_received'],
+        })
+    return vendors
+
+
+def _price_trends(vendor_id):
+    from .models import PurchaseOrderItem
+
+    partition = [F('stock_item_id')]
+
+    # Window functions over each item's purchase history; keeping only the
+    # latest row per item leaves one row per item with the whole history folded in
+    rows = PurchaseOrderItem.objects.filter(
+        purchase_order__vendor_id=vendor_id,
+        purchase_order__status='received',
+    ).annotate(
+        recency=Window(RowNumber(), partition_by=partition, order_by=[F('purchase_order__order_date').desc(), F('id').desc()]),
+        first_cost=Window(FirstValue('unit_cost'), partition_by=partition, order_by=[F('purchase_order__order_date').asc(), F('id').asc()]),
+        purchases=Window(Count('id'), partition_by=partition),
+        min_cost=Window(Min('unit_cost'), partition_by=partition),
+        max_cost=Window(Max('unit_cost'), partition_by=partition),
+        average_cost=Window(Avg('unit_cost'), partition_by=partition),
+        total_quantity=Window(Sum('quantity'), partition_by=partition),
+    ).filter(recency=1).values(
+        'stock_item_id', 'stock_item__name', 'stock_item__unit', 'unit_cost', 'purchase_order__order_date',
+        'first_cost', 'purchases', 'min_cost', 'max_cost', 'average_cost', 'total_quantity',
+    ).order_by('stock_item__name')
+
+    trends = []
+    for row in rows:
+        first_cost = _cost(row['first_cost'])
+        latest_cost = row['unit_cost']
+        trends.append({
+            'stock_item_id': row['stock_item_id'],
+            'name': row['stock_item__name'],
+            'unit': row['stock_item__unit'],
+            'purchases': row['purchases'],
+            'total_quantity': row['total_quantity'],
+            'first_cost': first_cost,
+            'latest_cost': latest_cost,
+            'last_ordered': row['purchase_order__order_date'],
+            'min_cost': _cost(row['min_cost']),
+            'max_cost': _cost(row['max_cost']),
+            'average_cost': _cost(row['average_cost']),
+            'change_percent': round(float((latest_cost - first_cost) / first_cost * 100), 1) if first_cost else None,
+        })
+    return trends
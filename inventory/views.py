@@ -2,21 +2,28 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Sum, Count, Q, F
+from django.urls import reverse
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Sum, Count, Q, F, Window, Prefetch, DecimalField
+from datetime import datetime, timedelta
 from decimal import Decimal
+from urllib.parse import urlencode
 import json
 
 
 @login_required
 def inventory_list(request):
-    from .models import StockItem
+    from .models import StockItem, StockLevel
     
     # Get filter parameters
     search = request.GET.get('search', '')
     category = request.GET.get('category', '')
     status = request.GET.get('status', '')
     
-    items = StockItem.objects.all().select_related('vendor', 'location')
+    items = StockItem.objects.all().select_related('vendor', 'location').prefetch_related(
+        Prefetch('levels', queryset=StockLevel.objects.select_related('location').order_by('location__name'))
+    )
     
     # Apply filters
     if search:
@@ -24,26 +31,34 @@ def inventory_list(request):
     if category:
         items = items.filter(category=category)
     if status == 'low':
-        items = [item for item in items if item.is_low_stock]
+        items = items.filter(current_quantity__lte=F('min_quantity'))
     elif status == 'out':
-        items = [item for item in items if item.current_quantity == 0]
+        items = items.filter(current_quantity=0)
     
-    # Calculate statistics
-    all_items = StockItem.objects.all()
-    low_stock_count = sum(1 for item in all_items if item.is_low_stock)
-    out_of_stock_count = sum(1 for item in all_items if item.current_quantity == 0)
-    in_stock_count = sum(1 for item in all_items if item.current_quantity > 0)
-    total_value = sum(item.stock_value for item in all_items)
+    # Calculate statistics in a single aggregate query
+    stats = StockItem.objects.aggregate(
+        low_stock_count=Count('id', filter=Q(current_quantity__lte=F('min_quantity'))),
+        out_of_stock_count=Count('id', filter=Q(current_quantity=0)),
+        in_stock_count=Count('id', filter=Q(current_quantity__gt=0)),
+        total_value=Sum(F('current_quantity') * F('unit_cost'), output_field=DecimalField()),
+    )
+    
+    # Stock held at each location, one grouped query across all levels
+    location_totals = StockLevel.objects.values('location_id', 'location__name').annotate(
+        item_count=Count('id', filter=Q(quantity__gt=0)),
+        value=Sum(F('quantity') * F('stock_item__unit_cost'), output_field=DecimalField()),
+    ).order_by('location__name')
     
     # Get unique categories
     categories = StockItem.objects.values_list('category', flat=True).distinct()
     
     context = {
         'items': items,
-        'low_stock_count': low_stock_count,
-        'out_of_stock_count': out_of_stock_count,
-        'in_stock_count': in_stock_count,
-        'total_value': total_value,
+        'low_stock_count': stats['low_stock_count'],
+        'out_of_stock_count': stats['out_of_stock_count'],
+        'in_stock_count': stats['in_stock_count'],
+        'total_value': stats['total_value'] or Decimal('0'),
+        'location_totals': location_totals,
         'categories': categories,
         'current_search': search,
         'current_category': category,
@@ -61,14 +76,18 @@ def stock_items(request):
 
 @login_required
 def stock_alerts(request):
-    from .models import StockAlert, StockItem
+    from .models import StockAlert, StockItem, StockLevel
     
     alerts = StockAlert.objects.filter(is_resolved=False).select_related('stock_item').order_by('-created_at')
     
-    # Get low stock items
-    all_items = StockItem.objects.all()
-    low_stock_items = [item for item in all_items if item.is_low_stock]
-    out_of_stock_items = [item for item in all_items if item.current_quantity == 0]
+    # Get low stock items, with their per-location breakdown
+    low_stock = StockItem.objects.filter(
+        current_quantity__lte=F('min_quantity')
+    ).select_related('vendor').prefetch_related(
+        Prefetch('levels', queryset=StockLevel.objects.select_related('location').order_by('location__name'))
+    )
+    low_stock_items = list(low_stock)
+    out_of_stock_items = [item for item in low_stock_items if item.current_quantity == 0]
     
     context = {
         'alerts': alerts,
@@ -79,6 +98,62 @@ def stock_alerts(request):
     return render(request, 'inventory/stock_alerts.html', context)
 
 
+@login_required
+def expiring_stock(request):
+    """Lots that have expired or expire soon, plus recent expiry write-offs"""
+    from .models import StockMovement
+    from .lots import expiring_lots
+    
+    try:
+        days = max(int(request.GET.get('days', 7)), 0)
+    except ValueError:
+        days = 7
+    
+    today = timezone.localdate()
+    lots = list(expiring_lots(days))
+    expired = [lot for lot in lots if lot.expiry_date < today]
+    
+    # Waste booked against expired lots over the last 30 days
+    write_offs = StockMovement.objects.filter(
+        movement_type='waste',
+        reference__startswith='Expired lot',
+        created_at__gte=timezone.now() - timedelta(days=30),
+    ).aggregate(
+        count=Count('id'),
+        value=Sum(F('quantity') * F('unit_cost'), output_field=DecimalField()),
+    )
+    
+    context = {
+        'days': days,
+        'today': today,
+        'lots': lots,
+        'expired_count': len(expired),
+        'expiring_count': len(lots) - len(expired),
+        'at_risk_value': sum((lot.value for lot in lots), Decimal('0')),
+        'write_off_count': write_offs['count'],
+        'write_off_value': write_offs['value'] or Decimal('0'),
+    }
+    
+    return render(request, 'inventory/expiring_stock.html', context)
+
+
+@login_required
+def write_off_lot(request, lot_id):
+    """Book the remaining quantity of an expired lot as waste"""
+    from .lots import write_off_lot as write_off
+    
+    if request.method == 'POST':
+        try:
+            quantity = write_off(lot_id, request.user)
+            if not quantity:
+                return JsonResponse({'success': False, 'error': 'This lot is already empty'}, status=400)
+            return JsonResponse({'success': True, 'message': f'{quantity} written off as waste'})
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+
 @login_required
 def purchase_orders(request):
     from .models import PurchaseOrder
@@ -106,24 +181,130 @@ def purchase_orders(request):
     return render(request, 'inventory/purchase_orders.html', context)
 
 
+MOVEMENTS_PAGE_SIZE = 50
+
+
+def _parse_cursor(value):
+    """Decode a '<created_at iso>|<id>' keyset cursor, or None if missing/invalid"""
+    try:
+        created_at, movement_id = value.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(movement_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _keyset_page(movements, cursor):
+    """
+    Return (page, next_cursor) for movements ordered newest first.
+    Seeks past the cursor on the (created_at, id) index instead of using OFFSET.
+    """
+    position = _parse_cursor(cursor)
+    if position:
+        created_at, movement_id = position
+        movements = movements.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=movement_id)
+        )
+    
+    page = list(movements.order_by('-created_at', '-id')[:MOVEMENTS_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > MOVEMENTS_PAGE_SIZE:
+        page = page[:MOVEMENTS_PAGE_SIZE]
+        last = page[-1]
+        next_cursor = f'{last.created_at.isoformat()}|{last.id}'
+    
+    return page, next_cursor
+
+
 @login_required
 def stock_movements(request):
-    """View all stock movements"""
-    from .models import StockMovement
+    """View all stock movements, filtered and paged by (created_at, id)"""
+    from .models import StockMovement, StockItem, StockLocation
+    from .valuation import start_of_day, end_of_day
+    
+    item_id = request.GET.get('item', '')
+    movement_type = request.GET.get('type', '')
+    location_id = request.GET.get('location', '')
+    start_date = request.GET.get('start_date', '')
+    end_date = request.GET.get('end_date', '')
+    
+    movements = StockMovement.objects.select_related('stock_item', 'created_by', 'from_location', 'to_location')
+    
+    if item_id.isdigit():
+        movements = movements.filter(stock_item_id=item_id)
+    if movement_type:
+        movements = movements.filter(movement_type=movement_type)
+    if location_id.isdigit():
+        movements = movements.filter(
+            Q(from_location_id=location_id) | Q(to_location_id=location_id) | Q(stock_item__location_id=location_id)
+        )
+    # Compare against day boundaries rather than created_at__date so the index is used
+    try:
+        if start_date:
+            movements = movements.filter(created_at__gte=start_of_day(datetime.strptime(start_date, '%Y-%m-%d').date()))
+        if end_date:
+            movements = movements.filter(created_at__lt=end_of_day(datetime.strptime(end_date, '%Y-%m-%d').date()))
+    except ValueError:
+        messages.error(request, 'Dates must be in YYYY-MM-DD format')
+    
+    page, next_cursor = _keyset_page(movements, request.GET.get('cursor'))
     
-    movements = StockMovement.objects.all().select_related('stock_item', 'created_by', 'from_location', 'to_location').order_by('-created_at')[:100]
+    filters = {
+        'item': item_id,
+        'type': movement_type,
+        'location': location_id,
+        'start_date': start_date,
+        'end_date': end_date,
+    }
+    filter_query = urlencode({key: value for key, value in filters.items() if value})
     
     context = {
-        'movements': movements,
+        'movements': page,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+        'filter_query': filter_query,
+        'filters': filters,
+        'stock_items': StockItem.objects.only('id', 'name', 'sku').order_by('name'),
+        'locations': StockLocation.objects.filter(is_active=True),
+        'movement_types': StockMovement.MOVEMENT_TYPE_CHOICES,
     }
     
     return render(request, 'inventory/stock_movements.html', context)
 
 
+@login_required
+def stock_item_history(request, item_id):
+    """Movement history for one item with a running ledger balance"""
+    from .models import StockItem, StockMovement
+    
+    item = get_object_or_404(StockItem, id=item_id)
+    
+    # Running balance is a SUM() OVER window evaluated in the database. Paging
+    # keeps only rows older than the cursor, and a row's balance depends only
+    # on older rows, so the balances on every page stay correct.
+    movements = StockMovement.objects.filter(stock_item=item).select_related('created_by').annotate(
+        signed=StockMovement.signed_quantity(),
+        balance=Window(
+            expression=Sum(StockMovement.signed_quantity()),
+            order_by=[F('created_at').asc(), F('id').asc()],
+        ),
+    )
+    
+    page, next_cursor = _keyset_page(movements, request.GET.get('cursor'))
+    
+    context = {
+        'item': item,
+        'movements': page,
+        'next_cursor': next_cursor,
+        'is_first_page': not request.GET.get('cursor'),
+    }
+    
+    return render(request, 'inventory/stock_item_history.html', context)
+
+
 @login_required
 def add_stock_item(request):
     """Add new stock item"""
-    from .models import StockItem, Vendor, StockLocation
+    from .models import StockItem, StockMovement, StockLevel, Vendor, StockLocation
     
     if request.method == 'POST':
         try:
@@ -149,6 +330,19 @@ def add_stock_item(request):
             
             item.save()
             
+            # Record the opening balance so the movement ledger matches current_quantity
+            if item.current_quantity:
+                StockMovement.objects.create(
+                    stock_item=item,
+                    movement_type='adjustment',
+                    quantity=item.current_quantity,
+                    unit_cost=item.unit_cost,
+                    to_location_id=item.location_id,
+                    reference='Opening stock',
+                    created_by=request.user
+                )
+                StockLevel.adjust(item.id, item.location_id, item.current_quantity)
+            
             return JsonResponse({'success': True, 'message': 'Stock item added successfully', 'item_id': item.id})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
@@ -168,7 +362,9 @@ def add_stock_item(request):
 @login_required
 def update_stock(request, item_id):
     """Update stock quantity"""
-    from .models import StockItem, StockMovement
+    from .models import StockItem, StockMovement, StockLevel
+    from .lots import consume_fefo
+    from menu.availability import recompute_sellable_for_stock_items
     
     if request.method == 'POST':
         try:
@@ -177,25 +373,43 @@ def update_stock(request, item_id):
             
             movement_type = data['movement_type']
             quantity = Decimal(data['quantity'])
+            location_id = data.get('location_id') or item.location_id
             
-            # Create stock movement
-            movement = StockMovement.objects.create(
-                stock_item=item,
-                movement_type=movement_type,
-                quantity=quantity,
-                unit_cost=item.unit_cost,
-                reference=data.get('reference', ''),
-                notes=data.get('notes', ''),
-                created_by=request.user
-            )
+            if movement_type in StockMovement.INBOUND_TYPES:
+                delta = quantity
+            elif movement_type in StockMovement.OUTBOUND_TYPES:
+                delta = -quantity
+            else:
+                delta = Decimal('0')
             
-            # Update stock quantity
-            if movement_type in ['purchase', 'adjustment']:
-                item.current_quantity += quantity
-            elif movement_type in ['sale', 'waste']:
-                item.current_quantity -= quantity
+            with transaction.atomic():
+                # Create stock movement
+                movement = StockMovement.objects.create(
+                    stock_item=item,
+                    movement_type=movement_type,
+                    quantity=quantity,
+                    unit_cost=item.unit_cost,
+                    to_location_id=location_id if delta > 0 else None,
+                    from_location_id=location_id if delta < 0 else None,
+                    reference=data.get('reference', ''),
+                    notes=data.get('notes', ''),
+                    created_by=request.user
+                )
                 
-            item.save()
+                # Update stock quantity in the database so concurrent updates are not lost
+                StockItem.objects.filter(id=item.id).update(
+                    current_quantity=F('current_quantity') + delta,
+                    updated_at=timezone.now()
+                )
+                StockLevel.adjust(item.id, location_id, delta)
+                
+                # Outgoing stock is drawn from the earliest-expiring lots
+                if delta < 0:
+                    consume_fefo({item.id: -delta})
+                if delta:
+                    recompute_sellable_for_stock_items([item.id])
+            
+            item.refresh_from_db(fields=['current_quantity'])
             
             return JsonResponse({
                 'success': True,
@@ -208,6 +422,185 @@ def update_stock(request, item_id):
     return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
 
 
+@login_required
+def transfer_stock(request, item_id):
+    """Move stock of one item between locations (bar, kitchen, store)"""
+    from .models import StockItem, StockMovement, StockLevel
+    
+    if request.method == 'POST':
+        try:
+            item = get_object_or_404(StockItem, id=item_id)
+            data = json.loads(request.body)
+            
+            from_location_id = int(data['from_location_id'])
+            to_location_id = int(data['to_location_id'])
+            quantity = Decimal(data['quantity'])
+            
+            if quantity <= 0:
+                return JsonResponse({'success': False, 'error': 'Quantity must be greater than 0'}, status=400)
+            if from_location_id == to_location_id:
+                return JsonResponse({'success': False, 'error': 'Source and destination must differ'}, status=400)
+            
+            with transaction.atomic():
+                # Conditional decrement: fails instead of going negative, with no read-modify-write
+                taken = StockLevel.objects.filter(
+                    stock_item=item, location_id=from_location_id, quantity__gte=quantity
+                ).update(quantity=F('quantity') - quantity)
+                
+                if not taken:
+                    return JsonResponse({'success': False, 'error': 'Not enough stock at the source location'}, status=400)
+                
+                StockLevel.adjust(item.id, to_location_id, quantity)
+                
+                StockMovement.objects.create(
+                    stock_item=item,
+                    movement_type='transfer',
+                    quantity=quantity,
+                    unit_cost=item.unit_cost,
+                    from_location_id=from_location_id,
+                    to_location_id=to_location_id,
+                    reference=data.get('reference', ''),
+                    notes=data.get('notes', ''),
+                    created_by=request.user
+                )
+            
+            levels = StockLevel.objects.filter(stock_item=item).values_list('location_id', 'quantity')
+            
+            return JsonResponse({
+                'success': True,
+                'message': 'Stock transferred successfully',
+                'levels': {location_id: float(qty) for location_id, qty in levels}
+            })
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)}, status=400)
+    
+    return JsonResponse({'success': False, 'error': 'Invalid request method'}, status=405)
+
+
+@login_required
+def stocktake(request):
+    """Stocktake: upload a CSV or fill a count sheet, preview the variances, then post"""
+    from django.db.models import OuterRef, Subquery, Value
+    from django.db.models.functions import Coalesce
+    from .models import StockItem, StockLevel, StockLocation
+    from .stocktake import parse_counts_csv, parse_quantity, compute_variances, post_stocktake
+    
+    category = request.GET.get('category', '')
+    
+    # Counting one location compares with its stock levels; blank counts everything held
+    location = None
+    location_id = request.POST.get('location') or request.GET.get('location')
+    if location_id:
+        location = StockLocation.objects.filter(id=location_id, is_active=True).first() if location_id.isdigit() else None
+        if location is None:
+            messages.error(request, 'Unknown stock location')
+            return redirect('inventory:stocktake')
+    
+    if request.method == 'POST':
+        action = request.POST.get('action', 'preview')
+        
+        if action == 'post':
+            try:
+                counts = {sku: parse_quantity(qty) for sku, qty in json.loads(request.POST.get('counts', '{}')).items()}
+            except (ValueError, AttributeError):
+                counts = None
+            if counts is None or any(qty is None or qty < 0 for qty in counts.values()):
+                messages.error(request, 'Invalid stocktake data, please upload the counts again')
+                return redirect('inventory:stocktake')
+            
+            adjusted = post_stocktake(
+                counts, request.user, request.POST.get('reference', '').strip(), location_id=location and location.id,
+            )
+            messages.success(request, f'Stocktake posted: {adjusted} item(s) adjusted')
+            return redirect(f"{reverse('inventory:stock_movements')}?type=adjustment")
+        
+        # Preview
+        errors = []
+        if 'file' in request.FILES:
+            counts, errors = parse_counts_csv(request.FILES['file'])
+        else:
+            counts = {}
+            for key, value in request.POST.items():
+                if key.startswith('count_') and value.strip():
+                    quantity = parse_quantity(value)
+                    if quantity is None or quantity < 0:
+                        errors.append(f'"{value}" is not a valid quantity for {key[len("count_"):]}')
+                    else:
+                        counts[key[len('count_'):]] = quantity
+        
+        lines, unknown_skus = compute_variances(counts, location_id=location and location.id)
+        changed = [line for line in lines if line['variance']]
+        
+        context = {
+            'preview': True,
+            'location': location,
+            'lines': changed,
+            'total_lines': len(lines),
+            'unchanged_count': len(lines) - len(changed),
+            'variance_value': sum((line['variance_value'] for line in changed), Decimal('0')),
+            'unknown_skus': unknown_skus,
+            'errors': errors,
+            'counts_json': json.dumps({line['sku']: str(line['counted_quantity']) for line in changed}),
+        }
+        return render(request, 'inventory/stocktake.html', context)
+    
+    # GET - count sheets are per category to stay within the form field limit
+    categories = StockItem.objects.values_list('category', flat=True).distinct().order_by('category')
+    count_sheet = []
+    if category:
+        count_sheet = StockItem.objects.filter(category=category).only('sku', 'name', 'unit', 'current_quantity').order_by('name')
+    
+    if count_sheet and location:
+        held = StockLevel.objects.filter(stock_item=OuterRef('pk'), location=location).values('quantity')
+        count_sheet = count_sheet.annotate(
+            system_quantity=Coalesce(Subquery(held), Value(Decimal('0')), output_field=DecimalField(max_digits=10, decimal_places=2))
+        )
+    
+    context = {
+        'categories': categories,
+        'current_category': category,
+        'count_sheet': count_sheet,
+        'locations': StockLocation.objects.filter(is_active=True),
+        'location': location,
+    }
+    
+    return render(request, 'inventory/stocktake.html', context)
+
+
+@login_required
+def suggest_orders(request):
+    """Preview reorder suggestions grouped by vendor and create them as draft purchase orders"""
+    from .reorder import suggested_orders, create_suggested_orders
+    
+    if request.method == 'POST':
+        vendor_ids = [int(v) for v in request.POST.getlist('vendor_ids') if v.isdigit()]
+        if not vendor_ids:
+            messages.error(request, 'Select at least one vendor')
+            return redirect('inventory:suggest_orders')
+        
+        try:
+            lead_time = int(request.POST.get('lead_time', 3))
+        except ValueError:
+            lead_time = 3
+        
+        created = create_suggested_orders(request.user, vendor_ids, lead_time_days=lead_time)
+        if created:
+            messages.success(request, f'Created {len(created)} draft purchase order(s): {", ".join(po.po_number for po in created)}')
+        else:
+            messages.info(request, 'Nothing to order for the selected vendors')
+        return redirect(f"{reverse('inventory:purchase_orders')}?status=draft")
+    
+    groups = suggested_orders()
+    
+    context = {
+        'groups': groups,
+        'line_count': sum(len(group['lines']) for group in groups),
+        'total_value': sum((group['subtotal'] for group in groups), Decimal('0')),
+    }
+    
+    return render(request, 'inventory/suggest_orders.html', context)
+
+
 @login_required
 def create_purchase_order(request):
     """Create new purchase order"""
@@ -426,7 +819,9 @@ def send_purchase_order(request, po_id):
 @login_required
 def receive_purchase_order(request, po_id):
     """Receive purchase order and update stock"""
-    from .models import PurchaseOrder, StockMovement, StockItem
+    from .models import PurchaseOrder, StockMovement, StockItem, StockLevel, StockLot
+    from menu.costing import recompute_costs_for_stock_items
+    from menu.availability import recompute_sellable_for_stock_items
     from django.utils import timezone
     
     if request.method == 'POST':
@@ -445,34 +840,68 @@ def receive_purchase_order(request, po_id):
                     'error': 'Cancelled purchase orders cannot be received'
                 }, status=400)
             
-            # Update stock for each item
-            for item in po.items.all():
-                stock_item = item.stock_item
+            # Optional expiry date per PO line, keyed by PO item id
+            data = json.loads(request.body or '{}')
+            expiry_dates = {}
+            for po_item_id, value in (data.get('expiry_dates') or {}).items():
+                if value:
+                    expiry_dates[int(po_item_id)] = datetime.strptime(value, '%Y-%m-%d').date()
+            
+            with transaction.atomic():
+                repriced = []
+                lots = []
                 
-                # Create stock movement
-                StockMovement.objects.create(
-                    stock_item=stock_item,
-                    movement_type='purchase',
-                    quantity=item.quantity,
-                    unit_cost=item.unit_cost,
-                    reference=f"PO #{po.po_number}",
-                    notes=f"Received from {po.vendor.name}",
-                    created_by=request.user
-                )
+                # Update stock for each item
+                for item in po.items.all():
+                    stock_item = item.stock_item
+                    if item.unit_cost != stock_item.unit_cost:
+                        repriced.append(stock_item.id)
+                    
+                    # Create stock movement
+                    StockMovement.objects.create(
+                        stock_item=stock_item,
+                        movement_type='purchase',
+                        quantity=item.quantity,
+                        unit_cost=item.unit_cost,
+                        to_location_id=stock_item.location_id,
+                        reference=f"PO #{po.po_number}",
+                        notes=f"Received from {po.vendor.name}",
+                        created_by=request.user
+                    )
+                    
+                    # Update stock quantity and unit cost without a read-modify-write race
+                    StockItem.objects.filter(id=stock_item.id).update(
+                        current_quantity=F('current_quantity') + item.quantity,
+                        unit_cost=item.unit_cost,
+                        updated_at=timezone.now()
+                    )
+                    StockLevel.adjust(stock_item.id, stock_item.location_id, item.quantity)
+                    
+                    # Each delivery line becomes a lot with its own expiry
+                    lots.append(StockLot(
+                        stock_item=stock_item,
+                        purchase_order_item=item,
+                        quantity=item.quantity,
+                        received_quantity=item.quantity,
+                        unit_cost=item.unit_cost,
+                        expiry_date=expiry_dates.get(item.id),
+                    ))
+                    
+                    # Mark as received in PO item
+                    item.received_quantity = item.quantity
+                    item.save()
                 
-                # Update stock quantity
-                stock_item.current_quantity += item.quantity
-                stock_item.unit_cost = item.unit_cost  # Update unit cost
-                stock_item.save()
+                StockLot.objects.bulk_create(lots)
                 
-                # Mark as received in PO item
-                item.received_quantity = item.quantity
-                item.save()
-            
-            # Update PO status
-            po.status = 'received'
-            po.received_date = timezone.now().date()
-            po.save()
+                # Update PO status
+                po.status = 'received'
+                po.received_date = timezone.localdate()
+                po.save()
+                
+                # Refresh cached food costs of dishes using the repriced items
+                if repriced:
+                    recompute_costs_for_stock_items(repriced)
+                recompute_sellable_for_stock_items([item.stock_item_id for item in po.items.all()])
             
             messages.success(request, f'Purchase Order {po.po_number} received and stock updated')
             return JsonResponse({
@@ -505,6 +934,30 @@ def vendors_list(request):
     return render(request, 'inventory/vendors_list.html', context)
 
 
+@login_required
+def vendor_analytics(request):
+    """Vendor lead times, on-time delivery and per-item price trends"""
+    from .models import Vendor
+    from .vendor_analytics import vendor_summary, price_trends
+    
+    vendors = vendor_summary()
+    
+    selected_vendor = None
+    trends = []
+    vendor_id = request.GET.get('vendor')
+    if vendor_id:
+        selected_vendor = get_object_or_404(Vendor, id=vendor_id)
+        trends = price_trends(selected_vendor.id)
+    
+    context = {
+        'vendors': vendors,
+        'selected_vendor': selected_vendor,
+        'trends': trends,
+    }
+    
+    return render(request, 'inventory/vendor_analytics.html', context)
+
+
 @login_required
 def add_vendor(request):
     """Add new vendor"""
@@ -44,9 +44,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.TracingMiddleware',  # Opt-in, see TRACING_ENABLED
+    'core.middleware.RequestIdMiddleware',  # Request id on log records and X-Request-ID
+    'core.middleware.ServerTimingMiddleware',  # Opt-in, see SERVER_TIMING_ENABLED
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files in production
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.SessionRefreshMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -55,6 +61,7 @@ MIDDLEWARE = [
     'core.middleware.SQLInjectionProtectionMiddleware',
     'core.middleware.RateLimitMiddleware',
     'core.middleware.SecurityHeadersMiddleware',
+    'core.middleware.TracingViewMiddleware',  # Must stay last
 ]
 
 ROOT_URLCONF = 'maikai_pos.urls'
@@ -90,15 +97,42 @@ DATABASES = {
 }
 
 # Cache Configuration (for rate limiting and performance)
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-        'OPTIONS': {
-            'MAX_ENTRIES': 1000
+# LocMemCache is private to each worker process; set REDIS_URL (needs redis)
+# or MEMCACHED_LOCATION (needs pymemcache) to share one cache between workers
+REDIS_URL = config('REDIS_URL', default='')
+MEMCACHED_LOCATION = config('MEMCACHED_LOCATION', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
         }
     }
-}
+elif MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000
+            }
+        }
+    }
+SHARED_CACHE = bool(REDIS_URL or MEMCACHED_LOCATION)
+
+# The cached user only stays consistent across workers when the cache is
+# shared: a per-process copy would survive a logout or password change in
+# another worker (enforced by the core.E001 system check)
+AUTHENTICATION_BACKENDS = [
+    'core.backends.CachedModelBackend' if SHARED_CACHE else 'django.contrib.auth.backends.ModelBackend',
+]
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -163,8 +197,12 @@ TAX_RATE = config('TAX_RATE', default=0.10, cast=float)
 SERVICE_CHARGE_RATE = config('SERVICE_CHARGE_RATE', default=0.10, cast=float)
 
 # Session Settings
+# Cache reads with write-through to the database, when the cache is shared (core.E002)
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db' if SHARED_CACHE else 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 43200  # 12 hours
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False  # Expiry is refreshed by SessionRefreshMiddleware instead
+SESSION_REFRESH_INTERVAL = 300  # Extend an unchanged session at most every 5 minutes
+SESSION_USER_CACHE_TIMEOUT = 300  # Cached user object for AuthenticationMiddleware (CachedModelBackend)
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = 'Strict'
 SESSION_COOKIE_NAME = 'maikai_sessionid'
@@ -202,31 +240,60 @@ PASSWORD_HASHERS = [
 ]
 
 # Logging
+# Log files are written off the request path (see core.logs): requests only
+# queue their records, and a listener thread per worker formats and writes them
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
+        'json': {
+            '()': 'core.logs.JSONFormatter',  # One JSON object per record, with its request id
+        },
+        'message': {
+            'format': '{message}',
             'style': '{',
         },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'core.logs.QueuedRotatingFileHandler',  # Written by a background thread
             'filename': BASE_DIR / 'logs' / 'maikai_pos.log',
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,  # Keep 5 backup files
-            'formatter': 'verbose',
+            'formatter': 'json',
         },
         'security': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            'class': 'core.logs.QueuedRotatingFileHandler',  # Written by a background thread
             'filename': BASE_DIR / 'logs' / 'security.log',
             'maxBytes': 1024 * 1024 * 10,  # 10MB
             'backupCount': 5,  # Keep 5 backup files
-            'formatter': 'verbose',
+            'formatter': 'json',
+        },
+        'performance': {
+            'level': 'WARNING',
+            'class': 'core.logs.QueuedRotatingFileHandler',  # Written by a background thread
+            'filename': BASE_DIR / 'logs' / 'performance.log',
+            'maxBytes': 1024 * 1024 * 10,  # 10MB
+            'backupCount': 5,  # Keep 5 backup files
+            'formatter': 'json',
+        },
+        'slow_queries': {
+            'level': 'INFO',
+            'class': 'core.logs.QueuedRotatingFileHandler',  # Written by a background thread
+            'filename': BASE_DIR / 'logs' / 'slow_queries.jsonl',
+            'maxBytes': 1024 * 1024 * 10,  # 10MB
+            'backupCount': 5,  # Keep 5 backup files
+            'formatter': 'message',  # One JSON object per line
+        },
+        'traces': {
+            'level': 'INFO',
+            'class': 'core.logs.QueuedRotatingFileHandler',  # Written by a background thread
+            'filename': BASE_DIR / 'logs' / 'traces.jsonl',
+            'maxBytes': 1024 * 1024 * 50,  # 50MB
+            'backupCount': 3,
+            'formatter': 'message',  # One trace per line
         },
     },
     'loggers': {
@@ -235,11 +302,31 @@ LOGGING = {
             'level': 'INFO',
             'propagate': True,
         },
+        'core': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         'django.security': {
             'handlers': ['security'],
             'level': 'WARNING',
             'propagate': False,
         },
+        'core.performance': {
+            'handlers': ['performance'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+        'core.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'core.tracing': {
+            'handlers': ['traces'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 
@@ -250,6 +337,70 @@ os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5242880  # 5MB
 DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
+SQL_INJECTION_MAX_VALUE_LENGTH = 8192  # Longest GET/POST value the SQL injection filter accepts
+# POST fields allowed past that length (still pattern-checked), by path:
+# the stocktake review posts every changed line back as one JSON field
+SQL_INJECTION_LONG_FIELDS = {
+    '/inventory/stocktake/': ('counts',),
+}
+
+# Rate Limiting (counters shared by all workers)
+RATE_LIMIT_BACKEND = config('RATE_LIMIT_BACKEND', default='core.ratelimit.DatabaseBackend')
+RATE_LIMITS = {
+    'login': (5, 300),         # Failed logins per IP per 5 minutes
+    'order_write': (120, 60),  # Order writes per user per minute
+}
+
+# Request instrumentation: Server-Timing header on every response and a log
+# of slow requests (logs/performance.log) with their slowest SQL
+SERVER_TIMING_ENABLED = config('SERVER_TIMING_ENABLED', default=False, cast=bool)
+SERVER_TIMING_SLOW_MS = config('SERVER_TIMING_SLOW_MS', default=1000, cast=int)
+SERVER_TIMING_SLOW_QUERIES = 3  # Slowest statements logged per slow request
+
+# Slow-query log: statements slower than SLOW_QUERY_MS, with their EXPLAIN plan,
+# written to logs/slow_queries.jsonl and grouped at /performance/slow-queries/.
+# Opt-in, as every slow statement is run again under EXPLAIN on a background connection
+SLOW_QUERY_LOG_ENABLED = config('SLOW_QUERY_LOG_ENABLED', default=False, cast=bool)
+SLOW_QUERY_MS = config('SLOW_QUERY_MS', default=200, cast=int)
+
+# Request tracing: a sample of requests written as span trees to logs/traces.jsonl,
+# summarised by `manage.py trace_report`
+TRACING_ENABLED = config('TRACING_ENABLED', default=False, cast=bool)
+TRACE_SAMPLE_RATE = config('TRACE_SAMPLE_RATE', default=0.01, cast=float)  # Share of requests traced
+
+# Prometheus metrics at /metrics, for staff users or scrapers on the allow-list
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_ALLOWED_IPS = config('METRICS_ALLOWED_IPS', default='127.0.0.1,::1', cast=Csv())  # Addresses or networks
 
 # Admin Security
 ADMIN_URL = config('ADMIN_URL', default='admin/')
+
+# Query budgets: most queries each view may run on a cold cache, checked
+# against small and large fixtures by `manage.py check_query_budgets` and
+# core.tests.test_query_budgets. Budgets sit at each view's current count, so
+# any added query fails. Every count includes the session and user lookups
+# (2 queries; cache hits in production with a shared cache) and the write views
+# one rate-limit upsert, so add_order_item is 8 cold and 6 with a warm cache.
+QUERY_BUDGETS = {
+    'core:sales': 6,
+    'core:dashboard': 15,
+    'core:order_entry': 7,
+    'core:get_order_items': 5,
+    'core:menu_availability': 2,
+    'core:add_order_item': 8,
+    'core:payment_page': 5,
+    'core:process_payment': 11,
+    'orders:order_list': 7,
+    'menu:menu_list': 4,
+    'tables:table_list': 7,
+    'inventory:inventory_list': 6,
+    'inventory:stock_alerts': 6,
+    'inventory:stock_movements': 5,
+    'inventory:vendor_analytics': 5,
+    'reports:sales_report': 10,
+    'reports:inventory_report': 6,
+    'reports:menu_engineering': 5,
+    'reports:export_orders_pdf': 5,
+    'admin:orders_order_changelist': 5,
+    'admin:orders_orderitem_changelist': 5,
+}
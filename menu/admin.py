@@ -1,5 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
 from .models import Category, MenuItem, Modifier, Combo, Promotion
+from .costing import recompute_menu_costs, recompute_combo_costs
 
 
 @admin.register(Category)
@@ -11,11 +13,21 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(MenuItem)
 class MenuItemAdmin(admin.ModelAdmin):
-    list_display = ('reference_number', 'name', 'category', 'price', 'is_available', 'is_vegetarian')
+    list_display = ('reference_number', 'name', 'category', 'price', 'food_cost', 'margin', 'sellable_quantity', 'is_available', 'is_vegetarian')
     list_filter = ('category', 'is_available', 'is_vegetarian', 'is_vegan', 'is_spicy')
     search_fields = ('reference_number', 'name', 'description')
     list_editable = ('price', 'is_available')
     ordering = ('reference_number',)
+    readonly_fields = ('food_cost', 'margin', 'sellable_quantity', 'auto_unavailable', 'availability_changed_at')
+    
+    def save_model(self, request, obj, form, change):
+        if 'is_available' in form.changed_data:
+            # A manual change overrides the automatic out-of-stock switch
+            obj.auto_unavailable = False
+            obj.availability_changed_at = timezone.now()
+        super().save_model(request, obj, form, change)
+        if 'price' in form.changed_data:
+            recompute_menu_costs([obj.id])
 
 
 @admin.register(Modifier)
@@ -26,9 +38,15 @@ class ModifierAdmin(admin.ModelAdmin):
 
 @admin.register(Combo)
 class ComboAdmin(admin.ModelAdmin):
-    list_display = ('name', 'price', 'is_available')
+    list_display = ('name', 'price', 'food_cost', 'margin', 'is_available')
     list_filter = ('is_available',)
     filter_horizontal = ('items',)
+    readonly_fields = ('food_cost', 'margin')
+    
+    def save_related(self, request, form, formsets, change):
+        # Items are saved with the m2m data, after save_model
+        super().save_related(request, form, formsets, change)
+        recompute_combo_costs([form.instance.id])
 
 
 @admin.register(Promotion)
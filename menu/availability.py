@@ -0,0 +1,76 @@
+"""
+Sellable quantity: how many portions of each menu item the current stock can
+make, kept on MenuItem and refreshed only for the dishes whose ingredients
+changed. Items that run out are switched off automatically and switched back
+on when restocked; manual availability settings are left alone.
+"""
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Subquery, IntegerField
+from django.db.models.functions import Floor, Greatest
+from django.utils import timezone
+
+
+def recompute_sellable(menu_item_ids=None):
+    """
+    Recompute sellable_quantity (min over recipe lines of stock / quantity
+    required) for the given menu items, or all of them when None. Only rows
+    whose quantity or availability changes are written, and those get a new
+    availability_changed_at so order-entry screens can fetch just the delta.
+    Returns the number of menu items changed.
+    """
+    from inventory.models import Recipe
+    from .models import MenuItem
+
+    portions = Recipe.objects.filter(
+        menu_item=OuterRef('pk'),
+        quantity_required__gt=0,
+    ).order_by().values('menu_item').annotate(
+        portions=Min(Greatest(
+            Floor(F('stock_item__current_quantity') / F('quantity_required')), 0, output_field=IntegerField()
+        ))
+    ).values('portions')
+
+    items = MenuItem.objects.all() if menu_item_ids is None else MenuItem.objects.filter(id__in=menu_item_ids)
+
+    with transaction.atomic():
+        rows = items.select_for_update().annotate(
+            new_quantity=Subquery(portions, output_field=IntegerField())
+        ).only('id', 'sellable_quantity', 'is_available', 'auto_unavailable')
+
+        now = timezone.now()
+        changed = []
+        for item in rows:
+            quantity = None if item.new_quantity is None else int(item.new_quantity)
+            is_available = item.is_available
+            auto_unavailable = item.auto_unavailable
+
+            if quantity == 0 and is_available:
+                is_available, auto_unavailable = False, True
+            elif quantity != 0 and auto_unavailable:
+                is_available, auto_unavailable = True, False
+
+            if (quantity, is_available, auto_unavailable) != (item.sellable_quantity, item.is_available, item.auto_unavailable):
+                item.sellable_quantity = quantity
+                item.is_available = is_available
+                item.auto_unavailable = auto_unavailable
+                item.availability_changed_at = now
+                changed.append(item)
+
+        MenuItem.objects.bulk_update(
+            changed,
+            ['sellable_quantity', 'is_available', 'auto_unavailable', 'availability_changed_at'],
+            batch_size=500,
+        )
+    return len(changed)
+
+
+def recompute_sellable_for_stock_items(stock_item_ids):
+    """Recompute only the menu items whose recipes use one of the given stock items"""
+    from inventory.models import Recipe
+
+    menu_item_ids = list(
+        Recipe.objects.filter(stock_item_id__in=stock_item_ids).values_list('menu_item_id', flat=True).distinct()
+    )
+    if not menu_item_ids:
+        return 0
+    return recompute_sellable(menu_item_ids)
@@ -0,0 +1,68 @@
+"""
+Recipe costing: food cost and margin are cached on MenuItem and Combo and
+recomputed with set-based UPDATEs only for the rows affected by a change
+"""
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Round
+
+COST_FIELD = DecimalField(max_digits=10, decimal_places=2)
+
+
+def recompute_combo_costs(combo_ids=None):
+    """
+    Recompute combo food cost from the items' cached costs. None means all
+    combos. A combo with any uncosted item gets no cost rather than a partial sum.
+    """
+    from .models import Combo
+
+    item_costs = Combo.items.through.objects.filter(
+        combo=OuterRef('pk')
+    ).order_by().values('combo').annotate(
+        total=Sum('menuitem__food_cost'),
+        uncosted=Count('pk', filter=Q(menuitem__food_cost__isnull=True)),
+    ).filter(uncosted=0).values('total')
+
+    combos = Combo.objects.all() if combo_ids is None else Combo.objects.filter(id__in=combo_ids)
+    with transaction.atomic():
+        updated = combos.update(food_cost=Subquery(item_costs, output_field=COST_FIELD))
+        combos.update(margin=F('price') - F('food_cost'))
+    return updated
+
+
+def recompute_menu_costs(menu_item_ids=None):
+    """
+    Recompute food cost (sum of quantity_required x unit_cost over the recipe)
+    and margin for the given menu items, then for the combos that include them.
+    None means every menu item. Items without a recipe get no cost.
+    """
+    from inventory.models import Recipe
+    from .models import Combo, MenuItem
+
+    recipe_cost = Recipe.objects.filter(
+        menu_item=OuterRef('pk')
+    ).order_by().values('menu_item').annotate(
+        total=Sum(F('quantity_required') * F('stock_item__unit_cost'), output_field=COST_FIELD)
+    ).values('total')
+
+    items = MenuItem.objects.all() if menu_item_ids is None else MenuItem.objects.filter(id__in=menu_item_ids)
+    with transaction.atomic():
+        updated = items.update(food_cost=Round(Subquery(recipe_cost, output_field=COST_FIELD), 2))
+        items.update(margin=F('price') - F('food_cost'))
+
+        if menu_item_ids is None:
+            recompute_combo_costs()
+        else:
+            recompute_combo_costs(
+                Combo.items.through.objects.filter(menuitem_id__in=menu_item_ids).values('combo_id')
+            )
+    return updated
+
+
+def recompute_costs_for_stock_items(stock_item_ids):
+    """Recompute only the menu items whose recipes use one of the given stock items"""
+    from inventory.models import Recipe
+
+    return recompute_menu_costs(
+        list(Recipe.objects.filter(stock_item_id__in=stock_item_ids).values_list('menu_item_id', flat=True).distinct())
+    )
@@ -0,0 +1,25 @@
+"""
+Management command to rebuild the cached food cost and margin of every menu item and combo
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+
+
+class Command(BaseCommand):
+    help = 'Recompute cached food cost and margin for all menu items and combos from their recipes'
+
+    def handle(self, *args, **options):
+        from menu.costing import recompute_menu_costs
+        from menu.models import MenuItem
+
+        updated = recompute_menu_costs()
+
+        stats = MenuItem.objects.aggregate(
+            costed=Count('id', filter=Q(food_cost__isnull=False)),
+            negative=Count('id', filter=Q(margin__lt=0)),
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt costs for {updated} menu item(s)'))
+        self.stdout.write(f'{stats["costed"]} item(s) have a recipe cost, {updated - stats["costed"]} have no recipe')
+        if stats['negative']:
+            self.stdout.write(self.style.WARNING(f'{stats["negative"]} item(s) cost more to make than their price'))
@@ -0,0 +1,19 @@
+"""
+Management command to recompute sellable quantities for every menu item
+"""
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Recompute sellable quantity and automatic availability for all menu items from recipes and stock'
+
+    def handle(self, *args, **options):
+        from menu.availability import recompute_sellable
+        from menu.models import MenuItem
+
+        changed = recompute_sellable()
+
+        self.stdout.write(self.style.SUCCESS(f'{changed} menu item(s) changed'))
+        sold_out = MenuItem.objects.filter(auto_unavailable=True).count()
+        if sold_out:
+            self.stdout.write(self.style.WARNING(f'{sold_out} item(s) are switched off because an ingredient ran out'))
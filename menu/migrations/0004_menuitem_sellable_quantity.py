@@ -0,0 +1,32 @@
+# Generated by Django 5.0 on 2026-10-18 22:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_menuitem_combo_costing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='auto_unavailable',
+            field=models.BooleanField(default=False, help_text='Switched off automatically because an ingredient ran out'),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='availability_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='menuitem',
+            name='sellable_quantity',
+            field=models.IntegerField(blank=True, help_text='Portions the current stock can make; empty when the item has no recipe', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='menuitem',
+            index=models.Index(fields=['availability_changed_at'], name='menu_item_avail_changed_idx'),
+        ),
+    ]
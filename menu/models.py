@@ -34,15 +34,33 @@ class MenuItem(models.Model):
     preparation_time = models.IntegerField(help_text='Preparation time in minutes', default=15)
     calories = models.IntegerField(null=True, blank=True)
     
+    # Cached recipe costing, kept current by menu.costing
+    food_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    margin = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    
+    # Kept current by menu.availability from recipes and stock
+    sellable_quantity = models.IntegerField(null=True, blank=True, help_text='Portions the current stock can make; empty when the item has no recipe')
+    auto_unavailable = models.BooleanField(default=False, help_text='Switched off automatically because an ingredient ran out')
+    availability_changed_at = models.DateTimeField(null=True, blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'menu_items'
         ordering = ['reference_number']
+        indexes = [
+            models.Index(fields=['availability_changed_at'], name='menu_item_avail_changed_idx'),
+        ]
     
     def __str__(self):
         return f"#{self.reference_number} - {self.name} - Rs.{self.price}"
+    
+    @property
+    def margin_percent(self):
+        if self.margin is None or not self.price:
+            return None
+        return self.margin / self.price * 100
 
 
 class Modifier(models.Model):
@@ -75,6 +93,10 @@ class Combo(models.Model):
     is_available = models.BooleanField(default=True)
     image = models.ImageField(upload_to='menu/combos/', null=True, blank=True)
     
+    # Sum of the included items' cached food cost
+    food_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    margin = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    
     class Meta:
         db_table = 'combos'
         ordering = ['name']
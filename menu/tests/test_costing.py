@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventory.models import Recipe, StockItem
+from menu.costing import recompute_menu_costs
+from menu.models import Category, Combo, MenuItem
+
+
+class ComboCostTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Mains')
+        self.curry = MenuItem.objects.create(category=category, reference_number='M1', name='Curry', price=Decimal('1000'))
+        self.rice = MenuItem.objects.create(category=category, reference_number='M2', name='Rice', price=Decimal('500'))
+        self.combo = Combo.objects.create(name='Rice and curry', price=Decimal('1300'))
+        self.combo.items.set([self.curry, self.rice])
+
+        chicken = StockItem.objects.create(
+            name='Chicken', sku='CHK', category='Meat', unit='kg', current_quantity=Decimal('10'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('1200'),
+        )
+        Recipe.objects.create(menu_item=self.curry, stock_item=chicken, quantity_required=Decimal('0.25'))
+
+    def test_combo_with_uncosted_item_has_no_cost(self):
+        recompute_menu_costs()
+
+        self.curry.refresh_from_db()
+        self.combo.refresh_from_db()
+        self.assertEqual(self.curry.food_cost, Decimal('300.00'))
+        self.assertIsNone(self.combo.food_cost)
+        self.assertIsNone(self.combo.margin)
+
+    def test_combo_cost_sums_items_once_all_are_costed(self):
+        recompute_menu_costs()
+        rice = StockItem.objects.create(
+            name='Rice', sku='RICE', category='Dry', unit='kg', current_quantity=Decimal('10'),
+            min_quantity=Decimal('1'), unit_cost=Decimal('400'),
+        )
+        Recipe.objects.create(menu_item=self.rice, stock_item=rice, quantity_required=Decimal('0.20'))
+
+        recompute_menu_costs([self.rice.id])
+
+        self.combo.refresh_from_db()
+        self.assertEqual(self.combo.food_cost, Decimal('380.00'))
+        self.assertEqual(self.combo.margin, Decimal('920.00'))
@@ -1,7 +1,9 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.utils import timezone
 from .models import Category, MenuItem, Modifier
+from .costing import recompute_menu_costs
 
 
 @login_required
@@ -131,12 +133,18 @@ def menu_item_update(request, item_id):
         item.price = request.POST.get('price')
         item.description = request.POST.get('description')
         item.is_vegetarian = request.POST.get('is_vegetarian') == 'on'
-        item.is_available = request.POST.get('is_available') == 'on'
+        is_available = request.POST.get('is_available') == 'on'
+        if is_available != item.is_available:
+            # A manual change overrides the automatic out-of-stock switch
+            item.is_available = is_available
+            item.auto_unavailable = False
+            item.availability_changed_at = timezone.now()
         
         if 'image' in request.FILES:
             item.image = request.FILES['image']
         
         item.save()
+        recompute_menu_costs([item.id])
         messages.success(request, f'Menu item "#{reference_number} - {item.name}" updated successfully!')
         return redirect('menu:menu_list')
     
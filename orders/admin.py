@@ -5,6 +5,7 @@ from .models import Order, OrderItem, OrderStatusHistory
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('order_number', 'order_type', 'status', 'table', 'total', 'created_at')
+    list_select_related = ('table',)
     list_filter = ('order_type', 'status', 'created_at')
     search_fields = ('order_number',)
 
@@ -12,9 +13,11 @@ class OrderAdmin(admin.ModelAdmin):
 @admin.register(OrderItem)
 class OrderItemAdmin(admin.ModelAdmin):
     list_display = ('order', 'menu_item', 'combo', 'quantity', 'total_price')
+    list_select_related = ('order', 'menu_item', 'combo')
 
 
 @admin.register(OrderStatusHistory)
 class OrderStatusHistoryAdmin(admin.ModelAdmin):
     list_display = ('order', 'status', 'changed_by', 'created_at')
+    list_select_related = ('order', 'changed_by')
     list_filter = ('status', 'created_at')
@@ -48,16 +48,26 @@ class Order(models.Model):
     class Meta:
         db_table = 'orders'
         ordering = ['-created_at']
+        indexes = [
+            # Open order on a table (order entry, payment, table moves)
+            models.Index(fields=['table', 'status'], name='order_table_status_idx'),
+            # Status counts, and the reports' status + date-range filters
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Date ranges over every status (dashboard, PDF export) and the default ordering
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+        ]
     
     def __str__(self):
         return f"Order #{self.order_number}"
     
-    def calculate_totals(self):
-        """Calculate order totals"""
+    def calculate_totals(self, items=None):
+        """Calculate order totals; pass the order's items if they are already loaded"""
         from django.conf import settings
         from decimal import Decimal
         
-        self.subtotal = sum(item.total_price for item in self.items.all())
+        if items is None:
+            items = self.items.all()
+        self.subtotal = sum(item.total_price for item in items)
         self.tax_amount = Decimal('0')  # Tax removed - service charge only
         self.service_charge = self.subtotal * Decimal(str(settings.SERVICE_CHARGE_RATE))
         self.total = self.subtotal - self.discount_amount + self.service_charge
@@ -83,7 +93,8 @@ class OrderItem(models.Model):
         db_table = 'order_items'
     
     def __str__(self):
-        item_name = self.menu_item.name if self.menu_item else self.combo.name
+        # Check the ids first so a missing relation costs no query
+        item_name = self.menu_item.name if self.menu_item_id else (self.combo.name if self.combo_id else '')
         return f"{self.quantity}x {item_name}"
     
     def save(self, *args, **kwargs):
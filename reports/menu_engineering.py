@@ -0,0 +1,132 @@
+"""
+Menu engineering: classify menu items as stars, plowhorses, puzzles or dogs
+by popularity (menu mix) and contribution margin over a date range
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+
+from core import metrics
+
+QUADRANTS = [
+    ('star', 'Stars', 'Popular and profitable - keep and feature'),
+    ('plowhorse', 'Plowhorses', 'Popular but low margin - review cost or price'),
+    ('puzzle', 'Puzzles', 'Profitable but unpopular - reposition or promote'),
+    ('dog', 'Dogs', 'Unpopular and low margin - consider removing'),
+]
+
+# An item is popular when its share of the mix reaches 70% of an even share
+POPULARITY_FACTOR = 0.7
+
+# Closed periods do not change, so their analysis is kept for a day
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def analyse(start_date, end_date, category_id=None):
+    """
+    Return the classified menu for the period, from cache when the period is
+    closed (ends before today). Items without a recipe cost are listed
+    separately as they have no contribution margin.
+    """
+    cacheable = end_date < timezone.localdate()
+    cache_key = f'menu_engineering:{start_date}:{end_date}:{category_id or "all"}'
+    if cacheable:
+        result = cache.get(cache_key)
+        metrics.cache_lookup('menu_engineering', result is not None)
+        if result is not None:
+            return result
+
+    result = _classify(start_date, end_date, category_id)
+    if cacheable:
+        cache.set(cache_key, result, CACHE_TIMEOUT)
+    return result
+
+
+def _money(value):
+    return Decimal(str(float(value))).quantize(Decimal('0.01'))
+
+
+def _classify(start_date, end_date, category_id):
+    import numpy as np
+    from inventory.valuation import start_of_day, end_of_day
+    from menu.models import MenuItem
+    from orders.models import OrderItem
+
+    # One grouped query for the period's sales
+    sales = OrderItem.objects.filter(
+        order__created_at__gte=start_of_day(start_date),
+        order__created_at__lt=end_of_day(end_date),
+        menu_item__isnull=False,
+    ).exclude(order__status='cancelled')
+    if category_id:
+        sales = sales.filter(menu_item__category_id=category_id)
+    sold = {
+        item_id: (quantity, revenue)
+        for item_id, quantity, revenue in sales.order_by().values_list('menu_item_id').annotate(
+            quantity=Sum('quantity'), revenue=Sum('total_price')
+        )
+    }
+
+    menu = MenuItem.objects.filter(is_available=True) | MenuItem.objects.filter(id__in=list(sold))
+    if category_id:
+        menu = menu.filter(category_id=category_id)
+    menu = list(menu.values_list('id', 'name', 'category__name', 'price', 'food_cost').order_by('name'))
+
+    costed = [row for row in menu if row[4] is not None]
+    uncosted = [{'id': row[0], 'name': row[1], 'category': row[2]} for row in menu if row[4] is None]
+
+    result = {
+        'items': [],
+        'uncosted': uncosted,
+        'counts': {key: 0 for key, _, _ in QUADRANTS},
+        'total_quantity': 0,
+        'popularity_threshold': 0,
+        'average_margin': Decimal('0'),
+    }
+    if not costed:
+        return result
+
+    quantity = np.array([sold.get(row[0], (0, 0))[0] for row in costed], dtype=float)
+    revenue = np.array([float(sold.get(row[0], (0, 0))[1] or 0) for row in costed])
+    price = np.array([float(row[3]) for row in costed])
+    food_cost = np.array([float(row[4]) for row in costed])
+
+    # Contribution margin per unit at the average price actually charged
+    selling_price = np.divide(revenue, quantity, out=price.copy(), where=quantity > 0)
+    margin = selling_price - food_cost
+
+    total_quantity = quantity.sum()
+    popularity_threshold = POPULARITY_FACTOR * total_quantity / len(costed)
+    average_margin = (margin * quantity).sum() / total_quantity if total_quantity else margin.mean()
+
+    popular = quantity >= popularity_threshold
+    profitable = margin >= average_margin
+    quadrant = np.select(
+        [popular & profitable, popular & ~profitable, ~popular & profitable],
+        ['star', 'plowhorse', 'puzzle'],
+        default='dog',
+    )
+    mix = quantity / total_quantity * 100 if total_quantity else np.zeros(len(costed))
+
+    for i, (item_id, name, category, _, cost) in enumerate(costed):
+        result['items'].append({
+            'id': item_id,
+            'name': name,
+            'category': category,
+            'quantity': int(quantity[i]),
+            'mix_percent': round(float(mix[i]), 1),
+            'selling_price': _money(selling_price[i]),
+            'food_cost': cost,
+            'margin': _money(margin[i]),
+            'total_margin': _money(margin[i] * quantity[i]),
+            'quadrant': str(quadrant[i]),
+        })
+        result['counts'][str(quadrant[i])] += 1
+
+    result['items'].sort(key=lambda item: item['total_margin'], reverse=True)
+    result['total_quantity'] = int(total_quantity)
+    result['popularity_threshold'] = round(float(popularity_threshold), 1)
+    result['average_margin'] = _money(average_margin)
+    return result
@@ -0,0 +1,50 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from menu.models import Category, MenuItem
+from orders.models import Order, OrderItem
+from reports.menu_engineering import analyse
+
+
+class MenuEngineeringTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Mains')
+        self.order = Order.objects.create(order_number='ORD-1', order_type='dine_in', status='completed')
+
+    def sell(self, reference, food_cost, quantity, order=None):
+        item = MenuItem.objects.create(
+            category=self.category, reference_number=reference, name=reference, price=Decimal('1000'), food_cost=food_cost,
+        )
+        OrderItem.objects.create(order=order or self.order, menu_item=item, quantity=quantity, unit_price=Decimal('1000'))
+        return item
+
+    def test_classifies_by_popularity_and_margin(self):
+        self.sell('STAR', Decimal('200'), 10)
+        self.sell('PLOW', Decimal('900'), 10)
+        self.sell('PUZZLE', Decimal('100'), 1)
+        self.sell('DOG', Decimal('950'), 1)
+        self.sell('NEW', None, 3)
+
+        today = timezone.localdate()
+        result = analyse(today, today)
+
+        self.assertEqual(
+            {item['name']: item['quadrant'] for item in result['items']},
+            {'STAR': 'star', 'PLOW': 'plowhorse', 'PUZZLE': 'puzzle', 'DOG': 'dog'},
+        )
+        self.assertEqual([item['name'] for item in result['uncosted']], ['NEW'])
+        self.assertEqual(result['total_quantity'], 22)
+        # Margins weighted by quantity: (8000 + 1000 + 900 + 50) / 22
+        self.assertEqual(result['average_margin'], Decimal('452.27'))
+
+    def test_cancelled_orders_are_not_counted(self):
+        cancelled = Order.objects.create(order_number='ORD-2', order_type='dine_in', status='cancelled')
+        self.sell('CURRY', Decimal('300'), 2)
+        self.sell('RICE', Decimal('300'), 5, order=cancelled)
+
+        today = timezone.localdate()
+        quantities = {item['name']: item['quantity'] for item in analyse(today, today)['items']}
+
+        self.assertEqual(quantities, {'CURRY': 2, 'RICE': 0})
@@ -1,10 +1,13 @@
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Count, Avg, Q, F
+from django.db.models import Sum, Count, Avg, Q, F, DecimalField
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from datetime import timedelta, datetime
 from decimal import Decimal
 
+from core import tracing
+
 
 @login_required
 def reports_home(request):
@@ -16,6 +19,7 @@ def sales_report(request):
     from orders.models import Order, OrderItem
     from billing.models import Payment
     from menu.models import MenuItem, Category
+    from inventory.valuation import start_of_day, end_of_day
     
     # Get date range from request or default to this month
     date_range = request.GET.get('range', 'this_month')
@@ -55,68 +59,82 @@ def sales_report(request):
     prev_start_date = start_date - timedelta(days=period_days)
     prev_end_date = start_date - timedelta(days=1)
     
+    # Datetime bounds rather than __date lookups, which cast the column and keep its indexes from being used
+    period_start, period_end = start_of_day(start_date), end_of_day(end_date)
+    prev_start, prev_end = start_of_day(prev_start_date), end_of_day(prev_end_date)
+    
     # Current period orders
     orders = Order.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date,
-        status__in=['confirmed', 'preparing', 'ready', 'completed']
-    )
-    
-    # Previous period orders
-    prev_orders = Order.objects.filter(
-        created_at__date__gte=prev_start_date,
-        created_at__date__lte=prev_end_date,
+        created_at__gte=period_start,
+        created_at__lt=period_end,
         status__in=['confirmed', 'preparing', 'ready', 'completed']
     )
     
-    # Total Revenue - use completed_at date for accuracy
-    total_revenue = Payment.objects.filter(
+    # Total Revenue - use completed_at date for accuracy. Both periods in one query
+    current_payment = Q(completed_at__gte=period_start)
+    previous_payment = Q(completed_at__lt=prev_end)
+    revenue = Payment.objects.filter(
         status='completed',
-        completed_at__date__gte=start_date,
-        completed_at__date__lte=end_date
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
-    
-    prev_revenue = Payment.objects.filter(
-        status='completed',
-        completed_at__date__gte=prev_start_date,
-        completed_at__date__lte=prev_end_date
-    ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
+        completed_at__gte=prev_start,
+        completed_at__lt=period_end
+    ).aggregate(
+        total=Sum('amount', filter=current_payment),
+        prev=Sum('amount', filter=previous_payment),
+    )
+    total_revenue = revenue['total'] or Decimal('0')
+    prev_revenue = revenue['prev'] or Decimal('0')
     
     revenue_change = calculate_percentage_change(total_revenue, prev_revenue)
     
-    # Total Orders
-    total_orders = orders.count()
-    prev_total_orders = prev_orders.count()
+    # Total Orders, Average Order Value and unique Customers for both periods
+    current_order = Q(created_at__gte=period_start)
+    previous_order = Q(created_at__lt=prev_end)
+    order_stats = Order.objects.filter(
+        created_at__gte=prev_start,
+        created_at__lt=period_end,
+        status__in=['confirmed', 'preparing', 'ready', 'completed']
+    ).aggregate(
+        count=Count('id', filter=current_order),
+        prev_count=Count('id', filter=previous_order),
+        avg=Avg('total', filter=current_order),
+        prev_avg=Avg('total', filter=previous_order),
+        customers=Count('customer', filter=current_order, distinct=True),
+        prev_customers=Count('customer', filter=previous_order, distinct=True),
+    )
+    
+    total_orders = order_stats['count']
+    prev_total_orders = order_stats['prev_count']
     orders_change = calculate_percentage_change(total_orders, prev_total_orders)
     
-    # Average Order Value
-    avg_order_value = orders.aggregate(avg=Avg('total'))['avg'] or Decimal('0')
-    prev_avg_order_value = prev_orders.aggregate(avg=Avg('total'))['avg'] or Decimal('0')
+    avg_order_value = order_stats['avg'] or Decimal('0')
+    prev_avg_order_value = order_stats['prev_avg'] or Decimal('0')
     avg_change = calculate_percentage_change(avg_order_value, prev_avg_order_value)
     
-    # Total Customers (unique)
-    total_customers = orders.filter(customer__isnull=False).values('customer').distinct().count()
-    prev_total_customers = prev_orders.filter(customer__isnull=False).values('customer').distinct().count()
+    total_customers = order_stats['customers']
+    prev_total_customers = order_stats['prev_customers']
     customers_change = calculate_percentage_change(total_customers, prev_total_customers)
     
     # Daily sales for chart (last 7 days)
+    week_revenue = dict(Payment.objects.filter(
+        status='completed',
+        completed_at__gte=start_of_day(today - timedelta(days=6)),
+        completed_at__lt=end_of_day(today)
+    ).annotate(day=TruncDate('completed_at')).values('day').annotate(
+        total=Sum('amount')
+    ).values_list('day', 'total'))
     daily_sales = []
     for i in range(7):
         day = today - timedelta(days=6-i)
-        day_revenue = Payment.objects.filter(
-            status='completed',
-            completed_at__date=day
-        ).aggregate(total=Sum('amount'))['total'] or Decimal('0')
         daily_sales.append({
             'day': day.strftime('%a'),
-            'revenue': float(day_revenue)
+            'revenue': float(week_revenue.get(day) or 0)
         })
     
     # Payment methods breakdown
     payment_methods = Payment.objects.filter(
         status='completed',
-        completed_at__date__gte=start_date,
-        completed_at__date__lte=end_date
+        completed_at__gte=period_start,
+        completed_at__lt=period_end
     ).values('payment_method').annotate(
         total=Sum('amount'),
         count=Count('id')
@@ -133,25 +151,30 @@ def sales_report(request):
             'percentage': round(percentage, 1)
         })
     
-    # Category-wise sales
+    # Category-wise sales, both periods grouped by category in one query
+    current_item = Q(order__created_at__gte=period_start)
+    previous_item = Q(order__created_at__lt=prev_end)
+    category_totals = {
+        row['menu_item__category']: row
+        for row in OrderItem.objects.filter(
+            order__created_at__gte=prev_start,
+            order__created_at__lt=period_end,
+            order__status__in=['confirmed', 'preparing', 'ready', 'completed'],
+            menu_item__category__isnull=False
+        ).values('menu_item__category').annotate(
+            items_sold=Sum('quantity', filter=current_item),
+            revenue=Sum('total_price', filter=current_item),
+            prev_revenue=Sum('total_price', filter=previous_item),
+        )
+    }
     category_sales = []
     categories = Category.objects.filter(is_active=True)
     
     for category in categories:
-        items_in_category = OrderItem.objects.filter(
-            order__in=orders,
-            menu_item__category=category
-        )
-        
-        items_sold = items_in_category.aggregate(total_qty=Sum('quantity'))['total_qty'] or 0
-        category_revenue = items_in_category.aggregate(total=Sum('total_price'))['total'] or Decimal('0')
-        
-        # Previous period for this category
-        prev_items = OrderItem.objects.filter(
-            order__in=prev_orders,
-            menu_item__category=category
-        )
-        prev_category_revenue = prev_items.aggregate(total=Sum('total_price'))['total'] or Decimal('0')
+        totals = category_totals.get(category.id, {})
+        items_sold = totals.get('items_sold') or 0
+        category_revenue = totals.get('revenue') or Decimal('0')
+        prev_category_revenue = totals.get('prev_revenue') or Decimal('0')
         
         category_change = calculate_percentage_change(category_revenue, prev_category_revenue)
         percentage_of_total = (float(category_revenue) / float(total_revenue) * 100) if total_revenue > 0 else 0
@@ -174,7 +197,8 @@ def sales_report(request):
         'menu_item__name'
     ).annotate(
         total_qty=Sum('quantity'),
-        total_revenue=Sum('total_price')
+        total_revenue=Sum('total_price'),
+        total_food_cost=Sum(F('quantity') * F('menu_item__food_cost'), output_field=DecimalField())
     ).order_by('-total_qty')[:10]
     
     # Peak hours analysis
@@ -186,15 +210,17 @@ def sales_report(request):
         ('19:00', '21:00', 'Dinner'),
     ]
     
+    slot_counts = orders.aggregate(**{
+        label: Count('id', filter=Q(
+            created_at__hour__gte=int(start_time.split(':')[0]),
+            created_at__hour__lt=int(end_time.split(':')[0])
+        ))
+        for start_time, end_time, label in time_slots
+    })
+    
     max_orders = 0
     for start_time, end_time, label in time_slots:
-        start_hour = int(start_time.split(':')[0])
-        end_hour = int(end_time.split(':')[0])
-        
-        slot_orders = orders.filter(
-            created_at__hour__gte=start_hour,
-            created_at__hour__lt=end_hour
-        ).count()
+        slot_orders = slot_counts[label]
         
         if slot_orders > max_orders:
             max_orders = slot_orders
@@ -255,8 +281,31 @@ def inventory_report(request):
     # Get all stock items
     items = StockItem.objects.all().select_related('vendor', 'location')
     
+    # Optional as-of date for month-end valuation
+    as_of = None
+    as_of_str = request.GET.get('as_of')
+    if as_of_str:
+        try:
+            as_of = datetime.strptime(as_of_str, '%Y-%m-%d').date()
+        except ValueError:
+            as_of = None
+        if as_of and as_of >= timezone.localdate():
+            as_of = None
+    
+    if as_of:
+        from inventory.valuation import stock_as_of
+        
+        positions = stock_as_of(as_of)
+        items = [item for item in items if item.id in positions]
+        # Show each item with its quantity and cost at the end of that day
+        for item in items:
+            item.current_quantity = positions[item.id]['quantity']
+            item.unit_cost = positions[item.id]['unit_cost']
+        total_items = len(items)
+    else:
+        total_items = items.count()
+    
     # Calculate statistics
-    total_items = items.count()
     low_stock_items = [item for item in items if item.is_low_stock]
     out_of_stock_items = [item for item in items if item.current_quantity == 0]
     
@@ -279,6 +328,7 @@ def inventory_report(request):
     recent_pos = PurchaseOrder.objects.select_related('vendor').order_by('-order_date')[:5]
     
     context = {
+        'as_of': as_of,
         'total_items': total_items,
         'low_stock_count': len(low_stock_items),
         'out_of_stock_count': len(out_of_stock_items),
@@ -293,6 +343,55 @@ def inventory_report(request):
     return render(request, 'reports/inventory_report.html', context)
 
 
+@login_required
+def menu_engineering(request):
+    """Menu engineering matrix: popularity x contribution margin per menu item"""
+    from menu.models import Category
+    from .menu_engineering import analyse, QUADRANTS
+    
+    today = timezone.localdate()
+    try:
+        start_date = datetime.strptime(request.GET.get('start_date', ''), '%Y-%m-%d').date()
+        end_date = datetime.strptime(request.GET.get('end_date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        # Default to the last 30 closed days
+        end_date = today - timedelta(days=1)
+        start_date = end_date - timedelta(days=29)
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+    
+    category_id = request.GET.get('category', '')
+    category_id = int(category_id) if category_id.isdigit() else None
+    
+    result = analyse(start_date, end_date, category_id)
+    
+    quadrants = [
+        {
+            'key': key,
+            'label': label,
+            'advice': advice,
+            'count': result['counts'][key],
+            'items': [item for item in result['items'] if item['quadrant'] == key],
+        }
+        for key, label, advice in QUADRANTS
+    ]
+    
+    context = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'categories': Category.objects.filter(is_active=True),
+        'current_category': category_id,
+        'quadrants': quadrants,
+        'items': result['items'],
+        'uncosted': result['uncosted'],
+        'total_quantity': result['total_quantity'],
+        'popularity_threshold': result['popularity_threshold'],
+        'average_margin': result['average_margin'],
+    }
+    
+    return render(request, 'reports/menu_engineering.html', context)
+
+
 @login_required
 def financial_report(request):
     return render(request, 'reports/financial_report.html')
@@ -308,6 +407,7 @@ def orders_export_page(request):
 def export_orders_pdf(request):
     """Export orders to PDF by day, week, or month"""
     from orders.models import Order, OrderItem
+    from inventory.valuation import start_of_day, end_of_day
     from django.http import HttpResponse
     from reportlab.lib import colors
     from reportlab.lib.pagesizes import letter, A4
@@ -360,9 +460,13 @@ def export_orders_pdf(request):
     
     # Get orders for the period
     orders = Order.objects.filter(
-        created_at__date__gte=start_date,
-        created_at__date__lte=end_date
-    ).select_related('table', 'customer', 'created_by', 'assigned_to').order_by('created_at')
+        created_at__gte=start_of_day(start_date),
+        created_at__lt=end_of_day(end_date)
+    ).select_related('table', 'customer', 'created_by', 'assigned_to').prefetch_related(
+        'items__menu_item', 'items__combo'
+    ).order_by('created_at')
+    # Evaluated once; the summary, tables and daily breakdown all reuse these rows
+    orders = list(orders)
     
     # Create PDF
     buffer = BytesIO()
@@ -409,10 +513,10 @@ def export_orders_pdf(request):
     elements.append(Spacer(1, 20))
     
     # Add summary statistics
-    total_orders = orders.count()
+    total_orders = len(orders)
     total_revenue = sum(order.total for order in orders)
-    completed_orders = orders.filter(status='completed').count()
-    pending_orders = orders.exclude(status='completed').count()
+    completed_orders = sum(1 for order in orders if order.status == 'completed')
+    pending_orders = total_orders - completed_orders
     
     summary_data = [
         ['Summary Statistics', ''],
@@ -445,13 +549,13 @@ def export_orders_pdf(request):
     elements.append(Paragraph("Order Details", heading_style))
     elements.append(Spacer(1, 12))
     
-    if orders.exists():
+    if orders:
         # Create orders table header
         orders_data = [['Order #', 'Date & Time', 'Table', 'Server', 'Items', 'Total', 'Status']]
         
         for order in orders:
             # Get order items count
-            items_count = order.items.count()
+            items_count = len(order.items.all())
             
             # Format date and time
             order_datetime = timezone.localtime(order.created_at)
@@ -525,6 +629,8 @@ def export_orders_pdf(request):
                     f'Rs. {item.total_price:,.2f}'
                 ])
             
+            last_item_row = len(items_data) - 1
+            
             # Add subtotal, discount, tax, etc.
             items_data.append(['', '', 'Subtotal:', f'Rs. {order.subtotal:,.2f}'])
             if order.discount_amount > 0:
@@ -536,7 +642,7 @@ def export_orders_pdf(request):
             items_data.append(['', '', 'Total:', f'Rs. {order.total:,.2f}'])
             
             items_table = Table(items_data, colWidths=[3.5*inch, 0.7*inch, 1.3*inch, 1.3*inch])
-            items_table.setStyle(TableStyle([
+            items_style = [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#e5e7eb')),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1f2937')),
                 ('ALIGN', (0, 0), (0, -1), 'LEFT'),
@@ -549,10 +655,13 @@ def export_orders_pdf(request):
                 ('TOPPADDING', (0, 1), (-1, -1), 6),
                 ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
                 ('GRID', (0, 0), (-1, -2), 0.5, colors.HexColor('#d1d5db')),
-                ('LINEABOVE', (2, -5), (3, -5), 0.5, colors.HexColor('#9ca3af')),
+                # Summary rows vary with discount/tax/service, so anchor on the last item row
+                ('LINEABOVE', (2, last_item_row + 1), (3, last_item_row + 1), 0.5, colors.HexColor('#9ca3af')),
                 ('LINEABOVE', (2, -1), (3, -1), 1, colors.HexColor('#1f2937')),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -6), [colors.white, colors.HexColor('#f9fafb')]),
-            ]))
+            ]
+            if last_item_row > 0:
+                items_style.append(('ROWBACKGROUNDS', (0, 1), (-1, last_item_row), [colors.white, colors.HexColor('#f9fafb')]))
+            items_table.setStyle(TableStyle(items_style))
             
             elements.append(items_table)
             elements.append(Spacer(1, 15))
@@ -608,7 +717,8 @@ def export_orders_pdf(request):
         elements.append(Paragraph("No orders found for this period.", normal_style))
     
     # Build PDF
-    doc.build(elements)
+    with tracing.span('reportlab.build', flowables=len(elements)):
+        doc.build(elements)
     
     # Get the value of the BytesIO buffer and return it
     pdf = buffer.getvalue()
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-18 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('staff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('check_out__isnull', True)), fields=['user'], name='attendance_open_idx'),
+        ),
+    ]
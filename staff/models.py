@@ -40,6 +40,10 @@ class Attendance(models.Model):
     class Meta:
         db_table = 'attendance'
         ordering = ['-check_in']
+        indexes = [
+            # The open shift of a user, looked up at logout
+            models.Index(fields=['user'], name='attendance_open_idx', condition=models.Q(check_out__isnull=True)),
+        ]
     
     def __str__(self):
         return f"{self.user} - {self.check_in.date()}"
@@ -0,0 +1,21 @@
+# Generated by Django 5.0 on 2026-10-18 23:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tables', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservation',
+            index=models.Index(fields=['reservation_date', 'reservation_time'], name='reservation_date_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlist',
+            index=models.Index(fields=['status', 'created_at'], name='waitlist_status_created_idx'),
+        ),
+    ]
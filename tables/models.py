@@ -79,6 +79,9 @@ class Reservation(models.Model):
     class Meta:
         db_table = 'reservations'
         ordering = ['-reservation_date', '-reservation_time']
+        indexes = [
+            models.Index(fields=['reservation_date', 'reservation_time'], name='reservation_date_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.customer_name} - {self.reservation_date} {self.reservation_time}"
@@ -104,6 +107,9 @@ class Waitlist(models.Model):
     class Meta:
         db_table = 'waitlist'
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='waitlist_status_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.customer_name} - Party of {self.party_size}"